@@ -1,9 +1,15 @@
 # app.py
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
 from src.services.category_service import CategoryService
 from src.services.medicine_service import MedicineService
+from src.services.async_medicine_service import AsyncMedicineService, blocking_medicine_service
+from src.services.location_service import LocationService
+from src.services.export_service import list_snapshots, load_snapshot, snapshot_format, snapshot_path
+from src.services.forecast import label_series
+from src.config import connection_stats, DB_BACKEND, SNAPSHOT_DIR
+from src.services.expiry_classifier import classify_expiry
+from src.instrumentation import recorder
 
 # -------------------------------------
 # Streamlit page setup
@@ -81,10 +87,33 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # -------------------------------------
-# Initialize services
+# Initialize services (once per process, shared across reruns and sessions)
 # -------------------------------------
-cat_service = CategoryService()
-med_service = MedicineService()
+@st.cache_resource
+def get_services():
+    return CategoryService(), LocationService()
+
+@st.cache_resource
+def get_branch_services(location_id):
+    # One set per branch (None: all branches); they all share the process cache
+    return MedicineService(location_id=location_id), blocking_medicine_service(AsyncMedicineService(location_id=location_id))
+
+cat_service, loc_service = get_services()
+
+# Hidden debug panel: open the app with ?debug=1 to see this rerun's queries at the bottom of the page
+# Recording is on for this rerun's context only, never for other sessions or later reruns
+debug = st.query_params.get("debug") == "1"
+rerun_profile = recorder.begin("rerun", enable=debug)
+
+@st.cache_resource
+def get_sync_engine():
+    # Local-first mode: writes hit the SQLite replica, this worker replicates them in the background
+    from src.sync.engine import get_sync_engine as _engine
+    engine = _engine()
+    engine.start()
+    return engine
+
+sync_engine = get_sync_engine() if DB_BACKEND == "sync" else None
 
 # -------------------------------------
 # Helper functions
@@ -92,31 +121,35 @@ med_service = MedicineService()
 def fetch_categories():
     return cat_service.list_categories() or []
 
-def fetch_medicines():
-    return med_service.list_medicines() or []
-
-def parse_date(date_str):
-    try:
-        return datetime.strptime(date_str, "%Y-%m-%d").date()
-    except Exception:
-        return None
-
-def categorize_medicine(expiry_date):
-    today = datetime.today().date()
-    if expiry_date < today:
-        return "Expired", "#ff4b4b"  # Red
-    elif expiry_date <= today + timedelta(days=7):
-        return "Expiring Soon", "#ffb84b"  # Orange
-    else:
-        return "Safe", "#4caf50"  # Green
-
-def format_date_range(created_at, expiry_date):
-    try:
-        c_date = created_at.split("T")[0]
-        e_date = expiry_date
-        return f"{c_date} - {e_date}"
-    except:
-        return f"{created_at} - {expiry_date}"
+def page_cursor(key):
+    # Keyset pagination: remember the last id of each visited page so Prev/Next never re-scan
+    return st.session_state.setdefault(f"{key}_cursors", [None])[-1]
+
+def page_controls(key, rows, page_size=50, next_cursor=None):
+    # next_cursor overrides the keyset cursor (last id) for offset-paged results
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+    prev_col, info_col, next_col = st.columns([1, 4, 1])
+    with prev_col:
+        if st.button("◀ Prev", key=f"{key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with info_col:
+        st.caption(f"Page {len(cursors)} · {len(rows)} rows")
+    with next_col:
+        if st.button("Next ▶", key=f"{key}_next", disabled=len(rows) < page_size):
+            cursors.append(rows[-1]["id"] if next_cursor is None else next_cursor)
+            st.rerun()
+
+@st.cache_data(max_entries=4)
+def cached_snapshot(source, fmt):
+    # source is a path or the uploaded bytes; re-reads only when it changes
+    import io
+    return load_snapshot(source if isinstance(source, str) else io.BytesIO(source), fmt)
+
+def paged_rows(key, fetch_page, page_size=50):
+    rows = fetch_page(page_cursor(key), page_size)
+    page_controls(key, rows, page_size)
+    return rows
 
 # -------------------------------------
 # Sidebar Navigation
@@ -132,10 +165,26 @@ st.sidebar.markdown("""
 
 section = st.sidebar.radio(
     "",
-    ["📊 Dashboard", "📋 View Medicines", "➕ Add Medicine", "⏰ Expiring Soon", "🔔 Alerts", "🗑 Delete Expired"]
+    ["📊 Dashboard", "📋 View Medicines", "➕ Add Medicine", "⏰ Expiring Soon", "🔔 Alerts", "🗑 Delete Expired",
+     "📈 Forecast", "📦 Snapshot"]
 )
+locations = loc_service.list_locations()
+branch = st.sidebar.selectbox(
+    "📍 Branch", ["All branches"] + [l["name"] for l in locations],
+    # Page cursors belong to the previous branch's rows
+    on_change=lambda: [st.session_state.pop(k) for k in list(st.session_state) if k.endswith("_cursors")],
+)
+location_id = next((l["id"] for l in locations if l["name"] == branch), None)
+med_service, screen_service = get_branch_services(location_id)
 st.sidebar.markdown("---")
-st.sidebar.caption("💊 Medicine Expiry Tracker | Supabase Backend")
+st.sidebar.caption(f"💊 Medicine Expiry Tracker | {DB_BACKEND.title()} Backend")
+_conn = connection_stats()
+st.sidebar.caption(f"🔌 Connections opened: {_conn['connections_opened']} | reused: {_conn['connections_reused']}")
+if sync_engine is not None:
+    _sync = sync_engine.metrics()
+    st.sidebar.caption(f"🔄 Sync queue: {_sync['queue_depth']} | lag: {_sync['lag_seconds']:.0f}s | errors: {_sync['errors']}")
+_cache = med_service.cache.stats()
+st.sidebar.caption(f"🗄 Cache hits: {_cache['hits']} | misses: {_cache['misses']} | entries: {_cache['size']}")
 
 # -------------------------------------
 # Section: Dashboard
@@ -143,16 +192,14 @@ st.sidebar.caption("💊 Medicine Expiry Tracker | Supabase Backend")
 if section == "📊 Dashboard":
     st.title("📊 Dashboard Overview")
 
-    medicines = fetch_medicines()
-    categories = fetch_categories()
+    # Aggregate stats, the current page and due alerts are fetched concurrently in one round
+    dash = screen_service.dashboard(after_id=page_cursor("dashboard"), limit=50)
+    stats = dash["stats"]
 
-    expired = [m for m in medicines if parse_date(m["expiry_date"]) and parse_date(m["expiry_date"]) < datetime.today().date()]
-    expiring = [m for m in medicines if parse_date(m["expiry_date"]) and datetime.today().date() <= parse_date(m["expiry_date"]) <= datetime.today().date() + timedelta(days=7)]
-    
-    total_meds = len(medicines)
-    total_cats = len(categories)
-    expired_count = len(expired)
-    expiring_count = len(expiring)
+    total_meds = stats["total"]["medicines"]
+    total_cats = stats["categories"]
+    expired_count = stats["by_status"]["Expired"]["medicines"]
+    expiring_count = stats["by_status"]["Expiring Soon"]["medicines"]
 
     col1, col2, col3, col4 = st.columns(4)
     with col1:
@@ -184,34 +231,79 @@ if section == "📊 Dashboard":
             </div>
         """, unsafe_allow_html=True)
 
+    if dash["due_alerts"]:
+        st.caption(f"🔔 {len(dash['due_alerts'])} alerts due")
+
+    if stats["by_category"]:
+        st.subheader("🗂 Stock by Category")
+        st.dataframe(pd.DataFrame([{
+            "category": c["category"],
+            "medicines": c["medicines"],
+            "quantity": c["quantity"],
+            **{f"{status} (qty)": b["quantity"] for status, b in c["by_status"].items()},
+        } for c in stats["by_category"]]), use_container_width=True)
+
+    if location_id is None and len(locations) > 1:
+        # All branches in one summary query
+        st.subheader("🏬 Stock by Branch")
+        rollup = med_service.location_rollup()
+        st.dataframe(pd.DataFrame([{
+            "branch": l["location"],
+            "medicines": l["medicines"],
+            "quantity": l["quantity"],
+            **{f"{status} (qty)": b["quantity"] for status, b in l["by_status"].items()},
+        } for l in rollup["by_location"]]), use_container_width=True)
+
     st.markdown("---")
     st.subheader("📅 Medicines Summary Table")
     if total_meds == 0:
         st.info("No medicines found. Add some from the sidebar!")
     else:
-        df = pd.DataFrame(medicines)
-        df["status"] = df["expiry_date"].apply(lambda d: categorize_medicine(parse_date(d))[0])
-        df["date_range"] = df.apply(lambda x: format_date_range(x["created_at"], x["expiry_date"]), axis=1)
-        st.dataframe(df[["id","name","quantity","date_range","status"]], use_container_width=True)
+        page_controls("dashboard", dash["medicines"], 50)
+        if not dash["medicines"]:
+            # A full last page still enables Next; the page after it is empty
+            st.info("No medicines on this page.")
+        else:
+            df = classify_expiry(pd.DataFrame(dash["medicines"]))
+            st.dataframe(df[["id","name","quantity","date_range","status"]], use_container_width=True)
 
 # -------------------------------------
 # Section: View Medicines
 # -------------------------------------
 elif section == "📋 View Medicines":
     st.title("📋 All Medicines by Category")
-    categories = fetch_categories()
-    meds = fetch_medicines()
+    search_col, cat_col, status_col = st.columns([3, 2, 2])
+    with search_col:
+        query = st.text_input("🔍 Search by name", placeholder="e.g. amox 500")
+    with cat_col:
+        categories = fetch_categories()
+        cat_filter = st.selectbox("Category", ["All"] + [c["name"] for c in categories])
+    with status_col:
+        status_filter = st.selectbox("Status", ["All", "Expired", "Expiring Soon", "Safe"])
+
+    if query.strip() or cat_filter != "All" or status_filter != "All":
+        # The backend's indexed search, one query per distinct page; the in-memory prefix index
+        # would reload the whole table after every write this app makes
+        category_id = next((c["id"] for c in categories if c["name"] == cat_filter), None)
+        key = f"search|{query.strip().lower()}|{cat_filter}|{status_filter}"
+        offset = page_cursor(key) or 0
+        meds = med_service.search(query, category_id, None if status_filter == "All" else status_filter,
+                                  limit=50, offset=offset)
+        page_controls(key, meds, 50, next_cursor=offset + 50)
+    else:
+        view = screen_service.view_medicines(after_id=page_cursor("view"), limit=50)
+        categories = view["categories"]
+        meds = view["medicines"]
+        page_controls("view", meds, 50)
     if not meds:
         st.info("No medicines available.")
     else:
-        df = pd.DataFrame(meds)
-        df["status"], df["color"] = zip(*df["expiry_date"].apply(lambda d: categorize_medicine(parse_date(d))))
-        df["date_range"] = df.apply(lambda x: format_date_range(x["created_at"], x["expiry_date"]), axis=1)
-        for cat in categories:
-            cat_meds = df[df["category_id"] == cat["id"]]
-            if not cat_meds.empty:
-                st.markdown(f"### 🧾 {cat['name']}")
-                st.dataframe(cat_meds[["id","name","quantity","date_range","status"]], use_container_width=True)
+        df = classify_expiry(pd.DataFrame(meds))
+        # One pass over the page instead of a boolean mask per category
+        names = {cat["id"]: cat["name"] for cat in categories}
+        for category_id, cat_meds in df.groupby("category_id", sort=False):
+            st.markdown(f"### 🧾 {names.get(category_id, category_id)}")
+            st.dataframe(cat_meds[["id","name","quantity","date_range","status"]], use_container_width=True)
 
 # -------------------------------------
 # Section: Add Medicine
@@ -226,6 +318,10 @@ elif section == "➕ Add Medicine":
     quantity = st.number_input("Quantity", min_value=1, value=1)
     new_cat = st.text_input("Or enter new category")
     selected_cat = st.selectbox("Select existing category", ["-- choose --"] + cat_names)
+    target = med_service
+    if location_id is None:
+        add_branch = st.selectbox("Branch", [l["name"] for l in locations])
+        target = get_branch_services(next(l["id"] for l in locations if l["name"] == add_branch))[0]
 
     if st.button("Add / Update Medicine"):
         cat_name = new_cat or (selected_cat if selected_cat != "-- choose --" else None)
@@ -233,7 +329,7 @@ elif section == "➕ Add Medicine":
             st.error("Please enter medicine name and category.")
         else:
             category = cat_service.add_category(cat_name)
-            med = med_service.add_medicine(name, expiry.strftime("%Y-%m-%d"), category["id"], quantity)
+            med = target.add_medicine(name, expiry.strftime("%Y-%m-%d"), category["id"], quantity)
             st.success(f"✅ '{name}' added successfully under '{cat_name}'!")
 
 # -------------------------------------
@@ -242,15 +338,12 @@ elif section == "➕ Add Medicine":
 elif section == "⏰ Expiring Soon":
     st.title("⏰ Medicines Expiring Soon")
     days = st.slider("Show medicines expiring within days", 1, 90, 7)
-    meds = fetch_medicines()
-    soon = [m for m in meds if parse_date(m["expiry_date"]) and datetime.today().date() <= parse_date(m["expiry_date"]) <= datetime.today().date() + timedelta(days=days)]
+    soon = med_service.list_expiring_within(days)
 
     if not soon:
         st.success(f"No medicines expiring in next {days} days 🎉")
     else:
-        df = pd.DataFrame(soon)
-        df["status"] = "Expiring Soon"
-        df["date_range"] = df.apply(lambda x: format_date_range(x["created_at"], x["expiry_date"]), axis=1)
+        df = classify_expiry(pd.DataFrame(soon), window_days=days)
         st.dataframe(df[["id","name","quantity","date_range","status"]], use_container_width=True)
 
 # -------------------------------------
@@ -258,9 +351,7 @@ elif section == "⏰ Expiring Soon":
 # -------------------------------------
 elif section == "🔔 Alerts":
     st.title("🔔 Pending Alerts")
-    alerts = []
-    if hasattr(med_service, "alert_dao") and hasattr(med_service.alert_dao, "list_pending_alerts"):
-        alerts = med_service.alert_dao.list_pending_alerts()
+    alerts = paged_rows("alerts", med_service.page_pending_alerts)
     if not alerts:
         st.info("No pending alerts found.")
     else:
@@ -272,29 +363,119 @@ elif section == "🔔 Alerts":
 # -------------------------------------
 elif section == "🗑 Delete Expired":
     st.title("🗑 Delete Expired Medicines")
-    meds = fetch_medicines()
-    expired = [m for m in meds if parse_date(m["expiry_date"]) and parse_date(m["expiry_date"]) < datetime.today().date()]
+    expired = med_service.list_expired(in_stock=True)
 
     if not expired:
         st.success("No expired medicines found ✅")
     else:
         st.warning(f"Found {len(expired)} expired medicines.")
 
-        # Create DataFrame
-        df = pd.DataFrame(expired)
-
-        # Add status column
-        df["status"] = df["expiry_date"].apply(lambda d: categorize_medicine(parse_date(d))[0])
-
-        # Add formatted date range column
-        df["date_range"] = df.apply(lambda x: format_date_range(x["created_at"], x["expiry_date"]), axis=1)
+        # Create DataFrame with status and formatted date range columns
+        df = classify_expiry(pd.DataFrame(expired))
 
         # Display the DataFrame
         st.dataframe(df[["id", "name", "quantity", "date_range", "status"]], use_container_width=True)
 
         # Delete button
         if st.button("Delete All Expired"):
-            for m in expired:
-                if hasattr(med_service, "med_dao") and hasattr(med_service.med_dao, "update_medicine"):
-                    med_service.med_dao.update_medicine(m["id"], {"quantity": 0})
-            st.success("✅ Expired medicines deleted successfully!")
\ No newline at end of file
+            deleted = med_service.expire_before()
+            st.success(f"✅ {deleted} expired medicines deleted successfully!")
+
+# -------------------------------------
+# Section: Forecast
+# -------------------------------------
+elif section == "📈 Forecast":
+    st.title("📈 Expiry Forecast")
+    horizon_col, bucket_col, by_col = st.columns([3, 1, 1])
+    with horizon_col:
+        horizon = st.slider("Horizon (days)", 7, 365, 90)
+    with bucket_col:
+        bucket = st.selectbox("Bucket", ["week", "day", "month"])
+    with by_col:
+        by = st.selectbox("Group by", ["category", "location", "medicine"])
+
+    # Computed from the cached lots frame; recomputed only after a stock write
+    forecast = med_service.forecast_expiry(horizon, bucket, by, limit=20 if by == "medicine" else None)
+    if by == "category":
+        forecast = label_series(forecast, {c["id"]: c["name"] for c in fetch_categories()})
+    elif by == "location":
+        forecast = label_series(forecast, {l["id"]: l["name"] for l in locations})
+
+    col1, col2 = st.columns(2)
+    col1.metric(f"Expiring in the next {horizon} days", f"{forecast['total']['quantity']} units",
+                f"{forecast['total']['lots']} lots", delta_color="off")
+    col2.metric("Expired, still on hand", f"{forecast['expired']['quantity']} units",
+                f"{forecast['expired']['lots']} lots", delta_color="off")
+
+    if not forecast["series"]:
+        st.success(f"Nothing expires in the next {horizon} days 🎉")
+    else:
+        table = pd.DataFrame({s["label"]: s["by_bucket"] for s in forecast["series"]},
+                             index=pd.to_datetime(forecast["buckets"]))
+        table.index.name = bucket
+        st.bar_chart(table)
+        st.dataframe(table.T.assign(total=table.sum()).sort_values("total", ascending=False)
+                     .rename(columns=lambda c: c if c == "total" else c.strftime("%Y-%m-%d")),
+                     use_container_width=True)
+
+# -------------------------------------
+# Section: Snapshot (offline analysis of a `medicine export` file, no database queries)
+# -------------------------------------
+elif section == "📦 Snapshot":
+    st.title("📦 Snapshot Analysis")
+    uploaded = st.file_uploader("Snapshot file", type=["parquet", "arrow", "feather", "csv", "jsonl"])
+    name = None
+    if SNAPSHOT_DIR:
+        name = st.selectbox("...or a snapshot on the server", [None] + list_snapshots(SNAPSHOT_DIR),
+                            format_func=lambda n: "—" if n is None else n)
+    df = None
+    try:
+        if uploaded is not None:
+            df = cached_snapshot(uploaded.getvalue(), snapshot_format(uploaded.name))
+        elif name:
+            df = cached_snapshot(snapshot_path(SNAPSHOT_DIR, name), snapshot_format(name))
+    except (ValueError, OSError) as e:
+        st.error(f"Could not load snapshot: {e}")
+
+    if df is None:
+        st.info("Export one with `medicine-cli medicine export --file snapshot.parquet`.")
+    elif df.empty:
+        st.info("The snapshot has no medicines.")
+    else:
+        days = st.slider("Expiring-soon window (days)", 1, 90, 7)
+        df = classify_expiry(df, window_days=days)
+        by_status = df.groupby("status")["quantity"].agg(["count", "sum"])
+        cols = st.columns(4)
+        for col, status in zip(cols, ["Safe", "Expiring Soon", "Expired", "Unknown"]):
+            count, qty = (by_status.loc[status] if status in by_status.index else (0, 0))
+            col.metric(status, int(count), f"{int(qty)} units", delta_color="off")
+
+        for title, group in (("🗂 Quantity by Category", "category"), ("🏬 Quantity by Branch", "location")):
+            if group in df and df[group].notna().any():
+                st.subheader(title)
+                st.dataframe(df.pivot_table(index=group, columns="status", values="quantity",
+                                            aggfunc="sum", fill_value=0), use_container_width=True)
+
+        st.subheader("📋 Medicines")
+        status_filter = st.multiselect("Status", sorted(df["status"].unique()))
+        shown = df[df["status"].isin(status_filter)] if status_filter else df
+        st.caption(f"{len(shown)} of {len(df)} rows")
+        st.dataframe(shown[[c for c in ("id", "name", "category", "location", "quantity", "date_range", "status")
+                            if c in shown]].head(10000), use_container_width=True)
+
+# -------------------------------------
+# Debug panel (?debug=1)
+# -------------------------------------
+recorder.end(rerun_profile)
+if debug:
+    summary = rerun_profile.summary()
+    with st.expander(f"🐞 Debug: {summary['queries']} queries this rerun", expanded=True):
+        time_split = " | ".join(f"{kind}: {ms:.0f} ms" for kind, ms in sorted(summary["ms_by_kind"].items()))
+        st.caption(f"Wall {summary['wall_ms']:.0f} ms | {time_split} | rendering/other: {summary['other_ms']:.0f} ms | "
+                   f"{summary['rows']} rows | {summary['received_bytes'] / 1024:.1f} KiB received")
+        for site in summary["repeated"]:
+            st.warning(f"{site['name']} ran {site['calls']}x from {site['site']}")
+        if summary["sites"]:
+            st.dataframe(pd.DataFrame(summary["sites"]), use_container_width=True)
+        if st.checkbox("Show Prometheus metrics (process totals)"):
+            st.code(recorder.prometheus(), language="text")
\ No newline at end of file
@@ -0,0 +1,84 @@
+# benchmarks/bench_classify.py
+# Row-wise apply/strptime (the old app.py path) vs src.services.expiry_classifier.
+# Run from the repo root:  python -m benchmarks.bench_classify --rows 100000
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+import pandas as pd
+from src.services.expiry_classifier import classify_expiry
+
+
+def parse_date(date_str):
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d").date()
+    except Exception:
+        return None
+
+
+def categorize_medicine(expiry_date):
+    today = datetime.today().date()
+    if expiry_date < today:
+        return "Expired", "#ff4b4b"
+    elif expiry_date <= today + timedelta(days=7):
+        return "Expiring Soon", "#ffb84b"
+    else:
+        return "Safe", "#4caf50"
+
+
+def format_date_range(created_at, expiry_date):
+    try:
+        return f"{created_at.split('T')[0]} - {expiry_date}"
+    except:
+        return f"{created_at} - {expiry_date}"
+
+
+def legacy(df):
+    df = df.copy()
+    df["status"], df["color"] = zip(*df["expiry_date"].apply(lambda d: categorize_medicine(parse_date(d))))
+    df["date_range"] = df.apply(lambda x: format_date_range(x["created_at"], x["expiry_date"]), axis=1)
+    return df
+
+
+def make_rows(n, seed=42):
+    rnd = random.Random(seed)
+    today = date.today()
+    rows = []
+    for i in range(n):
+        expiry = today + timedelta(days=rnd.randint(-60, 720))
+        created = today - timedelta(days=rnd.randint(0, 365))
+        rows.append({"id": i + 1, "name": f"med-{i}", "quantity": rnd.randint(1, 500),
+                     "expiry_date": expiry.isoformat(), "created_at": f"{created.isoformat()}T10:00:00+00:00"})
+    return pd.DataFrame(rows)
+
+
+def best_of(fn, df, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    df = make_rows(args.rows)
+    old_t, old = best_of(legacy, df, args.repeat)
+    new_t, new = best_of(classify_expiry, df, args.repeat)
+
+    same = (old["status"].tolist() == new["status"].tolist()
+            and old["date_range"].tolist() == new["date_range"].tolist())
+    print(f"rows:       {args.rows}")
+    print(f"row-wise:   {old_t * 1000:.1f} ms")
+    print(f"vectorized: {new_t * 1000:.1f} ms")
+    print(f"speedup:    {old_t / new_t:.1f}x")
+    print(f"identical output: {same}")
+
+
+if __name__ == "__main__":
+    main()
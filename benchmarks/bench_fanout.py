@@ -0,0 +1,69 @@
+# benchmarks/bench_fanout.py
+# Dashboard render cost: the serial MedicineService/CategoryService calls vs one gathered
+# AsyncMedicineService.dashboard(), against the in-memory client with simulated network latency.
+# Run from the repo root:  python -m benchmarks.bench_fanout --latency 0.03
+import argparse
+import sys
+import time
+from src.dao.alert_dao import AlertDAO
+from src.dao.async_dao import ThreadedAsyncDAO
+from src.dao.category_dao import CategoryDAO
+from src.dao.medicine_dao import MedicineDAO
+from src.dao.memory_client import MemoryClient
+from src.services.async_medicine_service import AsyncMedicineService, blocking_medicine_service
+from src.services.cache import TTLCache
+from src.services.category_service import CategoryService
+from src.services.medicine_service import MedicineService
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.03, help="seconds per simulated round trip")
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--renders", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    client = MemoryClient()
+    cats = CategoryService(CategoryDAO(client), TTLCache())
+    meds = MedicineService(MedicineDAO(client), AlertDAO(client), TTLCache())
+    for i in range(args.rows):
+        cat = cats.add_category(f"cat-{i % 10}")
+        meds.add_medicine(f"med-{i}", f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}", cat["id"], i % 5 + 1)
+    client.latency = args.latency
+
+    def serial():
+        # What the Dashboard section did before: one blocking call after another
+        meds.cache.invalidate("medicines", "alerts")
+        cats.cache.invalidate("categories")
+        meds.count_by_status()
+        cats.list_categories()
+        meds.page_medicines(None, 50)
+        return meds.get_expiring_soon()
+
+    async_service = AsyncMedicineService(ThreadedAsyncDAO(MedicineDAO(client)), ThreadedAsyncDAO(CategoryDAO(client)),
+                                         ThreadedAsyncDAO(AlertDAO(client)), TTLCache())
+    fanout = blocking_medicine_service(async_service)
+
+    def gathered():
+        async_service.cache.invalidate("medicines", "alerts", "categories")
+        return fanout.dashboard(limit=50)["due_alerts"]
+
+    results = {}
+    for label, render in (("serial", serial), ("gathered", gathered)):
+        start = time.perf_counter()
+        for _ in range(args.renders):
+            due = render()
+        results[label] = ((time.perf_counter() - start) / args.renders, len(due))
+        print(f"{label:9s} {results[label][0] * 1000:8.1f} ms/render  ({results[label][1]} alerts due)")
+
+    speedup = results["serial"][0] / results["gathered"][0]
+    print(f"speedup:  {speedup:.1f}x")
+    if results["serial"][1] != results["gathered"][1] or (args.latency and speedup < 1.5):
+        print("FAIL")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
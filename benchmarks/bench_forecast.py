@@ -0,0 +1,73 @@
+# benchmarks/bench_forecast.py
+# Row-wise loop vs src.services.forecast over a synthetic lots frame; prints OK when the vectorized
+# forecast matches the loop and stays under the time budget.
+# Run from the repo root:  python -m benchmarks.bench_forecast --lots 1000000
+import argparse
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+from src.services.forecast import forecast_expiry
+
+
+def make_lots(n, n_categories=12, seed=42):
+    rng = np.random.default_rng(seed)
+    today = np.datetime64(date.today(), "D")
+    return pd.DataFrame({
+        "medicine_id": rng.integers(1, n // 2 + 2, n),
+        "name": "med",
+        "category_id": rng.integers(1, n_categories + 1, n),
+        "location_id": rng.integers(1, 4, n),
+        "expiry_date": (today + rng.integers(-60, 720, n).astype("timedelta64[D]")).astype("datetime64[ns]"),
+        "quantity": rng.integers(0, 500, n),
+    })
+
+
+def row_wise(lots, as_of, horizon_days):
+    # Per lot: week start (Monday) of its expiry, summed per (category, week)
+    start = datetime.strptime(as_of, "%Y-%m-%d").date()
+    end = start + timedelta(days=horizon_days)
+    out = defaultdict(int)
+    for lot in lots.to_dict("records"):
+        expiry = lot["expiry_date"].date()
+        if lot["quantity"] > 0 and start <= expiry < end:
+            out[(lot["category_id"], expiry - timedelta(days=expiry.weekday()))] += lot["quantity"]
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lots", type=int, default=1_000_000)
+    parser.add_argument("--horizon-days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="max vectorized time")
+    parser.add_argument("--skip-row-wise", action="store_true")
+    args = parser.parse_args(argv)
+
+    lots = make_lots(args.lots)
+    as_of = date.today().isoformat()
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = forecast_expiry(lots, as_of, args.horizon_days, "week", "category")
+        best = min(best, time.perf_counter() - start)
+    print(f"lots:       {args.lots}")
+    print(f"vectorized: {best * 1000:.1f} ms  ({result['total']['quantity']} units in {len(result['buckets'])} weeks)")
+
+    same = True
+    if not args.skip_row_wise:
+        start = time.perf_counter()
+        expected = row_wise(lots, as_of, args.horizon_days)
+        old_t = time.perf_counter() - start
+        got = {(s["key"], date.fromisoformat(week)): q
+               for s in result["series"] for week, q in zip(result["buckets"], s["by_bucket"]) if q}
+        same = got == dict(expected)
+        print(f"row-wise:   {old_t * 1000:.1f} ms")
+        print(f"speedup:    {old_t / best:.1f}x")
+        print(f"identical output: {same}")
+    print("OK" if same and best * 1000 <= args.budget_ms else "FAIL")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_startup.py
+# CLI startup cost, the way cron and shell scripts pay it: a fresh interpreter per invocation.
+# Reports median wall time per command, the overhead over a bare `python -c pass`, and the
+# slowest imports from `python -X importtime`. Fails if `--help` misses the target or drags in
+# supabase/httpx/dotenv.
+# Run from the repo root:  python -m benchmarks.bench_startup --target-ms 100
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ("supabase", "httpx", "postgrest", "dotenv", "pandas", "numpy")
+
+
+def wall_ms(cmd, runs, env):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, check=False)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def import_times(cmd, env):
+    # -X importtime lines: "import time: self | cumulative | module"
+    out = subprocess.run([sys.executable, "-X", "importtime"] + cmd[1:], stdout=subprocess.DEVNULL,
+                         stderr=subprocess.PIPE, text=True, env=env).stderr
+    rows = []
+    for line in out.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=9)
+    parser.add_argument("--target-ms", type=float, default=100.0, help="budget for `--help`")
+    parser.add_argument("--top", type=int, default=8, help="slowest imports to list")
+    args = parser.parse_args(argv)
+
+    # A local backend so no command waits on the network
+    env = dict(os.environ, DB_BACKEND="sqlite", SQLITE_PATH=":memory:")
+    cli = [sys.executable, "-m", "src.cli.main"]
+    commands = {
+        "python -c pass": [sys.executable, "-c", "pass"],
+        "--help": cli + ["--help"],
+        "medicine --help": cli + ["medicine", "--help"],
+        "medicine stats": cli + ["medicine", "stats"],
+    }
+    results = {label: wall_ms(cmd, args.runs, env) for label, cmd in commands.items()}
+    baseline = results["python -c pass"]
+    for label, ms in results.items():
+        print(f"{label:18s} {ms:7.1f} ms  (+{ms - baseline:6.1f} ms over interpreter)")
+
+    imports = import_times(commands["--help"], env)
+    print("\nslowest imports for --help (cumulative us):")
+    for us, module in sorted(imports, reverse=True)[:args.top]:
+        print(f"  {us:8d}  {module.strip()}")
+
+    heavy = sorted({m.strip() for _, m in imports if m.strip().split(".")[0] in HEAVY_MODULES})
+    ok = results["--help"] <= args.target_ms and not heavy
+    if heavy:
+        print(f"\n--help imported: {', '.join(heavy)}")
+    print(f"\n--help {results['--help']:.1f} ms vs target {args.target_ms:.0f} ms")
+    print("OK" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
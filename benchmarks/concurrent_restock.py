@@ -0,0 +1,79 @@
+# benchmarks/concurrent_restock.py
+# Concurrency check for MedicineDAO write paths against the in-memory stand-in backend.
+# Run from the repo root:  python -m benchmarks.concurrent_restock
+import argparse
+import sys
+import threading
+from src.dao.alert_dao import AlertDAO
+from src.dao.category_dao import CategoryDAO
+from src.dao.medicine_dao import MedicineDAO
+from src.dao.memory_client import MemoryClient
+
+
+def legacy_add(sb, name, expiry_date, category_id, quantity):
+    # The pre-RPC read-modify-write path, kept here to show the lost update
+    resp = sb.table("medicines").select("*").eq("name", name).eq("category_id", category_id).limit(1).execute()
+    existing = resp.data[0] if resp.data else None
+    if existing:
+        sb.table("medicines").update({"quantity": existing["quantity"] + quantity}).eq("id", existing["id"]).execute()
+    else:
+        sb.table("medicines").insert({"name": name, "expiry_date": expiry_date,
+                                      "category_id": category_id, "quantity": quantity}).execute()
+
+
+def hammer(add, threads, per_thread):
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        barrier.wait()
+        for _ in range(per_thread):
+            add()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--per-thread", type=int, default=25)
+    parser.add_argument("--latency", type=float, default=0.001, help="simulated round trip in seconds")
+    args = parser.parse_args(argv)
+    expected = args.threads * args.per_thread
+
+    client = MemoryClient(latency=args.latency)
+    cat = CategoryDAO(client).create_category("Antibiotics")
+    dao = MedicineDAO(client)
+    dao.add_medicine("Amoxicillin", "2030-01-01", cat["id"], 0)
+
+    before = client.round_trips
+    hammer(lambda: dao.add_medicine("Amoxicillin", "2030-01-01", cat["id"], 1), args.threads, args.per_thread)
+    atomic_qty = dao.add_medicine("Amoxicillin", "2030-01-01", cat["id"], 0)["quantity"]
+    trips_per_write = (client.round_trips - before - 1) / expected
+
+    legacy = MemoryClient(latency=args.latency)
+    legacy_cat = CategoryDAO(legacy).create_category("Antibiotics")
+    legacy_add(legacy, "Amoxicillin", "2030-01-01", legacy_cat["id"], 0)
+    hammer(lambda: legacy_add(legacy, "Amoxicillin", "2030-01-01", legacy_cat["id"], 1), args.threads, args.per_thread)
+    legacy_qty = legacy.tables["medicines"][0]["quantity"]
+
+    # Single-request writes for categories and alerts too
+    before = client.round_trips
+    CategoryDAO(client).create_category("Antibiotics")
+    AlertDAO(client).add_alert(1, "2029-12-25")
+    other_trips = client.round_trips - before
+
+    print(f"expected quantity:      {expected}")
+    print(f"atomic add_medicine:    {atomic_qty} ({trips_per_write:.1f} round trips/write)")
+    print(f"legacy read-modify-write: {legacy_qty} ({expected - legacy_qty} updates lost)")
+    print(f"create_category + add_alert: {other_trips} round trips")
+    ok = atomic_qty == expected and trips_per_write == 1 and other_trips == 2
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
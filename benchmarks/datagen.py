@@ -0,0 +1,164 @@
+# benchmarks/datagen.py
+# Seeded synthetic data for the benchmarks: N categories, M medicines with 1-3 lots each, and
+# one alert per lot expiry (EXPIRING_SOON_DAYS before it), the same shape add_medicine leaves
+# behind. The same seed always produces the same rows.
+#
+# Expiry dates follow a pharmacy shelf rather than a uniform spread:
+#   ~8%  already expired, up to a year ago (stock nobody has written off yet)
+#   ~4%  inside the expiring-soon window
+#   rest log-normal around ~10 months out, capped at 5 years
+# Medicines are spread over categories with a Zipf-like skew, quantities are log-normal, and
+# some lots have been dispensed down to zero.
+#
+# Rows are written straight into MemoryClient tables (client.load), so seeding 1M medicines
+# takes seconds instead of a million add_medicine_stock calls.
+# Run from the repo root:  python -m benchmarks.datagen --medicines 100000 --jsonl /tmp/meds.jsonl
+import argparse
+import json
+import math
+import random
+import sys
+from datetime import date, timedelta
+from typing import Dict, Iterator, Optional, Tuple
+from src.services.medicine_service import DATE_FMT, EXPIRING_SOON_DAYS
+
+CATEGORY_NAMES = [
+    "Antibiotics", "Analgesics", "Antihypertensives", "Antidiabetics", "Antihistamines",
+    "Antivirals", "Antifungals", "Vitamins", "Vaccines", "Anticoagulants", "Statins",
+    "Antidepressants", "Bronchodilators", "Corticosteroids", "Antacids", "Ophthalmics",
+]
+STEMS = [
+    "Amoxicillin", "Ibuprofen", "Paracetamol", "Metformin", "Lisinopril", "Amlodipine",
+    "Atorvastatin", "Cetirizine", "Omeprazole", "Salbutamol", "Prednisolone", "Warfarin",
+    "Sertraline", "Acyclovir", "Fluconazole", "Azithromycin", "Losartan", "Insulin",
+    "Loratadine", "Doxycycline", "Ciprofloxacin", "Diclofenac", "Ranitidine", "Folic Acid",
+]
+STRENGTHS = ["5mg", "10mg", "20mg", "50mg", "100mg", "250mg", "500mg", "1g"]
+
+CHUNK = 10000
+
+
+class DateStrings:
+    # Day offsets -> interned "YYYY-MM-DD" strings; 1M rows share a few thousand date objects
+    def __init__(self, today: date):
+        self.today = today
+        self._cache: Dict[int, str] = {}
+
+    def __call__(self, offset: int) -> str:
+        text = self._cache.get(offset)
+        if text is None:
+            text = (self.today + timedelta(days=offset)).strftime(DATE_FMT)
+            self._cache[offset] = text
+        return text
+
+
+def expiry_offset(rng: random.Random) -> int:
+    # Days from today; see the distribution at the top of the file
+    roll = rng.random()
+    if roll < 0.08:
+        return -rng.randint(1, 365)
+    if roll < 0.12:
+        return rng.randint(0, EXPIRING_SOON_DAYS)
+    return min(EXPIRING_SOON_DAYS + 1 + int(rng.lognormvariate(math.log(300), 0.6)), 5 * 365)
+
+
+def lot_quantity(rng: random.Random) -> int:
+    if rng.random() < 0.1:
+        return 0
+    return max(1, min(500, int(rng.lognormvariate(math.log(20), 0.9))))
+
+
+def generate(n_categories: int, n_medicines: int, seed: int = 0,
+             today: Optional[date] = None) -> Iterator[Tuple[str, Dict]]:
+    # Yields (table, row) with explicit ids starting at 1: all categories, then per medicine
+    # its row (rolled up from its lots), each lot and each lot's alert
+    rng = random.Random(seed)
+    day = DateStrings(today or date.today())
+
+    for i in range(n_categories):
+        base = CATEGORY_NAMES[i % len(CATEGORY_NAMES)]
+        yield "categories", {"id": i + 1, "name": base if i < len(CATEGORY_NAMES) else f"{base} {i + 1}"}
+
+    weights = [1 / (k + 1) for k in range(n_categories)]
+    category_ids = rng.choices(range(1, n_categories + 1), weights=weights, k=n_medicines)
+    lot_id = alert_id = 0
+    for med_id in range(1, n_medicines + 1):
+        name = f"{rng.choice(STEMS)} {rng.choice(STRENGTHS)} #{med_id}"
+        n_lots = rng.choices((1, 2, 3), weights=(70, 20, 10))[0]
+        offsets = sorted(expiry_offset(rng) for _ in range(n_lots))
+        lots = []
+        for offset in offsets:
+            lot_id += 1
+            lots.append({"id": lot_id, "medicine_id": med_id, "expiry_date": day(offset),
+                         "quantity": lot_quantity(rng)})
+        in_stock = [lot["expiry_date"] for lot in lots if lot["quantity"] > 0]
+        yield "medicines", {
+            "id": med_id,
+            "name": name,
+            "category_id": category_ids[med_id - 1],
+            "quantity": sum(lot["quantity"] for lot in lots),
+            "expiry_date": in_stock[0] if in_stock else lots[0]["expiry_date"],
+        }
+        alerted = set()
+        for lot, offset in zip(lots, offsets):
+            yield "medicine_lots", lot
+            alert_offset = offset - EXPIRING_SOON_DAYS
+            # Lots sharing an expiry share one alert, as (medicine_id, alert_date) is unique
+            if alert_offset in alerted:
+                continue
+            alerted.add(alert_offset)
+            # Alerts whose day has passed were mostly sent already
+            sent = alert_offset < 0 and rng.random() < 0.8
+            alert_id += 1
+            yield "alerts", {"id": alert_id, "medicine_id": med_id, "alert_date": day(alert_offset),
+                             "status": "Sent" if sent else "Pending"}
+
+
+def seed_client(client, n_categories: int, n_medicines: int, seed: int = 0,
+                today: Optional[date] = None) -> Dict[str, int]:
+    # Loads generate() into an empty MemoryClient; returns rows per table
+    if any(client.tables.get(t) for t in ("categories", "medicines", "medicine_lots", "alerts")):
+        raise ValueError("seed_client needs an empty MemoryClient")
+    buffers: Dict[str, list] = {}
+    counts: Dict[str, int] = {}
+    for table, row in generate(n_categories, n_medicines, seed, today):
+        buffer = buffers.setdefault(table, [])
+        buffer.append(row)
+        if len(buffer) >= CHUNK:
+            counts[table] = counts.get(table, 0) + client.load(table, buffer)
+            buffer.clear()
+    for table, buffer in buffers.items():
+        counts[table] = counts.get(table, 0) + client.load(table, buffer)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--categories", type=int, default=12)
+    parser.add_argument("--medicines", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jsonl", help="write medicine rows (name, expiry_date, category, quantity) here")
+    args = parser.parse_args(argv)
+
+    # JSON lines in the shape `medicine import` reads, one line per lot
+    categories: Dict[int, str] = {}
+    medicines: Dict[int, Dict] = {}
+    out = open(args.jsonl, "w") if args.jsonl else sys.stdout
+    try:
+        for table, row in generate(args.categories, args.medicines, args.seed):
+            if table == "categories":
+                categories[row["id"]] = row["name"]
+            elif table == "medicines":
+                medicines = {row["id"]: row}
+            elif table == "medicine_lots" and row["quantity"] > 0:
+                med = medicines[row["medicine_id"]]
+                out.write(json.dumps({"name": med["name"], "expiry_date": row["expiry_date"],
+                                      "category_name": categories[med["category_id"]],
+                                      "quantity": row["quantity"]}) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
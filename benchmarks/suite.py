@@ -0,0 +1,223 @@
+# benchmarks/suite.py
+# Service-layer benchmark suite against the in-memory Supabase stand-in (src/dao/memory_client.py)
+# seeded by benchmarks/datagen.py. For each size and operation it records latency percentiles,
+# Supabase round trips per call and peak Python memory (tracemalloc, one extra untimed run), and
+# writes everything to JSON. Pass --compare with an earlier file to flag p50 regressions.
+# Run from the repo root:
+#   python -m benchmarks.suite --sizes 1000,100000,1000000 --out /tmp/before.json
+#   python -m benchmarks.suite --sizes 1000,100000 --compare /tmp/before.json
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, List, Optional
+import pandas as pd
+from benchmarks.datagen import STEMS, STRENGTHS, expiry_offset, seed_client
+from src.dao.alert_dao import AlertDAO
+from src.dao.medicine_dao import MedicineDAO
+from src.dao.memory_client import MemoryClient
+from src.services.cache import TTLCache
+from src.services.expiry_classifier import classify_expiry
+from src.services.medicine_service import DATE_FMT, MedicineService
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    # Nearest rank, so p99 of a handful of samples is the max rather than an interpolation
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class Operation:
+    def __init__(self, name: str, run: Callable[[], object], setup: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.run = run
+        self.setup = setup or (lambda: None)
+
+
+def operations(client: MemoryClient, service: MedicineService, n_categories: int, n_medicines: int,
+               seed: int) -> List[Operation]:
+    rng = random.Random(seed)
+    today = date.today()
+    counter = iter(range(1, 10 ** 9))
+    in_stock = [m["name"] for m in client.tables["medicines"][:1000] if m["quantity"] > 0]
+    state: Dict[str, object] = {}
+
+    def add_medicine():
+        expiry = date.fromordinal(today.toordinal() + expiry_offset(rng)).strftime(DATE_FMT)
+        return service.add_medicine(f"Bench {next(counter)}", expiry, rng.randint(1, n_categories), rng.randint(1, 50))
+
+    def cold(*namespaces):
+        return lambda: service.cache.invalidate(*namespaces)
+
+    def load_frame():
+        state["rows"] = service.list_medicines()
+
+    def search():
+        # Type-ahead against the warm prefix index: a name stem plus a strength
+        return service.search(f"{rng.choice(STEMS)[:4]} {rng.choice(STRENGTHS)}", use_index=True)
+
+    def dispense():
+        name = rng.choice(in_stock)
+        if service.lots.available(name, today.strftime(DATE_FMT)) == 0:
+            return None
+        return service.dispense(name, 1, today.strftime(DATE_FMT))
+
+    return [
+        Operation("add_medicine", add_medicine),
+        Operation("get_expiring_soon", service.get_expiring_soon, cold("alerts")),
+        Operation("list_medicines", service.list_medicines, cold("medicines")),
+        Operation("page_medicines_deep", lambda: service.page_medicines(n_medicines // 2, 50), cold("medicines")),
+        Operation("count_by_status", service.count_by_status, cold("medicines")),
+        Operation("get_dashboard_stats", service.get_dashboard_stats, cold("medicines")),
+        Operation("location_rollup", service.location_rollup, cold("medicines")),
+        # Cold: reloads the lots frame, then buckets it
+        Operation("forecast_expiry", service.forecast_expiry, cold("medicines")),
+        Operation("dispense", dispense),
+        Operation("search_indexed", search, service.search_index),
+        # The Dashboard/View Medicines transform in app.py: DataFrame + vectorized classification
+        Operation("classify_expiry", lambda: classify_expiry(pd.DataFrame(state["rows"])), load_frame),
+    ]
+
+
+def measure(op: Operation, client: MemoryClient, repeat: int, budget: float) -> Dict:
+    # At least 3 samples; stop early once the time budget for this operation is spent
+    samples, trips = [], []
+    started = time.perf_counter()
+    while len(samples) < repeat and (len(samples) < 3 or time.perf_counter() - started < budget):
+        op.setup()
+        before = client.round_trips
+        start = time.perf_counter()
+        op.run()
+        samples.append((time.perf_counter() - start) * 1000)
+        trips.append(client.round_trips - before)
+
+    op.setup()
+    gc.collect()
+    tracemalloc.start()
+    op.run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "op": op.name,
+        "samples": len(samples),
+        "mean_ms": round(sum(samples) / len(samples), 3),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "max_ms": round(max(samples), 3),
+        "round_trips": round(sum(trips) / len(trips), 2),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run_size(n_medicines: int, args) -> Dict:
+    client = MemoryClient()
+    start = time.perf_counter()
+    rows = seed_client(client, args.categories, n_medicines, args.seed)
+    seed_s = time.perf_counter() - start
+    service = MedicineService(MedicineDAO(client), AlertDAO(client), TTLCache())
+    print(f"\n{n_medicines} medicines  (seeded {sum(rows.values())} rows in {seed_s:.1f} s: "
+          + ", ".join(f"{t}={n}" for t, n in rows.items()) + ")")
+    print(f"  {'operation':20s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'trips':>7s} {'peak KiB':>10s}  n")
+    results = []
+    for op in operations(client, service, args.categories, n_medicines, args.seed):
+        result = measure(op, client, args.repeat, args.budget)
+        results.append(result)
+        print(f"  {op.name:20s} {result['p50_ms']:9.2f} {result['p95_ms']:9.2f} {result['p99_ms']:9.2f} "
+              f"{result['round_trips']:7.1f} {result['peak_kib']:10.1f}  {result['samples']}")
+    return {
+        "medicines": n_medicines,
+        "rows": rows,
+        "seed_s": round(seed_s, 2),
+        "maxrss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "operations": results,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float, noise_ms: float) -> bool:
+    # p50 ratios per (size, operation) present in both runs. A regression is slower than
+    # tolerance and by more than noise_ms, so sub-millisecond jitter does not fail the run.
+    before = {(s["medicines"], o["op"]): o for s in baseline["sizes"] for o in s["operations"]}
+    ok = True
+    print(f"\nvs {baseline.get('revision') or 'baseline'} ({baseline.get('timestamp')}), p50 ratio:")
+    for size in current["sizes"]:
+        for op in size["operations"]:
+            old = before.get((size["medicines"], op["op"]))
+            if old is None:
+                continue
+            ratio = op["p50_ms"] / old["p50_ms"] if old["p50_ms"] else 1.0
+            flag = ""
+            if ratio > tolerance and op["p50_ms"] - old["p50_ms"] > noise_ms:
+                flag, ok = "  REGRESSION", False
+            if op["round_trips"] > old["round_trips"]:
+                flag += f"  round trips {old['round_trips']} -> {op['round_trips']}"
+                ok = False
+            print(f"  {size['medicines']:>8d} {op['op']:20s} {ratio:6.2f}x{flag}")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="comma-separated medicine counts")
+    parser.add_argument("--categories", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=50, help="max timed samples per operation")
+    parser.add_argument("--budget", type=float, default=5.0, help="seconds per operation before stopping early")
+    parser.add_argument("--out", help="JSON results file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare p50 and round trips against")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="allowed p50 slowdown vs --compare")
+    parser.add_argument("--noise-ms", type=float, default=1.0, help="p50 differences below this never count")
+    args = parser.parse_args(argv)
+
+    stamp = datetime.now(timezone.utc)
+    report = {
+        "timestamp": stamp.isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "categories": args.categories,
+        "sizes": [],
+    }
+    for n in sorted(int(s) for s in args.sizes.split(",")):
+        report["sizes"].append(run_size(n, args))
+        gc.collect()
+
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, stamp.strftime("%Y%m%dT%H%M%SZ") + ".json")
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {out}")
+
+    ok = True
+    if args.compare:
+        with open(args.compare) as f:
+            ok = compare(report, json.load(f), args.tolerance, args.noise_ms)
+    print("OK" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+# benchmarks/sync_check.py
+# Two branch sites with their own SQLite replicas sync against one in-memory Supabase stand-in.
+# Checks that concurrent restocks and dispenses of the same drug merge additively and both replicas converge,
+# and that stock site B keeps for its own branch stays a separate medicine on the remote and on site A.
+# After the pull every medicine's roll-up must equal the sum of its lots, and site A must be able to
+# dispense pulled stock (more than it restocked itself). Finally a push whose acknowledgement is
+# lost is sent again and must not add or take the same units twice on the remote.
+# Run from the repo root:  python -m benchmarks.sync_check
+import argparse
+import sys
+import time
+from src.dao.alert_dao import AlertDAO
+from src.dao.category_dao import CategoryDAO
+from src.dao.location_dao import LocationDAO
+from src.dao.medicine_dao import MedicineDAO
+from src.dao.memory_client import MemoryClient
+from src.dao.sqlite_dao import SQLiteLocationDAO, SQLiteStore
+from src.services.category_service import CategoryService
+from src.services.cache import TTLCache
+from src.services.location_service import LocationService
+from src.services.lot_index import InsufficientStock
+from src.services.medicine_service import MedicineService
+from src.sync.engine import SyncEngine
+from src.sync.journal import JournaledAlertDAO, JournaledCategoryDAO, JournaledMedicineDAO
+
+
+def make_site(remote, batch_size):
+    store = SQLiteStore(":memory:")
+    cache = TTLCache()
+    cats = CategoryService(JournaledCategoryDAO(store), cache)
+    meds = MedicineService(JournaledMedicineDAO(store), JournaledAlertDAO(store), cache)
+    engine = SyncEngine(store, CategoryDAO(remote), MedicineDAO(remote), AlertDAO(remote), batch_size=batch_size,
+                        remote_location_dao=LocationDAO(remote))
+    return cats, meds, engine
+
+
+def branch_service(meds, name):
+    # Same replica and cache as meds, scoped to the branch called name
+    store = meds.med_dao.store
+    branch = LocationService(SQLiteLocationDAO(store), meds.cache).add_location(name)
+    return MedicineService(JournaledMedicineDAO(store, location_id=branch["id"]),
+                           JournaledAlertDAO(store, location_id=branch["id"]), meds.cache)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--adds", type=int, default=200, help="restocks per site")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--dispense", type=int, default=50, help="units each site dispenses (FEFO) after restocking")
+    args = parser.parse_args(argv)
+
+    remote = MemoryClient()
+    site_a = make_site(remote, args.batch_size)
+    site_b = make_site(remote, args.batch_size)
+
+    start = time.perf_counter()
+    for cats, meds, _ in (site_a, site_b):
+        cat = cats.add_category("Antibiotics")
+        for i in range(args.adds):
+            meds.add_medicine("Amoxicillin", "2030-01-01", cat["id"], 1)
+            meds.add_medicine(f"Drug-{i % 10}", "2031-06-30", cat["id"], 2)
+        meds.dispense("Amoxicillin", args.dispense, as_of="2026-01-01")
+    north = branch_service(site_b[1], "North")
+    north.add_medicine("Amoxicillin", "2030-01-01", site_b[0].add_category("Antibiotics")["id"], 7)
+    north.dispense("Amoxicillin", 2, as_of="2026-01-01")
+    local_write_s = time.perf_counter() - start
+
+    depth_before = site_a[2].metrics()["queue_depth"]
+    trips_before = remote.round_trips
+    for _ in range(2):  # second pass lets each site pull the other's pushes
+        for _, _, engine in (site_a, site_b):
+            engine.sync_once()
+    sync_trips = remote.round_trips - trips_before
+
+    def qty(meds, name):
+        meds.invalidate_cache()
+        return next(m["quantity"] for m in meds.list_medicines() if m["name"] == name)
+
+    def remote_qty(location_name):
+        location_id = next(l["id"] for l in remote.tables["locations"] if l["name"] == location_name)
+        return next(m["quantity"] for m in remote.tables["medicines"]
+                    if m["name"] == "Amoxicillin" and m["location_id"] == location_id)
+
+    expected = 2 * (args.adds - args.dispense)
+    main_qty = remote_qty("Main")
+    a_qty, b_qty = qty(site_a[1], "Amoxicillin"), qty(site_b[1], "Amoxicillin")
+    north_qty = remote_qty("North")
+    a_north_qty = qty(branch_service(site_a[1], "North"), "Amoxicillin")
+    print(f"local writes:      {4 * args.adds + 2} in {local_write_s * 1000:.1f} ms (no remote calls)")
+    print(f"journal depth:     {depth_before} -> {site_a[2].metrics()['queue_depth']}")
+    print(f"remote round trips for sync: {sync_trips}")
+    print(f"Amoxicillin qty:   remote={main_qty} site_a={a_qty} site_b={b_qty} expected={expected}")
+    print(f"North branch qty:  remote={north_qty} site_a={a_north_qty} expected=5")
+    print(f"remote alerts:     {len(remote.tables['alerts'])}")
+    def lots_match(meds):
+        return all(r["quantity"] == r["lots"] for r in meds.med_dao.store.query(
+            "SELECT m.quantity, COALESCE(SUM(l.quantity), 0) AS lots FROM medicines m "
+            "LEFT JOIN medicine_lots l ON l.medicine_id = m.id GROUP BY m.id"))
+
+    lots_ok = lots_match(site_a[1]) and lots_match(site_b[1])
+    drained = site_a[2].metrics()["queue_depth"] == 0
+    pulled = args.adds - args.dispense + 15
+    try:
+        site_a[1].dispense("Amoxicillin", pulled, as_of="2026-01-01")
+        dispensed = qty(site_a[1], "Amoxicillin") == expected - pulled and lots_match(site_a[1])
+    except InsufficientStock:
+        dispensed = False
+    # Lost acknowledgement: the remote applies the segment, the local ack fails, the retry resends it
+    _, meds_a, engine_a = site_a
+    engine_a.flush()
+    before = remote_qty("Main")
+    meds_a.add_medicine("Amoxicillin", "2030-06-01", meds_a.med_dao.get_medicine_by_id(
+        next(m["id"] for m in meds_a.list_medicines() if m["name"] == "Amoxicillin"))["category_id"], 10)
+    meds_a.dispense("Amoxicillin", 3, as_of="2026-01-01")
+    ack = engine_a.journal.ack
+
+    def lost_ack(entry_ids):
+        raise ConnectionError("acknowledgement lost")
+
+    engine_a.journal.ack = lost_ack
+    try:
+        engine_a.push_once()
+    except ConnectionError:
+        pass
+    engine_a.journal.ack = ack
+    engine_a.flush()
+    replay_ok = remote_qty("Main") == before + 7
+    print(f"replayed push:     remote {before} -> {remote_qty('Main')} expected {before + 7}")
+    print(f"roll-up = sum of lots: {lots_ok}")
+    print(f"site_a dispense {pulled} (pulled stock): {'ok' if dispensed else 'failed'}")
+    ok = (main_qty == a_qty == b_qty == expected and north_qty == a_north_qty == 5
+          and drained and lots_ok and dispensed and replay_ok)
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
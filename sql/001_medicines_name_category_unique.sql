@@ -0,0 +1,4 @@
+-- Conflict key for batched upserts (medicine import). Merge any duplicate
+-- (name, category_id) rows before applying.
+alter table medicines
+    add constraint medicines_name_category_key unique (name, category_id);
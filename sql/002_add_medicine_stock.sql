@@ -0,0 +1,36 @@
+-- Atomic stock increments: one round trip, no read-modify-write on quantity.
+-- Restocking keeps the stored expiry_date, as MedicineDAO.add_medicine always did.
+
+alter table categories
+    add constraint categories_name_key unique (name);
+
+create or replace function add_medicine_stock(
+    p_name text,
+    p_expiry_date date,
+    p_category_id bigint,
+    p_quantity integer default 1
+) returns setof medicines
+language sql
+as $$
+    insert into medicines (name, expiry_date, category_id, quantity)
+    values (p_name, p_expiry_date, p_category_id, p_quantity)
+    on conflict (name, category_id)
+    do update set quantity = medicines.quantity + excluded.quantity
+    returning *;
+$$;
+
+-- p_items: [{"name": ..., "expiry_date": ..., "category_id": ..., "quantity": ...}, ...]
+-- Lines for the same medicine are summed first; ON CONFLICT cannot touch a row twice.
+create or replace function add_medicine_stock_bulk(p_items jsonb)
+returns setof medicines
+language sql
+as $$
+    insert into medicines (name, expiry_date, category_id, quantity)
+    select name, min(expiry_date), category_id, sum(quantity)::integer
+    from jsonb_to_recordset(p_items)
+        as item(name text, expiry_date date, category_id bigint, quantity integer)
+    group by name, category_id
+    on conflict (name, category_id)
+    do update set quantity = medicines.quantity + excluded.quantity
+    returning *;
+$$;
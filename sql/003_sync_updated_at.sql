@@ -0,0 +1,20 @@
+-- Change tracking for the write-behind sync engine (src/sync): clients pull rows whose
+-- (updated_at, id) is past their watermark.
+alter table medicines
+    add column if not exists updated_at timestamptz not null default now();
+
+create or replace function touch_updated_at() returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists medicines_touch_updated_at on medicines;
+create trigger medicines_touch_updated_at
+    before update on medicines
+    for each row execute function touch_updated_at();
+
+create index if not exists medicines_updated_at_idx on medicines (updated_at, id);
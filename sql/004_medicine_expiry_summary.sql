@@ -0,0 +1,69 @@
+-- Dashboard aggregates maintained on write. medicine_expiry_summary holds one row per
+-- (category_id, expiry_date) with its medicine count and total quantity; a trigger on
+-- medicines applies each insert/update/delete as a delta. dashboard_stats() then buckets
+-- those rows by status for any as_of date, so its cost follows the number of categories and
+-- distinct expiry dates, not the number of medicines.
+create table if not exists medicine_expiry_summary (
+    category_id bigint not null references categories(id),
+    expiry_date date not null,
+    medicines integer not null default 0,
+    quantity bigint not null default 0,
+    primary key (category_id, expiry_date)
+);
+
+create or replace function apply_expiry_summary(
+    p_category_id bigint, p_expiry_date date, p_medicines integer, p_quantity bigint
+) returns void
+language sql
+as $$
+    insert into medicine_expiry_summary (category_id, expiry_date, medicines, quantity)
+    values (p_category_id, p_expiry_date, p_medicines, p_quantity)
+    on conflict (category_id, expiry_date)
+    do update set medicines = medicine_expiry_summary.medicines + excluded.medicines,
+                  quantity = medicine_expiry_summary.quantity + excluded.quantity;
+$$;
+
+create or replace function medicines_expiry_summary_trigger() returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform apply_expiry_summary(old.category_id, old.expiry_date, -1, -old.quantity);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform apply_expiry_summary(new.category_id, new.expiry_date, 1, new.quantity);
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists medicines_expiry_summary on medicines;
+create trigger medicines_expiry_summary
+    after insert or update of category_id, expiry_date, quantity or delete on medicines
+    for each row execute function medicines_expiry_summary_trigger();
+
+-- Backfill from the current table
+truncate medicine_expiry_summary;
+insert into medicine_expiry_summary (category_id, expiry_date, medicines, quantity)
+select category_id, expiry_date, count(*), coalesce(sum(quantity), 0)
+from medicines
+group by category_id, expiry_date;
+
+-- One row per (category, status); categories without stock come back once with a null status
+create or replace function dashboard_stats(p_as_of date, p_window_end date)
+returns table (category_id bigint, category_name text, status text, medicines bigint, quantity bigint)
+language sql
+stable
+as $$
+    select c.id, c.name,
+           case when s.expiry_date is null then null
+                when s.expiry_date < p_as_of then 'Expired'
+                when s.expiry_date <= p_window_end then 'Expiring Soon'
+                else 'Safe' end as status,
+           coalesce(sum(s.medicines), 0)::bigint,
+           coalesce(sum(s.quantity), 0)::bigint
+    from categories c
+    left join medicine_expiry_summary s on s.category_id = c.id and s.medicines > 0
+    group by c.id, c.name, 3
+    order by c.id;
+$$;
@@ -0,0 +1,157 @@
+-- Lot-level stock. Every delivery becomes a medicine_lots row with its own expiry and quantity;
+-- medicines stays as the per-(name, category) roll-up the rest of the app reads:
+--   medicines.quantity    = running sum of its lots (applied as deltas by the trigger below)
+--   medicines.expiry_date = earliest expiry among lots still in stock, so expiry reports follow
+--                           the next lot to expire instead of whichever lot arrived first.
+create table if not exists medicine_lots (
+    id bigint generated by default as identity primary key,
+    medicine_id bigint not null references medicines(id) on delete cascade,
+    expiry_date date not null,
+    quantity integer not null check (quantity >= 0),
+    received_at timestamptz not null default now()
+);
+
+-- FEFO order within a medicine; only lots that can still be dispensed
+create index if not exists medicine_lots_fefo_idx
+    on medicine_lots (medicine_id, expiry_date, id) where quantity > 0;
+create index if not exists medicine_lots_expiry_idx
+    on medicine_lots (expiry_date) where quantity > 0;
+
+-- Backfill: one lot per existing medicine row
+insert into medicine_lots (medicine_id, expiry_date, quantity)
+select m.id, m.expiry_date, m.quantity
+from medicines m
+where m.quantity > 0
+  and not exists (select 1 from medicine_lots l where l.medicine_id = m.id);
+
+create or replace function medicine_lots_rollup() returns trigger
+language plpgsql
+as $$
+begin
+    update medicines
+    set quantity = quantity + new.quantity - (case when tg_op = 'UPDATE' then old.quantity else 0 end),
+        expiry_date = coalesce(
+            (select min(l.expiry_date) from medicine_lots l where l.medicine_id = new.medicine_id and l.quantity > 0),
+            expiry_date)
+    where id = new.medicine_id;
+    return null;
+end;
+$$;
+
+drop trigger if exists medicine_lots_rollup on medicine_lots;
+create trigger medicine_lots_rollup
+    after insert or update of quantity on medicine_lots
+    for each row execute function medicine_lots_rollup();
+
+-- Restocking now records a lot; the roll-up trigger moves quantity and expiry_date
+create or replace function add_medicine_stock(
+    p_name text,
+    p_expiry_date date,
+    p_category_id bigint,
+    p_quantity integer default 1
+) returns setof medicines
+language plpgsql
+as $$
+declare
+    v_id bigint;
+begin
+    insert into medicines (name, expiry_date, category_id, quantity)
+    values (p_name, p_expiry_date, p_category_id, 0)
+    on conflict (name, category_id) do update set name = excluded.name
+    returning id into v_id;
+    insert into medicine_lots (medicine_id, expiry_date, quantity) values (v_id, p_expiry_date, p_quantity);
+    return query select * from medicines where id = v_id;
+end;
+$$;
+
+create or replace function add_medicine_stock_bulk(p_items jsonb)
+returns setof medicines
+language plpgsql
+as $$
+begin
+    create temporary table if not exists _stock_items (
+        name text, expiry_date date, category_id bigint, quantity integer
+    ) on commit drop;
+    truncate _stock_items;
+    insert into _stock_items
+    select * from jsonb_to_recordset(p_items)
+        as item(name text, expiry_date date, category_id bigint, quantity integer);
+
+    insert into medicines (name, expiry_date, category_id, quantity)
+    select name, min(expiry_date), category_id, 0 from _stock_items group by name, category_id
+    on conflict (name, category_id) do nothing;
+
+    -- Lines of the same delivery with the same expiry are one lot
+    insert into medicine_lots (medicine_id, expiry_date, quantity)
+    select m.id, i.expiry_date, sum(coalesce(i.quantity, 1))::integer
+    from _stock_items i
+    join medicines m on m.name = i.name and m.category_id = i.category_id
+    group by m.id, i.expiry_date;
+
+    return query
+    select m.* from medicines m
+    where (m.name, m.category_id) in (select name, category_id from _stock_items);
+end;
+$$;
+
+-- p_takes: [{"lot_id": ..., "quantity": ...}, ...]. All or nothing: if any lot no longer holds
+-- the requested quantity (another dispenser got there first) the whole call fails with MT409.
+create or replace function take_lots(p_takes jsonb)
+returns setof medicine_lots
+language plpgsql
+as $$
+declare
+    t record;
+    v_lot medicine_lots;
+begin
+    for t in select * from jsonb_to_recordset(p_takes) as x(lot_id bigint, quantity integer) order by lot_id loop
+        update medicine_lots set quantity = quantity - t.quantity
+        where id = t.lot_id and quantity >= t.quantity
+        returning * into v_lot;
+        if not found then
+            raise exception 'lot % has less than % units left', t.lot_id, t.quantity using errcode = 'MT409';
+        end if;
+        return next v_lot;
+    end loop;
+end;
+$$;
+
+-- Server-side FEFO for replayed dispenses (src/sync): consumes up to p_quantity from the
+-- earliest-expiring lots and returns how many units were actually taken.
+create or replace function dispense_medicine(p_name text, p_category_id bigint, p_quantity integer)
+returns integer
+language plpgsql
+as $$
+declare
+    v_left integer := p_quantity;
+    v_lot record;
+    v_take integer;
+begin
+    for v_lot in
+        select l.id, l.quantity from medicine_lots l
+        join medicines m on m.id = l.medicine_id
+        where m.name = p_name and m.category_id = p_category_id and l.quantity > 0
+        order by l.expiry_date, l.id
+        for update of l
+    loop
+        exit when v_left <= 0;
+        v_take := least(v_left, v_lot.quantity);
+        update medicine_lots set quantity = quantity - v_take where id = v_lot.id;
+        v_left := v_left - v_take;
+    end loop;
+    return p_quantity - v_left;
+end;
+$$;
+
+-- expire_before now empties expired lots; unexpired lots of the same medicine keep their stock
+create or replace function expire_lots_before(p_as_of date)
+returns integer
+language sql
+as $$
+    with expired as (
+        update medicine_lots set quantity = 0
+        where expiry_date < p_as_of and quantity > 0
+        returning medicine_id
+    )
+    select count(distinct medicine_id)::integer from expired;
+$$;
@@ -0,0 +1,82 @@
+-- Alerts become a schedule instead of a log: at most one alert per (medicine_id, alert_date),
+-- generated from per-category lead times (e.g. 90/30/7 days before each in-stock lot expires).
+-- Restocking no longer piles up duplicate pending alerts, and regenerate_alerts() rebuilds the
+-- whole schedule in set-based passes.
+
+-- Collapse existing duplicates onto the oldest row; if any copy was already sent, the survivor
+-- is marked Sent so the alert is not delivered again
+update alerts a
+set status = 'Sent'
+from (
+    select medicine_id, alert_date, min(id) as keep_id
+    from alerts
+    group by medicine_id, alert_date
+    having count(*) > 1 and bool_or(status = 'Sent')
+) d
+where a.id = d.keep_id;
+
+delete from alerts a
+using alerts b
+where a.medicine_id = b.medicine_id and a.alert_date = b.alert_date and a.id > b.id;
+
+create unique index if not exists alerts_medicine_date_key on alerts (medicine_id, alert_date);
+
+-- Lead times per category; categories without rows use the app's default (ALERT_LEAD_DAYS)
+create table if not exists alert_lead_times (
+    category_id bigint not null references categories(id) on delete cascade,
+    lead_days integer not null check (lead_days >= 0),
+    primary key (category_id, lead_days)
+);
+
+-- One pass computes every (medicine, alert_date) the schedule wants from in-stock lots, one
+-- insert adds the missing ones and one delete drops pending alerts the schedule no longer
+-- wants (sold-out or expired lots, removed lead times). Sent alerts are kept as history.
+-- Dates already behind p_as_of are only created for a category's shortest lead time, so
+-- short-dated stock gets one due alert rather than one per lead time.
+create or replace function regenerate_alerts(p_as_of date, p_default_lead_days integer[])
+returns table (inserted integer, removed integer)
+language plpgsql
+as $$
+declare
+    v_inserted integer;
+    v_removed integer;
+begin
+    create temporary table if not exists _wanted_alerts (
+        medicine_id bigint, alert_date date, due boolean
+    ) on commit drop;
+    truncate _wanted_alerts;
+
+    insert into _wanted_alerts
+    with leads as (
+        select category_id, lead_days from alert_lead_times
+        union all
+        select c.id, d.lead_days
+        from categories c cross join unnest(p_default_lead_days) as d(lead_days)
+        where not exists (select 1 from alert_lead_times t where t.category_id = c.id)
+    ),
+    last_call as (
+        select category_id, min(lead_days) as lead_days from leads group by category_id
+    )
+    select l.medicine_id, l.expiry_date - s.lead_days,
+           bool_or(l.expiry_date - s.lead_days >= p_as_of or s.lead_days = lc.lead_days)
+    from medicine_lots l
+    join medicines m on m.id = l.medicine_id
+    join leads s on s.category_id = m.category_id
+    join last_call lc on lc.category_id = m.category_id
+    where l.quantity > 0
+    group by l.medicine_id, l.expiry_date - s.lead_days;
+
+    insert into alerts (medicine_id, alert_date, status)
+    select medicine_id, alert_date, 'Pending' from _wanted_alerts where due
+    on conflict (medicine_id, alert_date) do nothing;
+    get diagnostics v_inserted = row_count;
+
+    delete from alerts a
+    where a.status = 'Pending'
+      and not exists (select 1 from _wanted_alerts w
+                      where w.medicine_id = a.medicine_id and w.alert_date = a.alert_date);
+    get diagnostics v_removed = row_count;
+
+    return query select v_inserted, v_removed;
+end;
+$$;
@@ -0,0 +1,10 @@
+-- Medicine search (MedicineDAO.search_medicines). A search term must start a word of the name,
+-- sent by PostgREST as two ilike filters per term: 'term%' and '% term%'. A b-tree can only
+-- serve the first, so names get a trigram GIN index, which serves any ilike pattern of three
+-- or more characters (shorter terms fall back to a scan of the name-ordered index).
+create extension if not exists pg_trgm;
+
+create index if not exists medicines_name_trgm_idx on medicines using gin (name gin_trgm_ops);
+
+-- Category-filtered results come back in name order without a sort
+create index if not exists medicines_category_name_idx on medicines (category_id, name, id);
@@ -0,0 +1,295 @@
+-- Branches. Every medicine row (and with it its lots and alerts) belongs to one location, so each
+-- branch's stock, expiry reports and alerts read their own slice of the tables through
+-- location-leading indexes. Categories and alert lead times stay shared by all branches.
+-- Existing stock moves to location 1 ('Main'), which is also where stock written without a
+-- location goes.
+create table if not exists locations (
+    id bigint generated by default as identity primary key,
+    name text not null unique,
+    created_at timestamptz not null default now()
+);
+
+insert into locations (id, name) values (1, 'Main') on conflict do nothing;
+select setval(pg_get_serial_sequence('locations', 'id'), greatest((select max(id) from locations), 1));
+
+alter table medicines add column if not exists location_id bigint not null default 1 references locations(id);
+
+-- A medicine is unique per branch now
+alter table medicines drop constraint if exists medicines_name_category_key;
+alter table medicines drop constraint if exists medicines_location_name_category_key;
+alter table medicines
+    add constraint medicines_location_name_category_key unique (location_id, name, category_id);
+
+create index if not exists medicines_location_expiry_idx on medicines (location_id, expiry_date);
+create index if not exists medicines_location_category_name_idx on medicines (location_id, category_id, name, id);
+
+-- Alerts carry their medicine's location (set by trigger, never by the client) so a branch's
+-- pending alerts are one index range
+alter table alerts add column if not exists location_id bigint references locations(id);
+update alerts a set location_id = m.location_id from medicines m where m.id = a.medicine_id and a.location_id is null;
+alter table alerts alter column location_id set not null;
+
+create or replace function alerts_location() returns trigger
+language plpgsql
+as $$
+begin
+    select location_id into new.location_id from medicines where id = new.medicine_id;
+    return new;
+end;
+$$;
+
+drop trigger if exists alerts_location on alerts;
+create trigger alerts_location
+    before insert or update of medicine_id on alerts
+    for each row execute function alerts_location();
+
+create index if not exists alerts_location_status_date_idx on alerts (location_id, status, alert_date);
+
+-- ---------------------------------------------------------------------------------------------
+-- Expiry summary per (location, category, expiry_date); replaces sql/004's per-category table
+-- ---------------------------------------------------------------------------------------------
+drop trigger if exists medicines_expiry_summary on medicines;
+drop function if exists dashboard_stats(date, date);
+drop function if exists apply_expiry_summary(bigint, date, integer, bigint);
+drop table if exists medicine_expiry_summary;
+
+create table medicine_expiry_summary (
+    location_id bigint not null references locations(id),
+    category_id bigint not null references categories(id),
+    expiry_date date not null,
+    medicines integer not null default 0,
+    quantity bigint not null default 0,
+    primary key (location_id, category_id, expiry_date)
+);
+
+create or replace function apply_expiry_summary(
+    p_location_id bigint, p_category_id bigint, p_expiry_date date, p_medicines integer, p_quantity bigint
+) returns void
+language sql
+as $$
+    insert into medicine_expiry_summary (location_id, category_id, expiry_date, medicines, quantity)
+    values (p_location_id, p_category_id, p_expiry_date, p_medicines, p_quantity)
+    on conflict (location_id, category_id, expiry_date)
+    do update set medicines = medicine_expiry_summary.medicines + excluded.medicines,
+                  quantity = medicine_expiry_summary.quantity + excluded.quantity;
+$$;
+
+create or replace function medicines_expiry_summary_trigger() returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform apply_expiry_summary(old.location_id, old.category_id, old.expiry_date, -1, -old.quantity);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform apply_expiry_summary(new.location_id, new.category_id, new.expiry_date, 1, new.quantity);
+    end if;
+    return null;
+end;
+$$;
+
+create trigger medicines_expiry_summary
+    after insert or update of location_id, category_id, expiry_date, quantity or delete on medicines
+    for each row execute function medicines_expiry_summary_trigger();
+
+insert into medicine_expiry_summary (location_id, category_id, expiry_date, medicines, quantity)
+select location_id, category_id, expiry_date, count(*), coalesce(sum(quantity), 0)
+from medicines
+group by location_id, category_id, expiry_date;
+
+-- One row per (category, status) for one location, or for all of them when p_location_id is null
+create or replace function dashboard_stats(p_as_of date, p_window_end date, p_location_id bigint default null)
+returns table (category_id bigint, category_name text, status text, medicines bigint, quantity bigint)
+language sql
+stable
+as $$
+    select c.id, c.name,
+           case when s.expiry_date is null then null
+                when s.expiry_date < p_as_of then 'Expired'
+                when s.expiry_date <= p_window_end then 'Expiring Soon'
+                else 'Safe' end as status,
+           coalesce(sum(s.medicines), 0)::bigint,
+           coalesce(sum(s.quantity), 0)::bigint
+    from categories c
+    left join medicine_expiry_summary s
+        on s.category_id = c.id and s.medicines > 0
+       and (p_location_id is null or s.location_id = p_location_id)
+    group by c.id, c.name, 3
+    order by c.id;
+$$;
+
+-- Cross-branch roll-up: one row per (location, status) from the same summary table, in one
+-- query instead of a dashboard_stats call per branch. Locations without stock come back once
+-- with a null status.
+create or replace function location_stats(p_as_of date, p_window_end date)
+returns table (location_id bigint, location_name text, status text, medicines bigint, quantity bigint)
+language sql
+stable
+as $$
+    select l.id, l.name,
+           case when s.expiry_date is null then null
+                when s.expiry_date < p_as_of then 'Expired'
+                when s.expiry_date <= p_window_end then 'Expiring Soon'
+                else 'Safe' end as status,
+           coalesce(sum(s.medicines), 0)::bigint,
+           coalesce(sum(s.quantity), 0)::bigint
+    from locations l
+    left join medicine_expiry_summary s on s.location_id = l.id and s.medicines > 0
+    group by l.id, l.name, 3
+    order by l.id;
+$$;
+
+-- ---------------------------------------------------------------------------------------------
+-- Stock functions from sql/005 and sql/006 with a location. The old signatures are dropped so
+-- PostgREST never has two overloads to choose from.
+-- ---------------------------------------------------------------------------------------------
+drop function if exists add_medicine_stock(text, date, bigint, integer);
+create or replace function add_medicine_stock(
+    p_name text,
+    p_expiry_date date,
+    p_category_id bigint,
+    p_quantity integer default 1,
+    p_location_id bigint default null
+) returns setof medicines
+language plpgsql
+as $$
+declare
+    v_id bigint;
+begin
+    insert into medicines (name, expiry_date, category_id, quantity, location_id)
+    values (p_name, p_expiry_date, p_category_id, 0, coalesce(p_location_id, 1))
+    on conflict (location_id, name, category_id) do update set name = excluded.name
+    returning id into v_id;
+    insert into medicine_lots (medicine_id, expiry_date, quantity) values (v_id, p_expiry_date, p_quantity);
+    return query select * from medicines where id = v_id;
+end;
+$$;
+
+-- Items may carry a location_id each (the sync engine pushes several branches in one batch)
+create or replace function add_medicine_stock_bulk(p_items jsonb)
+returns setof medicines
+language plpgsql
+as $$
+begin
+    create temporary table if not exists _stock_items (
+        name text, expiry_date date, category_id bigint, quantity integer, location_id bigint
+    ) on commit drop;
+    truncate _stock_items;
+    insert into _stock_items
+    select name, expiry_date, category_id, quantity, coalesce(location_id, 1)
+    from jsonb_to_recordset(p_items)
+        as item(name text, expiry_date date, category_id bigint, quantity integer, location_id bigint);
+
+    insert into medicines (name, expiry_date, category_id, quantity, location_id)
+    select name, min(expiry_date), category_id, 0, location_id from _stock_items
+    group by location_id, name, category_id
+    on conflict (location_id, name, category_id) do nothing;
+
+    insert into medicine_lots (medicine_id, expiry_date, quantity)
+    select m.id, i.expiry_date, sum(coalesce(i.quantity, 1))::integer
+    from _stock_items i
+    join medicines m on m.location_id = i.location_id and m.name = i.name and m.category_id = i.category_id
+    group by m.id, i.expiry_date;
+
+    return query
+    select m.* from medicines m
+    where (m.location_id, m.name, m.category_id) in (select location_id, name, category_id from _stock_items);
+end;
+$$;
+
+drop function if exists dispense_medicine(text, bigint, integer);
+create or replace function dispense_medicine(
+    p_name text, p_category_id bigint, p_quantity integer, p_location_id bigint default null
+) returns integer
+language plpgsql
+as $$
+declare
+    v_left integer := p_quantity;
+    v_lot record;
+    v_take integer;
+begin
+    for v_lot in
+        select l.id, l.quantity from medicine_lots l
+        join medicines m on m.id = l.medicine_id
+        where m.location_id = coalesce(p_location_id, 1) and m.name = p_name
+          and m.category_id = p_category_id and l.quantity > 0
+        order by l.expiry_date, l.id
+        for update of l
+    loop
+        exit when v_left <= 0;
+        v_take := least(v_left, v_lot.quantity);
+        update medicine_lots set quantity = quantity - v_take where id = v_lot.id;
+        v_left := v_left - v_take;
+    end loop;
+    return p_quantity - v_left;
+end;
+$$;
+
+-- p_location_id null expires every location's lots
+drop function if exists expire_lots_before(date);
+create or replace function expire_lots_before(p_as_of date, p_location_id bigint default null)
+returns integer
+language sql
+as $$
+    with expired as (
+        update medicine_lots l set quantity = 0
+        from medicines m
+        where m.id = l.medicine_id
+          and (p_location_id is null or m.location_id = p_location_id)
+          and l.expiry_date < p_as_of and l.quantity > 0
+        returning l.medicine_id
+    )
+    select count(distinct medicine_id)::integer from expired;
+$$;
+
+-- Same passes as sql/006_alert_schedule.sql, limited to one location unless p_location_id is null
+drop function if exists regenerate_alerts(date, integer[]);
+create or replace function regenerate_alerts(
+    p_as_of date, p_default_lead_days integer[], p_location_id bigint default null
+) returns table (inserted integer, removed integer)
+language plpgsql
+as $$
+declare
+    v_inserted integer;
+    v_removed integer;
+begin
+    create temporary table if not exists _wanted_alerts (
+        medicine_id bigint, alert_date date, due boolean
+    ) on commit drop;
+    truncate _wanted_alerts;
+
+    insert into _wanted_alerts
+    with leads as (
+        select category_id, lead_days from alert_lead_times
+        union all
+        select c.id, d.lead_days
+        from categories c cross join unnest(p_default_lead_days) as d(lead_days)
+        where not exists (select 1 from alert_lead_times t where t.category_id = c.id)
+    ),
+    last_call as (
+        select category_id, min(lead_days) as lead_days from leads group by category_id
+    )
+    select l.medicine_id, l.expiry_date - s.lead_days,
+           bool_or(l.expiry_date - s.lead_days >= p_as_of or s.lead_days = lc.lead_days)
+    from medicine_lots l
+    join medicines m on m.id = l.medicine_id
+    join leads s on s.category_id = m.category_id
+    join last_call lc on lc.category_id = m.category_id
+    where l.quantity > 0 and (p_location_id is null or m.location_id = p_location_id)
+    group by l.medicine_id, l.expiry_date - s.lead_days;
+
+    insert into alerts (medicine_id, alert_date, status)
+    select medicine_id, alert_date, 'Pending' from _wanted_alerts where due
+    on conflict (medicine_id, alert_date) do nothing;
+    get diagnostics v_inserted = row_count;
+
+    delete from alerts a
+    where a.status = 'Pending'
+      and (p_location_id is null or a.location_id = p_location_id)
+      and not exists (select 1 from _wanted_alerts w
+                      where w.medicine_id = a.medicine_id and w.alert_date = a.alert_date);
+    get diagnostics v_removed = row_count;
+
+    return query select v_inserted, v_removed;
+end;
+$$;
@@ -0,0 +1,98 @@
+-- Expiry summary quantities from lots. sql/008's trigger on medicines put a medicine's whole
+-- quantity under its roll-up expiry_date (the earliest lot in stock), so a medicine with lots
+-- expiring in different months showed all of its units in the status of the first one. Now:
+--   medicines  counted once per medicine at its roll-up expiry_date (trigger on medicines)
+--   quantity   counted per lot at the lot's own expiry_date (trigger on medicine_lots)
+create or replace function medicines_expiry_summary_trigger() returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform apply_expiry_summary(old.location_id, old.category_id, old.expiry_date, -1, 0);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform apply_expiry_summary(new.location_id, new.category_id, new.expiry_date, 1, 0);
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists medicines_expiry_summary on medicines;
+create trigger medicines_expiry_summary
+    after insert or update of location_id, category_id, expiry_date or delete on medicines
+    for each row execute function medicines_expiry_summary_trigger();
+
+create or replace function medicine_lots_expiry_summary_trigger() returns trigger
+language plpgsql
+as $$
+declare
+    v_location_id bigint;
+    v_category_id bigint;
+begin
+    select location_id, category_id into v_location_id, v_category_id from medicines where id = new.medicine_id;
+    if tg_op = 'UPDATE' then
+        perform apply_expiry_summary(v_location_id, v_category_id, old.expiry_date, 0, -old.quantity);
+    end if;
+    perform apply_expiry_summary(v_location_id, v_category_id, new.expiry_date, 0, new.quantity);
+    return null;
+end;
+$$;
+
+drop trigger if exists medicine_lots_expiry_summary on medicine_lots;
+create trigger medicine_lots_expiry_summary
+    after insert or update of expiry_date, quantity on medicine_lots
+    for each row execute function medicine_lots_expiry_summary_trigger();
+
+-- Backfill: medicine counts from medicines, quantities from lots
+truncate medicine_expiry_summary;
+insert into medicine_expiry_summary (location_id, category_id, expiry_date, medicines, quantity)
+select location_id, category_id, expiry_date, count(*), 0
+from medicines
+group by location_id, category_id, expiry_date;
+
+insert into medicine_expiry_summary (location_id, category_id, expiry_date, medicines, quantity)
+select m.location_id, m.category_id, l.expiry_date, 0, sum(l.quantity)
+from medicine_lots l
+join medicines m on m.id = l.medicine_id
+group by m.location_id, m.category_id, l.expiry_date
+on conflict (location_id, category_id, expiry_date)
+do update set quantity = medicine_expiry_summary.quantity + excluded.quantity;
+
+-- A (location, category, expiry_date) row can now hold units without a medicine counted there
+create or replace function dashboard_stats(p_as_of date, p_window_end date, p_location_id bigint default null)
+returns table (category_id bigint, category_name text, status text, medicines bigint, quantity bigint)
+language sql
+stable
+as $$
+    select c.id, c.name,
+           case when s.expiry_date is null then null
+                when s.expiry_date < p_as_of then 'Expired'
+                when s.expiry_date <= p_window_end then 'Expiring Soon'
+                else 'Safe' end as status,
+           coalesce(sum(s.medicines), 0)::bigint,
+           coalesce(sum(s.quantity), 0)::bigint
+    from categories c
+    left join medicine_expiry_summary s
+        on s.category_id = c.id and (s.medicines > 0 or s.quantity > 0)
+       and (p_location_id is null or s.location_id = p_location_id)
+    group by c.id, c.name, 3
+    order by c.id;
+$$;
+
+create or replace function location_stats(p_as_of date, p_window_end date)
+returns table (location_id bigint, location_name text, status text, medicines bigint, quantity bigint)
+language sql
+stable
+as $$
+    select l.id, l.name,
+           case when s.expiry_date is null then null
+                when s.expiry_date < p_as_of then 'Expired'
+                when s.expiry_date <= p_window_end then 'Expiring Soon'
+                else 'Safe' end as status,
+           coalesce(sum(s.medicines), 0)::bigint,
+           coalesce(sum(s.quantity), 0)::bigint
+    from locations l
+    left join medicine_expiry_summary s on s.location_id = l.id and (s.medicines > 0 or s.quantity > 0)
+    group by l.id, l.name, 3
+    order by l.id;
+$$;
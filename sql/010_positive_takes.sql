@@ -0,0 +1,56 @@
+-- Takes and dispenses must remove at least one unit. A negative quantity passed the
+-- "quantity >= t.quantity" guard and raised the lot instead: stock added without a lot, an
+-- alert or a journal entry. Both functions now reject it with invalid_parameter_value (22023).
+create or replace function take_lots(p_takes jsonb)
+returns setof medicine_lots
+language plpgsql
+as $$
+declare
+    t record;
+    v_lot medicine_lots;
+begin
+    for t in select * from jsonb_to_recordset(p_takes) as x(lot_id bigint, quantity integer) order by lot_id loop
+        if t.quantity is null or t.quantity < 1 then
+            raise exception 'take from lot % must be at least 1 unit, got %', t.lot_id, t.quantity
+                using errcode = '22023';
+        end if;
+        update medicine_lots set quantity = quantity - t.quantity
+        where id = t.lot_id and quantity >= t.quantity
+        returning * into v_lot;
+        if not found then
+            raise exception 'lot % has less than % units left', t.lot_id, t.quantity using errcode = 'MT409';
+        end if;
+        return next v_lot;
+    end loop;
+end;
+$$;
+
+create or replace function dispense_medicine(
+    p_name text, p_category_id bigint, p_quantity integer, p_location_id bigint default null
+) returns integer
+language plpgsql
+as $$
+declare
+    v_left integer := p_quantity;
+    v_lot record;
+    v_take integer;
+begin
+    if p_quantity is null or p_quantity < 1 then
+        raise exception 'p_quantity must be at least 1, got %', p_quantity using errcode = '22023';
+    end if;
+    for v_lot in
+        select l.id, l.quantity from medicine_lots l
+        join medicines m on m.id = l.medicine_id
+        where m.location_id = coalesce(p_location_id, 1) and m.name = p_name
+          and m.category_id = p_category_id and l.quantity > 0
+        order by l.expiry_date, l.id
+        for update of l
+    loop
+        exit when v_left <= 0;
+        v_take := least(v_left, v_lot.quantity);
+        update medicine_lots set quantity = quantity - v_take where id = v_lot.id;
+        v_left := v_left - v_take;
+    end loop;
+    return p_quantity - v_left;
+end;
+$$;
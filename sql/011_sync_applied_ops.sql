@@ -0,0 +1,89 @@
+-- Exactly-once application of replayed sync pushes (src/sync/engine.py). A replica sends each
+-- additive journal entry (stock, dispense) with an op id "<replica id>:<journal id>". The op id is
+-- recorded here in the same transaction as the write, so a push resent after a lost
+-- acknowledgement finds its ids already taken and adds nothing.
+create table if not exists sync_applied_ops (
+    op_id text primary key,
+    applied_at timestamptz not null default now()
+);
+
+-- Items: {name, expiry_date, category_id, quantity, location_id, op_id}; op_id is optional
+create or replace function add_medicine_stock_bulk(p_items jsonb)
+returns setof medicines
+language plpgsql
+as $$
+begin
+    create temporary table if not exists _stock_items (
+        name text, expiry_date date, category_id bigint, quantity integer, location_id bigint, op_id text,
+        replayed boolean not null default false
+    ) on commit drop;
+    truncate _stock_items;
+    insert into _stock_items (name, expiry_date, category_id, quantity, location_id, op_id)
+    select name, expiry_date, category_id, quantity, coalesce(location_id, 1), op_id
+    from jsonb_to_recordset(p_items)
+        as item(name text, expiry_date date, category_id bigint, quantity integer, location_id bigint, op_id text);
+
+    with claimed as (
+        insert into sync_applied_ops (op_id)
+        select distinct op_id from _stock_items where op_id is not null
+        on conflict (op_id) do nothing
+        returning op_id
+    )
+    update _stock_items set replayed = true
+    where op_id is not null and op_id not in (select op_id from claimed);
+
+    insert into medicines (name, expiry_date, category_id, quantity, location_id)
+    select name, min(expiry_date), category_id, 0, location_id from _stock_items
+    group by location_id, name, category_id
+    on conflict (location_id, name, category_id) do nothing;
+
+    insert into medicine_lots (medicine_id, expiry_date, quantity)
+    select m.id, i.expiry_date, sum(coalesce(i.quantity, 1))::integer
+    from _stock_items i
+    join medicines m on m.location_id = i.location_id and m.name = i.name and m.category_id = i.category_id
+    where not i.replayed
+    group by m.id, i.expiry_date;
+
+    return query
+    select m.* from medicines m
+    where (m.location_id, m.name, m.category_id) in (select location_id, name, category_id from _stock_items);
+end;
+$$;
+
+drop function if exists dispense_medicine(text, bigint, integer, bigint);
+create or replace function dispense_medicine(
+    p_name text, p_category_id bigint, p_quantity integer, p_location_id bigint default null,
+    p_op_id text default null
+) returns integer
+language plpgsql
+as $$
+declare
+    v_left integer := p_quantity;
+    v_lot record;
+    v_take integer;
+begin
+    if p_quantity is null or p_quantity < 1 then
+        raise exception 'p_quantity must be at least 1, got %', p_quantity using errcode = '22023';
+    end if;
+    if p_op_id is not null then
+        insert into sync_applied_ops (op_id) values (p_op_id) on conflict (op_id) do nothing;
+        if not found then
+            return 0;
+        end if;
+    end if;
+    for v_lot in
+        select l.id, l.quantity from medicine_lots l
+        join medicines m on m.id = l.medicine_id
+        where m.location_id = coalesce(p_location_id, 1) and m.name = p_name
+          and m.category_id = p_category_id and l.quantity > 0
+        order by l.expiry_date, l.id
+        for update of l
+    loop
+        exit when v_left <= 0;
+        v_take := least(v_left, v_lot.quantity);
+        update medicine_lots set quantity = quantity - v_take where id = v_lot.id;
+        v_left := v_left - v_take;
+    end loop;
+    return p_quantity - v_left;
+end;
+$$;
@@ -0,0 +1,11 @@
+-- Replace a category's alert lead times in one transaction. AlertDAO.set_lead_times used to send
+-- a delete and then an insert: a failed insert left the category on the default schedule, and a
+-- regenerate_alerts() between the two requests dropped its pending alerts.
+create or replace function set_lead_times(p_category_id bigint, p_lead_days integer[])
+returns void
+language sql
+as $$
+    delete from alert_lead_times where category_id = p_category_id;
+    insert into alert_lead_times (category_id, lead_days)
+    select distinct p_category_id, d from unnest(p_lead_days) as d;
+$$;
@@ -0,0 +1,48 @@
+-- Deleted lots leave medicine_expiry_summary. sql/009's lot trigger only handled insert and
+-- update, so a deleted lot's units stayed in the dashboard. Deleting a medicine cascades to its
+-- lots after the medicine row is gone (the lot trigger can no longer find its location and
+-- category), so a BEFORE DELETE trigger on medicines takes the lots' units off first and the lot
+-- trigger only handles lots deleted on their own.
+create or replace function medicines_lots_summary_delete_trigger() returns trigger
+language plpgsql
+as $$
+begin
+    perform apply_expiry_summary(old.location_id, old.category_id, l.expiry_date, 0, -l.quantity)
+    from (select expiry_date, sum(quantity) as quantity from medicine_lots
+          where medicine_id = old.id group by expiry_date) l;
+    return old;
+end;
+$$;
+
+drop trigger if exists medicines_lots_summary_delete on medicines;
+create trigger medicines_lots_summary_delete
+    before delete on medicines
+    for each row execute function medicines_lots_summary_delete_trigger();
+
+create or replace function medicine_lots_expiry_summary_trigger() returns trigger
+language plpgsql
+as $$
+declare
+    v_location_id bigint;
+    v_category_id bigint;
+begin
+    if tg_op = 'DELETE' then
+        select location_id, category_id into v_location_id, v_category_id from medicines where id = old.medicine_id;
+        if found then
+            perform apply_expiry_summary(v_location_id, v_category_id, old.expiry_date, 0, -old.quantity);
+        end if;
+        return null;
+    end if;
+    select location_id, category_id into v_location_id, v_category_id from medicines where id = new.medicine_id;
+    if tg_op = 'UPDATE' then
+        perform apply_expiry_summary(v_location_id, v_category_id, old.expiry_date, 0, -old.quantity);
+    end if;
+    perform apply_expiry_summary(v_location_id, v_category_id, new.expiry_date, 0, new.quantity);
+    return null;
+end;
+$$;
+
+drop trigger if exists medicine_lots_expiry_summary on medicine_lots;
+create trigger medicine_lots_expiry_summary
+    after insert or update of expiry_date, quantity or delete on medicine_lots
+    for each row execute function medicine_lots_expiry_summary_trigger();
@@ -22,19 +22,73 @@
 # src/cli/main.py
 import argparse
 import json
-from datetime import datetime
-from src.services import category_service, medicine_service
+import sys
+import time
+from typing import Dict, Iterator, List
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
 
 class CLIApp:
     def __init__(self):
         self.parser = argparse.ArgumentParser(prog="medicine-cli")
+        self.parser.add_argument("--conn-stats", action="store_true",
+                                 help="print opened/reused connection counts to stderr on exit")
+        self.parser.add_argument("--cache-stats", action="store_true",
+                                 help="print service cache hit/miss counts to stderr on exit")
+        self.parser.add_argument("--profile", action="store_true",
+                                 help="print query counts, latency and call sites for this command to stderr")
+        self.parser.add_argument("--profile-out", metavar="PATH",
+                                 help="write this command's query events (.jsonl) or Prometheus metrics (other) to PATH")
+        self.parser.add_argument("--location", metavar="NAME",
+                                 help="limit stock, reports and alerts to this location (default: all; new stock goes to Main)")
         self.subparsers = self.parser.add_subparsers(dest="cmd")
 
-        self.cat_service = category_service.CategoryService()
-        self.med_service = medicine_service.MedicineService()
+        # Services (and with them supabase/httpx and the .env file) load on first use by a handler,
+        # so --help, argument errors and local-only commands never pay for them
+        self._cat_service = None
+        self._loc_service = None
+        self._med_services = {}
+        self.location = None
 
         self._build_commands()
 
+    @property
+    def cat_service(self):
+        if self._cat_service is None:
+            from src.services.category_service import CategoryService
+            self._cat_service = CategoryService()
+        return self._cat_service
+
+    @property
+    def loc_service(self):
+        if self._loc_service is None:
+            from src.services.location_service import LocationService
+            self._loc_service = LocationService()
+        return self._loc_service
+
+    def location_id(self, name):
+        if name is None:
+            return None
+        location = self.loc_service.get_location(name)
+        if location is None:
+            raise ValueError(f"No location named {name}.")
+        return location["id"]
+
+    def medicine_service_for(self, location):
+        # One MedicineService per location name (None: all locations); they share the process cache
+        if location not in self._med_services:
+            from src.services.medicine_service import MedicineService
+            self._med_services[location] = MedicineService(location_id=self.location_id(location))
+        return self._med_services[location]
+
+    @property
+    def med_service(self):
+        return self.medicine_service_for(self.location)
+
     def _build_commands(self):
         # ------------------------
         # Category commands
@@ -47,7 +101,20 @@ class CLIApp:
         addc.set_defaults(func=self.add_category)
 
         listc = cat_sub.add_parser("list")
-        listc.set_defaults(func=self.list_categories)
+        listc.set_defaults(func=self.list_categories, result=self.categories)
+
+        # ------------------------
+        # Location commands
+        # ------------------------
+        loc_parser = self.subparsers.add_parser("location", help="location (branch) commands")
+        loc_sub = loc_parser.add_subparsers(dest="action")
+
+        addl = loc_sub.add_parser("add")
+        addl.add_argument("--name", required=True)
+        addl.set_defaults(func=self.add_location)
+
+        listl = loc_sub.add_parser("list")
+        listl.set_defaults(func=self.list_locations, result=self.locations)
 
         # ------------------------
         # Medicine commands
@@ -62,14 +129,68 @@ class CLIApp:
         addm.add_argument("--quantity", type=int, default=1)
         addm.set_defaults(func=self.add_medicine)
 
-        listm = med_sub.add_parser("list")
-        listm.set_defaults(func=self.list_medicines)
+        importm = med_sub.add_parser("import", help="bulk import a CSV or JSONL delivery file")
+        importm.add_argument("--file", required=True, help="CSV/JSONL with name, expiry_date, category_name, quantity")
+        importm.add_argument("--format", choices=["csv", "jsonl"], help="defaults to the file extension")
+        importm.add_argument("--chunk-size", type=int, default=1000, help="rows per batched write")
+        importm.set_defaults(func=self.import_medicines)
+
+        exportm = med_sub.add_parser("export", help="stream a typed snapshot of the medicine table to a file")
+        exportm.add_argument("--file", required=True, help="output path ('-' for stdout, csv/jsonl only)")
+        exportm.add_argument("--format", choices=["parquet", "arrow", "csv", "jsonl"],
+                             help="defaults to the file extension; parquet/arrow need pyarrow")
+        exportm.add_argument("--page-size", type=int, help="rows per keyset page read")
+        exportm.add_argument("--batch-rows", type=int, help="rows per written record batch (default EXPORT_BATCH_ROWS)")
+        exportm.set_defaults(func=self.export_medicines)
+
+        listm = med_sub.add_parser("list", help="stream medicines as JSON lines")
+        listm.add_argument("--page-size", type=int, help="rows fetched per request")
+        listm.set_defaults(func=self.list_medicines, result=self.medicines)
+
+        search = med_sub.add_parser("search", help="find medicines by name words, category and status (JSON lines)")
+        search.add_argument("--query", default="", help="words that start words of the name, e.g. 'amox 500'")
+        search.add_argument("--category_name")
+        search.add_argument("--status", choices=["Expired", "Expiring Soon", "Safe"])
+        search.add_argument("--limit", type=int, default=50)
+        search.add_argument("--offset", type=int, default=0)
+        search.set_defaults(func=self.search_medicines, result=self.search_results)
 
         expiring = med_sub.add_parser("expiring")
-        expiring.set_defaults(func=self.list_expiring)
+        expiring.add_argument("--days", type=int, help="list medicines expiring within N days instead of due alerts")
+        expiring.set_defaults(func=self.list_expiring, result=self.expiring)
+
+        summary = med_sub.add_parser("summary", help="status counts, categories and due alerts in one concurrent round")
+        summary.set_defaults(func=self.medicine_summary, result=self.summary)
+
+        dispense = med_sub.add_parser("dispense", help="take stock first-expired-first-out")
+        dispense.add_argument("--name", required=True)
+        dispense.add_argument("--quantity", type=positive_int, required=True)
+        dispense.set_defaults(func=self.dispense_medicine)
+
+        lots = med_sub.add_parser("lots", help="lots of a medicine in FEFO order")
+        lots.add_argument("--name", required=True)
+        lots.set_defaults(func=self.list_lots, result=self.lots)
+
+        stats = med_sub.add_parser("stats", help="counts and quantities per status and per category")
+        stats.add_argument("--as-of", help="YYYY-MM-DD, defaults to today")
+        stats.add_argument("--days", type=int, default=7, help="expiring-soon window")
+        stats.set_defaults(func=self.medicine_stats, result=self.stats)
+
+        rollup = med_sub.add_parser("rollup", help="counts and quantities per status for every location (one query)")
+        rollup.add_argument("--as-of", help="YYYY-MM-DD, defaults to today")
+        rollup.add_argument("--days", type=int, default=7, help="expiring-soon window")
+        rollup.set_defaults(func=self.medicine_rollup, result=self.rollup)
+
+        forecast = med_sub.add_parser("forecast", help="quantity expiring per day/week/month over a horizon")
+        forecast.add_argument("--horizon-days", type=int, default=90)
+        forecast.add_argument("--bucket", choices=["day", "week", "month"], default="week")
+        forecast.add_argument("--by", choices=["category", "location", "medicine", "none"], default="category")
+        forecast.add_argument("--as-of", help="YYYY-MM-DD, defaults to today")
+        forecast.add_argument("--top", type=int, help="keep only the N groups with the most expiring quantity")
+        forecast.set_defaults(func=self.medicine_forecast, result=self.forecast)
 
         delete_expired = med_sub.add_parser("delete_expired")
-        delete_expired.set_defaults(func=self.delete_expired_medicines)
+        delete_expired.set_defaults(func=self.delete_expired_medicines, result=self.deleted_expired)
 
         # ------------------------
         # Alert commands
@@ -78,7 +199,116 @@ class CLIApp:
         alert_sub = alert_parser.add_subparsers(dest="action")
 
         list_pending = alert_sub.add_parser("list_pending")
-        list_pending.set_defaults(func=self.list_pending_alerts)
+        list_pending.set_defaults(func=self.list_pending_alerts, result=self.pending_alerts)
+
+        run_alerts = alert_sub.add_parser("run", help="long-running alert dispatcher")
+        run_alerts.add_argument("--sender", choices=["stdout", "file"], default="stdout")
+        run_alerts.add_argument("--out", help="output file for --sender file")
+        run_alerts.add_argument("--refresh", type=float, default=60.0, help="seconds between incremental refreshes")
+        run_alerts.add_argument("--batch-size", type=int, default=100)
+        run_alerts.add_argument("--once", action="store_true", help="dispatch what is due now and exit")
+        run_alerts.set_defaults(func=self.run_alerts)
+
+        regenerate = alert_sub.add_parser("regenerate", help="rebuild pending alerts from in-stock lots and lead times")
+        regenerate.add_argument("--as-of", help="YYYY-MM-DD, defaults to today")
+        regenerate.set_defaults(func=self.regenerate_alerts)
+
+        lead_times = alert_sub.add_parser("lead_times", help="show, or set with --days, alert lead times per category")
+        lead_times.add_argument("--category_name", help="category to set; required with --days")
+        lead_times.add_argument("--days", help="comma-separated days before expiry, e.g. 90,30,7")
+        lead_times.set_defaults(func=self.alert_lead_times)
+
+        # ------------------------
+        # Sync commands (DB_BACKEND=sync)
+        # ------------------------
+        sync_parser = self.subparsers.add_parser("sync", help="local replica <-> Supabase sync")
+        sync_sub = sync_parser.add_subparsers(dest="action")
+
+        sync_run = sync_sub.add_parser("run", help="long-running push/pull worker")
+        sync_run.add_argument("--interval", type=float, help="seconds between sync cycles")
+        sync_run.set_defaults(func=self.sync_run)
+
+        sync_once = sync_sub.add_parser("once", help="push the whole journal, then pull remote changes")
+        sync_once.set_defaults(func=self.sync_once)
+
+        sync_status = sync_sub.add_parser("status", help="queue depth and lag")
+        sync_status.set_defaults(func=self.sync_status)
+
+        # ------------------------
+        # Sessions: many commands in one process (see src/cli/session.py)
+        # ------------------------
+        shell = self.subparsers.add_parser("shell", help="interactive session; one JSON result line per command")
+        shell.add_argument("--batch-size", type=int, default=500, help="max consecutive adds per write (piped input)")
+        shell.set_defaults(func=self.run_shell)
+
+        batch = self.subparsers.add_parser("batch", help="run a file of commands, one per line, in one process")
+        batch.add_argument("--commands", required=True, help="file with one command per line ('-' for stdin)")
+        batch.add_argument("--batch-size", type=int, default=500, help="max consecutive adds per write")
+        batch.set_defaults(func=self.run_batch)
+
+    # ------------------------
+    # Results: the value behind each command that reports data (set as `result` on its parser).
+    # Handlers print it; shell/batch sessions emit it as is, so list commands always give a JSON list.
+    # ------------------------
+    def categories(self, args) -> List[Dict]:
+        return self.cat_service.list_categories()
+
+    def locations(self, args) -> List[Dict]:
+        return self.loc_service.list_locations()
+
+    def medicines(self, args) -> Iterator[Dict]:
+        return self.med_service.iter_medicines(args.page_size)
+
+    def search_results(self, args) -> List[Dict]:
+        category_id = None
+        if args.category_name:
+            category = self.cat_service.get_category(args.category_name)
+            if category is None:
+                raise ValueError(f"No category named {args.category_name}.")
+            category_id = category["id"]
+        return self.med_service.search(args.query, category_id, args.status, args.limit, args.offset)
+
+    def expiring(self, args) -> List[Dict]:
+        # Medicines expiring within --days, or else the alerts due today
+        if args.days is not None:
+            return self.med_service.list_expiring_within(args.days)
+        return self.med_service.get_expiring_soon()
+
+    def pending_alerts(self, args) -> List[Dict]:
+        return self.med_service.get_expiring_soon()
+
+    def summary(self, args) -> Dict:
+        from src.services.async_medicine_service import AsyncMedicineService, blocking_medicine_service
+        dash = blocking_medicine_service(AsyncMedicineService(location_id=self.location_id(self.location))).dashboard(limit=1)
+        stats = dash["stats"]
+        return {
+            "Total": stats["total"]["medicines"],
+            **{status: b["medicines"] for status, b in stats["by_status"].items()},
+            "Categories": stats["categories"],
+            "Alerts Due": len(dash["due_alerts"]),
+        }
+
+    def lots(self, args) -> List[Dict]:
+        return self.med_service.list_lots(args.name)
+
+    def stats(self, args) -> Dict:
+        return self.med_service.get_dashboard_stats(args.as_of, args.days)
+
+    def rollup(self, args) -> Dict:
+        return self.med_service.location_rollup(args.as_of, args.days)
+
+    def forecast(self, args) -> Dict:
+        from src.services.forecast import label_series
+        by = None if args.by == "none" else args.by
+        result = self.med_service.forecast_expiry(args.horizon_days, args.bucket, by, args.as_of, args.top)
+        if by == "category":
+            result = label_series(result, {c["id"]: c["name"] for c in self.cat_service.list_categories()})
+        elif by == "location":
+            result = label_series(result, {l["id"]: l["name"] for l in self.loc_service.list_locations()})
+        return result
+
+    def deleted_expired(self, args) -> int:
+        return self.med_service.expire_before()
 
     # ------------------------
     # Handlers
@@ -88,8 +318,13 @@ class CLIApp:
         print("Category Added:", json.dumps(c, indent=2))
 
     def list_categories(self, args):
-        cats = self.cat_service.list_categories()
-        print(json.dumps(cats, indent=2))
+        print(json.dumps(self.categories(args), indent=2))
+
+    def add_location(self, args):
+        print("Location Added:", json.dumps(self.loc_service.add_location(args.name), indent=2))
+
+    def list_locations(self, args):
+        print(json.dumps(self.locations(args), indent=2))
 
     def add_medicine(self, args):
         # Fetch or create category by name
@@ -99,12 +334,61 @@ class CLIApp:
         m = self.med_service.add_medicine(args.name, args.expiry_date, category_id, args.quantity)
         print("Medicine Added:", json.dumps(m, indent=2))
 
+    def import_medicines(self, args):
+        from src.services.import_service import ImportService
+        importer = ImportService(self.cat_service, self.med_service)
+
+        def progress(totals):
+            print(f"... {totals['rows']} rows ({totals['rows_per_sec']} rows/s)", file=sys.stderr)
+
+        try:
+            result = importer.import_file(args.file, args.format, args.chunk_size, progress)
+        except (ValueError, OSError) as e:
+            # Bad rows are found by a full pass before the first write, so nothing was imported
+            print(f"Import failed: {e}", file=sys.stderr)
+            sys.exit(1)
+        print("Import Finished:", json.dumps(result, indent=2))
+
+    def export_medicines(self, args):
+        from src.services.export_service import COLUMNAR_FORMATS, ExportService
+        if args.file == "-" and args.format in COLUMNAR_FORMATS:
+            self.parser.error(f"--format {args.format} needs a file path, not '-'")
+        exporter = ExportService(self.med_service, self.cat_service, self.loc_service)
+
+        def progress(totals):
+            print(f"... {totals['rows']} rows", file=sys.stderr)
+
+        try:
+            result = exporter.export(args.file, args.format, args.page_size, args.batch_rows, progress)
+        except ValueError as e:
+            # Unknown format, missing pyarrow, an unparseable date in the table
+            print(f"Export failed: {e}", file=sys.stderr)
+            sys.exit(1)
+        print("Export Finished:", json.dumps(result, indent=2), file=sys.stderr if args.file == "-" else sys.stdout)
+
     def list_medicines(self, args):
-        meds = self.med_service.list_medicines()
-        print(json.dumps(meds, indent=2))
+        # One JSON object per line, written as each page arrives
+        for med in self.medicines(args):
+            sys.stdout.write(json.dumps(med) + "\n")
+
+    def search_medicines(self, args):
+        try:
+            meds = self.search_results(args)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        for med in meds:
+            sys.stdout.write(json.dumps(med) + "\n")
 
     def list_expiring(self, args):
-        alerts = self.med_service.get_expiring_soon()
+        if args.days is not None:
+            meds = self.expiring(args)
+            if not meds:
+                print(f"No medicines expiring in the next {args.days} days!")
+            else:
+                print(json.dumps(meds, indent=2))
+            return
+        alerts = self.expiring(args)
         if not alerts:
             print("No medicines expiring soon!")
         else:
@@ -112,26 +396,123 @@ class CLIApp:
             print(json.dumps(alerts, indent=2))
 
     def list_pending_alerts(self, args):
-        alerts = self.med_service.get_expiring_soon()
+        alerts = self.pending_alerts(args)
         if not alerts:
             print("No pending alerts!")
         else:
             print("Pending Alerts:")
             print(json.dumps(alerts, indent=2))
 
+    def medicine_summary(self, args):
+        print(json.dumps(self.summary(args), indent=2))
+
+    def dispense_medicine(self, args):
+        from src.services.lot_index import InsufficientStock
+        try:
+            takes = self.med_service.dispense(args.name, args.quantity)
+        except (InsufficientStock, ValueError) as e:
+            print(f"Cannot dispense: {e}", file=sys.stderr)
+            sys.exit(1)
+        print("Dispensed:", json.dumps(takes, indent=2))
+
+    def list_lots(self, args):
+        lots = self.lots(args)
+        if not lots:
+            print(f"No stock of {args.name}.")
+        else:
+            print(json.dumps(lots, indent=2))
+
+    def medicine_stats(self, args):
+        print(json.dumps(self.stats(args), indent=2))
+
+    def medicine_rollup(self, args):
+        print(json.dumps(self.rollup(args), indent=2))
+
+    def medicine_forecast(self, args):
+        print(json.dumps(self.forecast(args), indent=2))
+
     def delete_expired_medicines(self, args):
-        today_str = datetime.today().strftime("%Y-%m-%d")
-        all_meds = self.med_service.list_medicines()
-        deleted = []
-        for med in all_meds:
-            if med["expiry_date"] <= today_str:
-                self.med_service.med_dao.update_medicine(med["id"], {"quantity": 0})  # or delete if needed
-                deleted.append(med)
+        deleted = self.deleted_expired(args)
         if not deleted:
             print("No expired medicines to delete.")
         else:
-            print("Deleted Expired Medicines:")
-            print(json.dumps(deleted, indent=2))
+            print(f"Deleted Expired Medicines: {deleted}")
+
+    def run_alerts(self, args):
+        from src.services.alert_scheduler import AlertScheduler, FileSender, StdoutSender
+        if args.sender == "file":
+            if not args.out:
+                self.parser.error("--out is required with --sender file")
+            sender = FileSender(args.out)
+        else:
+            sender = StdoutSender()
+        scheduler = AlertScheduler(self.med_service, sender, args.refresh, args.batch_size)
+        try:
+            scheduler.run(once=args.once)
+        except KeyboardInterrupt:
+            scheduler.stop()
+        print(f"Alerts sent: {scheduler.sent}", file=sys.stderr)
+
+    def regenerate_alerts(self, args):
+        print("Alerts Regenerated:", json.dumps(self.med_service.regenerate_alerts(args.as_of), indent=2))
+
+    def alert_lead_times(self, args):
+        from src.config import ALERT_LEAD_DAYS, parse_lead_days
+        categories = {c["name"]: c["id"] for c in self.cat_service.list_categories()}
+        if args.days is not None:
+            if not args.category_name:
+                self.parser.error("--category_name is required with --days")
+            if args.category_name not in categories:
+                print(f"No category named {args.category_name}.", file=sys.stderr)
+                sys.exit(1)
+            try:
+                self.med_service.set_alert_lead_times(categories[args.category_name], parse_lead_days(args.days))
+            except ValueError as e:
+                self.parser.error(f"--days: {e}")
+        lead_times = self.med_service.alert_lead_times()
+        names = [args.category_name] if args.category_name else sorted(categories)
+        print(json.dumps({"default": ALERT_LEAD_DAYS,
+                          **{n: lead_times.get(categories.get(n), ALERT_LEAD_DAYS) for n in names}}, indent=2))
+
+    def sync_run(self, args):
+        from src.sync.engine import get_sync_engine
+        engine = get_sync_engine()
+        if args.interval:
+            engine.interval = args.interval
+        engine.start()
+        try:
+            while True:
+                time.sleep(engine.interval)
+                print(json.dumps(engine.metrics()), file=sys.stderr)
+        except KeyboardInterrupt:
+            engine.stop()
+
+    def sync_once(self, args):
+        from src.sync.engine import get_sync_engine
+        engine = get_sync_engine()
+        result = engine.sync_once()
+        print(json.dumps(dict(result, **engine.metrics()), indent=2))
+
+    def sync_status(self, args):
+        from src.sync.engine import get_sync_engine
+        print(json.dumps(get_sync_engine().metrics(), indent=2))
+
+    def run_shell(self, args):
+        from src.cli.session import CommandSession
+        session = CommandSession(self, batch_size=args.batch_size)
+        print(json.dumps(session.repl()), file=sys.stderr)
+
+    def run_batch(self, args):
+        from src.cli.session import CommandSession
+        session = CommandSession(self, batch_size=args.batch_size)
+        if args.commands == "-":
+            summary = session.run_lines(sys.stdin)
+        else:
+            with open(args.commands) as f:
+                summary = session.run_lines(f)
+        print(json.dumps(summary), file=sys.stderr)
+        if summary["failed"]:
+            sys.exit(1)
 
     # ------------------------
     # Run
@@ -141,7 +522,37 @@ class CLIApp:
         if not hasattr(args, "func"):
             self.parser.print_help()
             return
-        args.func(args)
+        self.location = args.location
+        if self.location is not None and args.cmd != "location":
+            try:
+                self.location_id(self.location)
+            except ValueError as e:
+                print(e, file=sys.stderr)
+                sys.exit(1)
+        if args.profile or args.profile_out:
+            self._run_profiled(args)
+        else:
+            args.func(args)
+        if args.conn_stats:
+            from src.config import connection_stats
+            print(json.dumps(connection_stats()), file=sys.stderr)
+        if args.cache_stats:
+            from src.services.cache import get_default_cache
+            print(json.dumps(get_default_cache().stats()), file=sys.stderr)
+
+    def _run_profiled(self, args):
+        from src.instrumentation import format_profile, recorder
+        recorder.enable()
+        with recorder.profile(" ".join(filter(None, (args.cmd, getattr(args, "action", None))))) as profile:
+            args.func(args)
+        if args.profile:
+            print(format_profile(profile.summary()), file=sys.stderr)
+        if args.profile_out:
+            with open(args.profile_out, "w") as f:
+                if args.profile_out.endswith(".jsonl"):
+                    f.writelines(json.dumps(e) + "\n" for e in profile.events)
+                else:
+                    f.write(recorder.prometheus())
 
 if __name__ == "__main__":
     CLIApp().run()
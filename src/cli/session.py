@@ -0,0 +1,218 @@
+# src/cli/session.py
+# Many CLI commands in one process (`medicine-cli shell` and `medicine-cli batch`). Every line is
+# parsed by the regular CLIApp parser and run by its handlers, so services, the pooled Supabase
+# client and the caches are set up once. On top of that the session
+#   - keeps category name -> row for its whole lifetime (one lookup/insert per new name),
+#   - buffers consecutive `medicine add` lines and writes them with one bulk stock call and one
+#     alert call (MedicineService.add_medicines),
+#   - prints one JSON line per command: {"line", "command", "ok", "ms", "result" | "error"}.
+# Read commands give their handler's structured value (the parser's `result`, see CLIApp), so a
+# list command's result is a list whatever its length; other commands' printed output is parsed.
+# A line's own --location wins over the session's (the one `shell`/`batch` was started with).
+# Commands of a flushed batch share its time: ms is the batch's wall time / its size.
+import argparse
+import io
+import json
+import shlex
+import sys
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def parse_output(text: str) -> Any:
+    # Handlers print for people; keep JSON (a document or JSON lines) structured, anything else as text
+    text = text.strip()
+    if not text:
+        return None
+    # "Medicine Added: {...}" style output keeps its JSON part
+    for candidate in (text, text.partition(":")[2]):
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            pass
+    try:
+        return [json.loads(line) for line in text.splitlines()]
+    except ValueError:
+        return text
+
+
+class CommandSession:
+    def __init__(self, app, out: Optional[TextIO] = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.app = app
+        self.out = out or sys.stdout
+        self.batch_size = max(1, batch_size)
+        self.location: Optional[str] = app.location
+        self.categories: Dict[str, Dict] = {}
+        self._adds: List[tuple] = []
+        self.totals = {"commands": 0, "ok": 0, "failed": 0}
+        self._started = time.perf_counter()
+
+    # ------------------------
+    # Results
+    # ------------------------
+    def _emit(self, line_no: int, command: str, ms: float, result: Any = None, error: Optional[str] = None,
+              batch: Optional[int] = None):
+        record = {"line": line_no, "command": command, "ok": error is None, "ms": round(ms, 3)}
+        if batch is not None:
+            record["batch"] = batch
+        if error is None:
+            record["result"] = result
+        else:
+            record["error"] = error
+        self.totals["commands"] += 1
+        self.totals["ok" if error is None else "failed"] += 1
+        self.out.write(json.dumps(record, default=str) + "\n")
+        self.out.flush()
+
+    def summary(self) -> Dict:
+        elapsed = time.perf_counter() - self._started
+        return dict(self.totals, seconds=round(elapsed, 3),
+                    commands_per_sec=round(self.totals["commands"] / elapsed, 1) if elapsed else 0.0)
+
+    # ------------------------
+    # Categories
+    # ------------------------
+    def category(self, name: str) -> Dict:
+        return self.resolve_categories([name])[name]
+
+    def resolve_categories(self, names: Iterable[str]) -> Dict[str, Dict]:
+        missing = [n for n in dict.fromkeys(names) if n not in self.categories]
+        if missing:
+            self.categories.update(self.app.cat_service.add_categories(missing))
+        return {n: self.categories[n] for n in names}
+
+    # ------------------------
+    # Commands
+    # ------------------------
+    def _parse(self, argv: List[str]) -> argparse.Namespace:
+        # argparse reports errors on stderr and exits; turn that into a ValueError with its message
+        err = io.StringIO()
+        try:
+            with redirect_stderr(err):
+                args = self.app.parser.parse_args(argv)
+        except SystemExit:
+            message = err.getvalue().strip().splitlines()
+            raise ValueError(message[-1] if message else "invalid command")
+        if not hasattr(args, "func"):
+            raise ValueError("incomplete command, try `help`")
+        if args.cmd in ("shell", "batch"):
+            raise ValueError(f"{args.cmd} cannot run inside a session")
+        return args
+
+    def run_line(self, line_no: int, line: str):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            return
+        start = time.perf_counter()
+        try:
+            args = self._parse(shlex.split(line))
+        except ValueError as e:
+            self.flush()
+            self._emit(line_no, line, (time.perf_counter() - start) * 1000, error=str(e))
+            return
+        command = " ".join(filter(None, (args.cmd, getattr(args, "action", None))))
+        if command == "medicine add":
+            self._adds.append((line_no, args))
+            if len(self._adds) >= self.batch_size:
+                self.flush()
+            return
+        self.flush()
+        start = time.perf_counter()
+        try:
+            result = self._run(command, args)
+        except Exception as e:
+            self._emit(line_no, command, (time.perf_counter() - start) * 1000, error=str(e) or type(e).__name__)
+        else:
+            self._emit(line_no, command, (time.perf_counter() - start) * 1000, result)
+
+    def _run(self, command: str, args: argparse.Namespace) -> Any:
+        if command == "category add":
+            return self.category(args.name)
+        self.app.location = args.location or self.location
+        if getattr(args, "result", None) is not None:
+            result = args.result(args)
+            return list(result) if isinstance(result, Iterator) else result
+        # Everything else goes through the CLI handler; its printed output becomes the result
+        out, err = io.StringIO(), io.StringIO()
+        try:
+            with redirect_stdout(out), redirect_stderr(err):
+                args.func(args)
+        except SystemExit as e:
+            if e.code:
+                raise RuntimeError(err.getvalue().strip() or out.getvalue().strip() or f"exit status {e.code}")
+        return parse_output(out.getvalue())
+
+    def flush(self):
+        # Writes the buffered `medicine add` lines as one batch; a line with a bad date fails alone
+        adds, self._adds = self._adds, []
+        if not adds:
+            return
+        start = time.perf_counter()
+        valid, failed = [], []
+        for line_no, args in adds:
+            try:
+                datetime.strptime(args.expiry_date, "%Y-%m-%d")
+            except ValueError as e:
+                failed.append((line_no, str(e)))
+            else:
+                valid.append((line_no, args))
+        # One bulk write per location in the batch
+        by_location: Dict[Optional[str], List[tuple]] = {}
+        for line_no, args in valid:
+            by_location.setdefault(args.location or self.location, []).append((line_no, args))
+        results = {line_no: (None, message) for line_no, message in failed}
+        for location, group in by_location.items():
+            error, by_key = None, {}
+            try:
+                categories = self.resolve_categories([a.category_name for _, a in group])
+                items = [{"name": a.name, "expiry_date": a.expiry_date, "quantity": a.quantity,
+                          "category_id": categories[a.category_name]["id"]} for _, a in group]
+                med_service = self.app.medicine_service_for(location)
+                by_key = {(m["name"], m["category_id"]): m for m in med_service.add_medicines(items)}
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            for line_no, args in group:
+                if error is not None:
+                    results[line_no] = (None, error)
+                else:
+                    results[line_no] = (by_key.get((args.name, self.categories[args.category_name]["id"])), None)
+        ms = (time.perf_counter() - start) * 1000 / len(adds)
+        for line_no in sorted(results):
+            result, message = results[line_no]
+            self._emit(line_no, "medicine add", ms, result, message, batch=len(adds))
+
+    def run_lines(self, lines: Iterable[str]) -> Dict:
+        for line_no, line in enumerate(lines, start=1):
+            self.run_line(line_no, line)
+        self.flush()
+        return self.summary()
+
+    def repl(self, stdin: Optional[TextIO] = None, prompt: str = "medicine-cli> ") -> Dict:
+        # Interactive input gets each result right away; piped input is batched like `batch`
+        stdin = stdin or sys.stdin
+        interactive = stdin.isatty()
+        line_no = 0
+        while True:
+            if interactive:
+                sys.stderr.write(prompt)
+                sys.stderr.flush()
+            line = stdin.readline()
+            if not line:
+                break
+            line_no += 1
+            text = line.strip()
+            if text in ("exit", "quit"):
+                break
+            if text == "help":
+                self.flush()
+                self.app.parser.print_help(sys.stderr)
+                continue
+            self.run_line(line_no, text)
+            if interactive:
+                self.flush()
+        self.flush()
+        return self.summary()
@@ -1,12 +1,110 @@
 # src/config.py
-from supabase import create_client, Client
+# Settings are read from the environment (and .env) on first access, not at import time, so
+# `medicine-cli --help` and other commands that never touch a setting skip dotenv entirely.
+# `from src.config import PAGE_SIZE` works as before; the value is resolved and memoized then.
 import os
-from dotenv import load_dotenv
+import sys
+from typing import Any, Callable, Dict, Tuple
 
-load_dotenv()
+def _lower(value: str) -> str:
+    return value.lower()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+def _flag(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
 
-def get_supabase() -> Client:
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+def parse_lead_days(value: str) -> list:
+    # "90,30,7" -> [90, 30, 7]
+    return sorted({int(v) for v in value.split(",") if v.strip()}, reverse=True)
+
+# name -> (default, parser)
+_SETTINGS: Dict[str, Tuple[Any, Callable[[str], Any]]] = {
+    "SUPABASE_URL": (None, str),
+    "SUPABASE_KEY": (None, str),
+
+    # Storage backend for the DAOs: "supabase" (default), "sqlite", "memory", or "sync"
+    # (local SQLite replica with write-behind to Supabase, see src/sync). See src/dao/factory.py.
+    "DB_BACKEND": ("supabase", _lower),
+    "SQLITE_PATH": ("medicine_tracker.db", str),
+    "SYNC_BATCH_SIZE": ("500", int),
+    "SYNC_INTERVAL": ("5", float),
+
+    # HTTP connection pool shared by every DAO in the process
+    "SUPABASE_POOL_SIZE": ("10", int),
+    "SUPABASE_KEEPALIVE": ("60", float),
+    "SUPABASE_TIMEOUT": ("30", float),
+
+    # Async DAO layer (see src/dao/async_dao.py): max in-flight requests and per-call timeout in seconds
+    "ASYNC_CONCURRENCY": ("8", int),
+    "ASYNC_TIMEOUT": ("10", float),
+
+    # Rows per keyset page; keep at or below PostgREST's max-rows (1000 on Supabase by default)
+    "PAGE_SIZE": ("1000", int),
+    # Max ids per IN (...) filter in bulk updates
+    "BULK_ID_CHUNK": ("500", int),
+
+    # In-process service cache (see src/services/cache.py)
+    "CACHE_TTL": ("30", float),
+    "CACHE_MAXSIZE": ("256", int),
+    "CATEGORY_CACHE_TTL": ("600", float),
+    # Lifetime of the in-memory medicine search index (src/services/search_index.py); local
+    # writes drop it immediately, this bounds how long other processes' writes stay invisible
+    "SEARCH_INDEX_TTL": ("300", float),
+    # Lifetime of the cached lots frame and expiry forecasts (MedicineService.forecast_expiry); local
+    # stock writes drop them immediately, this bounds staleness from other processes' writes
+    "FORECAST_TTL": ("300", float),
+
+    # Rows per record batch / row group in `medicine export` (src/services/export_service.py)
+    "EXPORT_BATCH_ROWS": ("50000", int),
+    # Directory the Streamlit "Snapshot" page may load server-side snapshots from, by file name
+    # only; unset, the page accepts uploads only
+    "SNAPSHOT_DIR": (None, str),
+
+    # Days before each lot's expiry that alerts fall due, for categories without their own
+    # lead times (alert_lead_times, see sql/006_alert_schedule.sql)
+    "ALERT_LEAD_DAYS": ("7", parse_lead_days),
+
+    # Query/service instrumentation (see src/instrumentation.py); the log gets one JSON line per call
+    "INSTRUMENTATION": ("0", _flag),
+    "INSTRUMENTATION_LOG": ("", str),
+}
+
+_env_loaded = False
+
+def load_env():
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+def __getattr__(name: str) -> Any:
+    if name not in _SETTINGS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    load_env()
+    default, parse = _SETTINGS[name]
+    raw = os.getenv(name, default)
+    value = parse(raw) if raw is not None else None
+    globals()[name] = value
+    return value
+
+
+# ------------------------
+# Supabase clients (src/dao/supabase_client.py, imported on first use)
+# ------------------------
+def get_supabase():
+    from src.dao.supabase_client import registry
+    return registry.get()
+
+
+async def get_async_supabase():
+    from src.dao.supabase_client import registry
+    return await registry.aget()
+
+
+def connection_stats() -> Dict:
+    module = sys.modules.get("src.dao.supabase_client")
+    if module is None:
+        # No Supabase client was ever built in this process
+        return {"clients": 0, "async_clients": 0, "pool_size": __getattr__("SUPABASE_POOL_SIZE"),
+                "keepalive": __getattr__("SUPABASE_KEEPALIVE"), "connections_opened": 0, "connections_reused": 0}
+    return module.registry.stats()
@@ -1,19 +1,99 @@
-from typing import List, Dict
-from src.config import get_supabase
+from typing import List, Dict, Optional, Iterator
+from postgrest.types import CountMethod, ReturnMethod
+from src.config import PAGE_SIZE, BULK_ID_CHUNK
+from src.dao.base import AlertRepository
+from src.dao.paging import fetch_page, iter_keyset
+from src.dao.supabase_dao import SupabaseDAO
 
-class AlertDAO:
-    def __init__(self):
-        self.sb = get_supabase()
+# Unique key of alerts (sql/006_alert_schedule.sql)
+ALERT_KEY = "medicine_id,alert_date"
 
-    def add_alert(self, medicine_id: int, alert_date: str, status: str = "Pending") -> Dict:
+class AlertDAO(SupabaseDAO, AlertRepository):
+    def __init__(self, client=None, location_id: Optional[int] = None):
+        super().__init__(client)
+        self.location_id = location_id
+
+    def add_alert(self, medicine_id: int, alert_date: str, status: str = "Pending") -> Optional[Dict]:
+        # Idempotent on (medicine_id, alert_date): returns None if that alert already exists.
+        # location_id comes from the medicine (alerts_location trigger in sql/008_locations.sql).
         payload = {"medicine_id": medicine_id, "alert_date": alert_date, "status": status}
-        self.sb.table("alerts").insert(payload).execute()
-        resp = self.sb.table("alerts").select("*").eq("medicine_id", medicine_id).eq("alert_date", alert_date).limit(1).execute()
+        resp = self.sb.table("alerts").upsert(payload, on_conflict=ALERT_KEY, ignore_duplicates=True).execute()
         return resp.data[0] if resp.data else None
 
-    def list_pending_alerts(self) -> List[Dict]:
-        resp = self.sb.table("alerts").select("*").eq("status", "Pending").execute()
-        return resp.data or []
+    def add_alerts(self, alerts: List[Dict]) -> int:
+        # Bulk insert that skips alerts already scheduled (an existing Sent alert stays Sent);
+        # returns how many were new
+        if not alerts:
+            return 0
+        resp = self.sb.table("alerts").upsert(alerts, on_conflict=ALERT_KEY, ignore_duplicates=True,
+                                              count=CountMethod.exact, returning=ReturnMethod.minimal).execute()
+        return resp.count or 0
+
+    def _pending_query(self, due_by: Optional[str] = None):
+        query = self.sb.table("alerts").select("*").eq("status", "Pending")
+        if self.location_id is not None:
+            query = query.eq("location_id", self.location_id)
+        if due_by:
+            query = query.lte("alert_date", due_by)
+        return query
+
+    def page_pending_alerts(self, after_id: Optional[int] = None, limit: int = PAGE_SIZE) -> List[Dict]:
+        return fetch_page(self._pending_query, after_id, limit)
+
+    def iter_pending_alerts(self, due_by: Optional[str] = None, page_size: Optional[int] = None,
+                            after_id: Optional[int] = None) -> Iterator[Dict]:
+        # after_id doubles as a watermark: only alerts created since the last read are fetched
+        return iter_keyset(lambda: self._pending_query(due_by), page_size, after_id)
 
     def update_alert_status(self, alert_id: int, status: str):
         self.sb.table("alerts").update({"status": status}).eq("id", alert_id).execute()
+
+    def update_status_bulk(self, alert_ids: List[int], status: str) -> int:
+        # One UPDATE ... WHERE id IN (...) per chunk; chunks keep the query string a sane length
+        updated = 0
+        ids = list(alert_ids)
+        for i in range(0, len(ids), BULK_ID_CHUNK):
+            resp = self.sb.table("alerts")\
+                .update({"status": status}, count=CountMethod.exact, returning=ReturnMethod.minimal)\
+                .in_("id", ids[i:i + BULK_ID_CHUNK])\
+                .execute()
+            updated += resp.count or 0
+        return updated
+
+    def claim_pending(self, alert_ids: List[int], status: str) -> List[int]:
+        # Moves only alerts that are still Pending and returns their ids; an alert that was sent
+        # or deleted (regenerate_alerts) since it was read is left out
+        claimed: List[int] = []
+        ids = list(alert_ids)
+        for i in range(0, len(ids), BULK_ID_CHUNK):
+            resp = self.sb.table("alerts").update({"status": status})\
+                .in_("id", ids[i:i + BULK_ID_CHUNK]).eq("status", "Pending")\
+                .execute()
+            claimed.extend(row["id"] for row in resp.data or [])
+        return claimed
+
+    def get_lead_times(self) -> Dict[int, List[int]]:
+        # category_id -> lead days, longest first. The table has no id to keyset on, but it is
+        # small (categories x lead times), so offset pages are fine.
+        lead_times: Dict[int, List[int]] = {}
+        offset = 0
+        while True:
+            rows = self.sb.table("alert_lead_times").select("category_id,lead_days")\
+                .order("category_id").order("lead_days", desc=True)\
+                .range(offset, offset + PAGE_SIZE - 1).execute().data or []
+            for row in rows:
+                lead_times.setdefault(row["category_id"], []).append(row["lead_days"])
+            if len(rows) < PAGE_SIZE:
+                return lead_times
+            offset += PAGE_SIZE
+
+    def set_lead_times(self, category_id: int, lead_days: List[int]):
+        # Replaces the category's schedule in one transaction (sql/012_set_lead_times.sql); an
+        # empty list falls back to the default
+        self.sb.rpc("set_lead_times", {"p_category_id": category_id,
+                                       "p_lead_days": sorted(set(lead_days), reverse=True)}).execute()
+
+    def regenerate_alerts(self, as_of: str, default_lead_days: List[int]) -> Dict:
+        resp = self.sb.rpc("regenerate_alerts", {"p_as_of": as_of, "p_default_lead_days": default_lead_days,
+                                                 "p_location_id": self.location_id}).execute()
+        return resp.data[0] if resp.data else {"inserted": 0, "removed": 0}
@@ -0,0 +1,135 @@
+# src/dao/async_dao.py
+# Async counterparts of the read paths the UI fans out (counts, pages, categories, pending alerts).
+# The Supabase versions await postgrest's async builders over a pooled httpx.AsyncClient; for the
+# sqlite/memory/sync backends ThreadedAsyncDAO runs the regular DAO in a worker thread instead.
+import asyncio
+from typing import Callable, Dict, List, Optional
+from src.config import get_async_supabase, BULK_ID_CHUNK, PAGE_SIZE
+from src.dao.base import MEDICINE_COLUMNS
+from src.instrumentation import instrument_client, pass_through, recorder
+
+
+@pass_through
+async def afetch_page(build_query: Callable, after_id: Optional[int] = None, limit: int = PAGE_SIZE) -> List[Dict]:
+    query = build_query()
+    if after_id is not None:
+        query = query.gt("id", after_id)
+    resp = await query.order("id").limit(limit).execute()
+    return resp.data or []
+
+
+@pass_through
+async def acollect_keyset(build_query: Callable, page_size: Optional[int] = None) -> List[Dict]:
+    page_size = page_size or PAGE_SIZE
+    rows: List[Dict] = []
+    after_id = None
+    while True:
+        page = await afetch_page(build_query, after_id, page_size)
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        after_id = page[-1]["id"]
+
+
+class _AsyncSupabaseDAO:
+    def __init__(self, client=None, location_id: Optional[int] = None):
+        self._sb = client
+        self.location_id = location_id
+
+    async def sb(self):
+        if self._sb is None:
+            self._sb = await get_async_supabase()
+        return instrument_client(self._sb) if recorder.enabled else self._sb
+
+    def _scoped(self, query):
+        return query.eq("location_id", self.location_id) if self.location_id is not None else query
+
+
+class AsyncCategoryDAO(_AsyncSupabaseDAO):
+    async def list_categories(self) -> List[Dict]:
+        sb = await self.sb()
+        return await acollect_keyset(lambda: sb.table("categories").select("*"))
+
+    async def get_category_by_name(self, name: str) -> Optional[Dict]:
+        sb = await self.sb()
+        resp = await sb.table("categories").select("*").eq("name", name).limit(1).execute()
+        return resp.data[0] if resp.data else None
+
+
+class AsyncMedicineDAO(_AsyncSupabaseDAO):
+    async def page_medicines(self, after_id: Optional[int] = None, limit: int = PAGE_SIZE, columns: str = "*") -> List[Dict]:
+        sb = await self.sb()
+        return await afetch_page(lambda: self._scoped(sb.table("medicines").select(columns)), after_id, limit)
+
+    async def get_medicines_by_ids(self, med_ids: List[int], columns: str = MEDICINE_COLUMNS) -> List[Dict]:
+        if not med_ids:
+            return []
+        sb = await self.sb()
+        ids = list(med_ids)
+        chunks = await asyncio.gather(*(sb.table("medicines").select(columns).in_("id", ids[i:i + BULK_ID_CHUNK])
+                                        .execute() for i in range(0, len(ids), BULK_ID_CHUNK)))
+        return [row for resp in chunks for row in resp.data or []]
+
+    async def list_expiring_between(self, start: str, end: str, columns: str = MEDICINE_COLUMNS) -> List[Dict]:
+        sb = await self.sb()
+        rows = await acollect_keyset(lambda: self._scoped(sb.table("medicines").select(columns))
+                                     .gte("expiry_date", start).lte("expiry_date", end))
+        return sorted(rows, key=lambda m: m["expiry_date"])
+
+    async def list_expired(self, as_of: str, columns: str = MEDICINE_COLUMNS, in_stock: bool = False) -> List[Dict]:
+        sb = await self.sb()
+
+        def query():
+            q = self._scoped(sb.table("medicines").select(columns)).lt("expiry_date", as_of)
+            return q.gt("quantity", 0) if in_stock else q
+
+        return sorted(await acollect_keyset(query), key=lambda m: m["expiry_date"])
+
+    async def count_medicines(self, start: Optional[str] = None, end: Optional[str] = None,
+                              before: Optional[str] = None) -> int:
+        sb = await self.sb()
+        query = self._scoped(sb.table("medicines").select("id", count="exact", head=True))
+        if start:
+            query = query.gte("expiry_date", start)
+        if end:
+            query = query.lte("expiry_date", end)
+        if before:
+            query = query.lt("expiry_date", before)
+        resp = await query.execute()
+        return resp.count or 0
+
+    async def expiry_summary(self, as_of: str, window_end: str) -> List[Dict]:
+        sb = await self.sb()
+        resp = await sb.rpc("dashboard_stats", {"p_as_of": as_of, "p_window_end": window_end,
+                                                "p_location_id": self.location_id}).execute()
+        return resp.data or []
+
+
+class AsyncAlertDAO(_AsyncSupabaseDAO):
+    def _pending_query(self, sb, due_by: Optional[str] = None):
+        query = self._scoped(sb.table("alerts").select("*").eq("status", "Pending"))
+        if due_by:
+            query = query.lte("alert_date", due_by)
+        return query
+
+    async def page_pending_alerts(self, after_id: Optional[int] = None, limit: int = PAGE_SIZE) -> List[Dict]:
+        sb = await self.sb()
+        return await afetch_page(lambda: self._pending_query(sb), after_id, limit)
+
+    async def list_pending_alerts(self, due_by: Optional[str] = None) -> List[Dict]:
+        sb = await self.sb()
+        return await acollect_keyset(lambda: self._pending_query(sb, due_by))
+
+
+class ThreadedAsyncDAO:
+    # Async view of a blocking DAO: every method call runs in the default executor, so the local
+    # backends (and MemoryClient with simulated latency) can be gathered like the Supabase ones
+    def __init__(self, dao):
+        self.dao = dao
+
+    def __getattr__(self, name: str):
+        method = getattr(self.dao, name)
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return call
@@ -0,0 +1,153 @@
+# src/dao/base.py
+# Storage-agnostic DAO interfaces. The Supabase DAOs and the SQLite DAOs both implement
+# these, so services, the CLI and the Streamlit app never care which backend is configured.
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional
+
+# Columns the list views actually render; avoids shipping unused columns over the wire
+MEDICINE_COLUMNS = "id,name,quantity,expiry_date,category_id,location_id,created_at"
+
+# Every backend starts with this location; stock written without one lands here
+DEFAULT_LOCATION_ID = 1
+DEFAULT_LOCATION_NAME = "Main"
+
+
+class StockConflict(ValueError):
+    # A lot no longer holds the quantity a dispense planned to take (someone else dispensed first)
+    pass
+
+
+class CategoryRepository(ABC):
+    @abstractmethod
+    def create_category(self, name: str) -> Optional[Dict]: ...
+
+    @abstractmethod
+    def create_categories(self, names: List[str]) -> List[Dict]: ...
+
+    @abstractmethod
+    def get_category_by_name(self, name: str) -> Optional[Dict]: ...
+
+    @abstractmethod
+    def get_categories_by_names(self, names: List[str]) -> List[Dict]: ...
+
+    @abstractmethod
+    def iter_categories(self, page_size: Optional[int] = None, after_id: Optional[int] = None) -> Iterator[Dict]: ...
+
+    def list_categories(self) -> List[Dict]:
+        return list(self.iter_categories())
+
+
+class LocationRepository(ABC):
+    @abstractmethod
+    def create_location(self, name: str) -> Optional[Dict]: ...
+
+    @abstractmethod
+    def create_locations(self, names: List[str]) -> List[Dict]: ...
+
+    @abstractmethod
+    def get_location_by_name(self, name: str) -> Optional[Dict]: ...
+
+    @abstractmethod
+    def iter_locations(self, page_size: Optional[int] = None, after_id: Optional[int] = None) -> Iterator[Dict]: ...
+
+    def list_locations(self) -> List[Dict]:
+        return list(self.iter_locations())
+
+
+# Medicine and alert DAOs take an optional location_id: when set, every read and write is limited
+# to that location's rows; None reads all locations and writes to DEFAULT_LOCATION_ID
+class MedicineRepository(ABC):
+    @abstractmethod
+    def add_medicine(self, name: str, expiry_date: str, category_id: int, quantity: int = 1) -> Dict: ...
+
+    @abstractmethod
+    def add_medicines_bulk(self, items: List[Dict]) -> List[Dict]: ...
+
+    @abstractmethod
+    def page_medicines(self, after_id: Optional[int] = None, limit: int = 1000, columns: str = "*") -> List[Dict]: ...
+
+    @abstractmethod
+    def iter_medicines(self, page_size: Optional[int] = None, columns: str = "*") -> Iterator[Dict]: ...
+
+    @abstractmethod
+    def get_medicine_by_id(self, med_id: int) -> Optional[Dict]: ...
+
+    @abstractmethod
+    def get_medicines_by_ids(self, med_ids: List[int], columns: str = MEDICINE_COLUMNS) -> List[Dict]: ...
+
+    @abstractmethod
+    def list_expiring_between(self, start: str, end: str, columns: str = MEDICINE_COLUMNS) -> List[Dict]: ...
+
+    @abstractmethod
+    def list_expired(self, as_of: str, columns: str = MEDICINE_COLUMNS, in_stock: bool = False) -> List[Dict]: ...
+
+    @abstractmethod
+    def expire_before(self, as_of: str) -> int: ...
+
+    @abstractmethod
+    def count_medicines(self, start: Optional[str] = None, end: Optional[str] = None,
+                        before: Optional[str] = None) -> int: ...
+
+    # Rows of {category_id, category_name, status, medicines, quantity}, one per category and status;
+    # read from an incrementally maintained aggregate so the cost follows categories, not medicines
+    @abstractmethod
+    def expiry_summary(self, as_of: str, window_end: str) -> List[Dict]: ...
+
+    # Rows of {location_id, location_name, status, medicines, quantity} for every location in one
+    # aggregate query, whatever location the DAO is scoped to
+    @abstractmethod
+    def location_summary(self, as_of: str, window_end: str) -> List[Dict]: ...
+
+    # Medicines ordered by (name, id) whose name has a word starting with every term (lowercase,
+    # see src/services/search_index.py); start/end bound expiry_date inclusively
+    @abstractmethod
+    def search_medicines(self, terms: List[str], category_id: Optional[int] = None, start: Optional[str] = None,
+                         end: Optional[str] = None, limit: int = 50, offset: int = 0,
+                         columns: str = MEDICINE_COLUMNS) -> List[Dict]: ...
+
+    # In-stock lots ordered by id, each tagged with its medicine's name, category_id and location_id
+    @abstractmethod
+    def iter_lots(self, name: Optional[str] = None, page_size: Optional[int] = None) -> Iterator[Dict]: ...
+
+    # takes: [{"lot_id", "quantity"}]; applied atomically, StockConflict if any lot is short
+    @abstractmethod
+    def take_lots(self, takes: List[Dict]) -> List[Dict]: ...
+
+    def list_medicines(self) -> List[Dict]:
+        return list(self.iter_medicines())
+
+
+class AlertRepository(ABC):
+    @abstractmethod
+    def add_alert(self, medicine_id: int, alert_date: str, status: str = "Pending") -> Dict: ...
+
+    @abstractmethod
+    def add_alerts(self, alerts: List[Dict]) -> int: ...
+
+    @abstractmethod
+    def page_pending_alerts(self, after_id: Optional[int] = None, limit: int = 1000) -> List[Dict]: ...
+
+    @abstractmethod
+    def iter_pending_alerts(self, due_by: Optional[str] = None, page_size: Optional[int] = None,
+                            after_id: Optional[int] = None) -> Iterator[Dict]: ...
+
+    @abstractmethod
+    def update_alert_status(self, alert_id: int, status: str): ...
+
+    @abstractmethod
+    def update_status_bulk(self, alert_ids: List[int], status: str) -> int: ...
+
+    @abstractmethod
+    def claim_pending(self, alert_ids: List[int], status: str) -> List[int]: ...
+
+    @abstractmethod
+    def get_lead_times(self) -> Dict[int, List[int]]: ...
+
+    @abstractmethod
+    def set_lead_times(self, category_id: int, lead_days: List[int]): ...
+
+    @abstractmethod
+    def regenerate_alerts(self, as_of: str, default_lead_days: List[int]) -> Dict: ...
+
+    def list_pending_alerts(self, due_by: Optional[str] = None) -> List[Dict]:
+        return list(self.iter_pending_alerts(due_by))
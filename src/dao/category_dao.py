@@ -1,18 +1,29 @@
-from src.config import get_supabase
-
-class CategoryDAO:
-    def __init__(self):
-        self.sb = get_supabase()
+from typing import Dict, Iterator, List, Optional
+from src.dao.base import CategoryRepository
+from src.dao.paging import iter_keyset
+from src.dao.supabase_dao import SupabaseDAO
 
+class CategoryDAO(SupabaseDAO, CategoryRepository):
     def create_category(self, name: str):
-        self.sb.table("categories").insert({"name": name}).execute()
-        resp = self.sb.table("categories").select("*").eq("name", name).limit(1).execute()
+        # Upsert on the unique name returns the row whether or not it already existed
+        resp = self.sb.table("categories").upsert({"name": name}, on_conflict="name").execute()
         return resp.data[0] if resp.data else None
 
-    def list_categories(self):
-        resp = self.sb.table("categories").select("*").execute()
-        return resp.data or []
+    def iter_categories(self, page_size: Optional[int] = None, after_id: Optional[int] = None) -> Iterator[Dict]:
+        return iter_keyset(lambda: self.sb.table("categories").select("*"), page_size, after_id)
 
     def get_category_by_name(self, name: str):
         resp = self.sb.table("categories").select("*").eq("name", name).limit(1).execute()
         return resp.data[0] if resp.data else None
+
+    def get_categories_by_names(self, names: List[str]) -> List[Dict]:
+        if not names:
+            return []
+        resp = self.sb.table("categories").select("*").in_("name", names).execute()
+        return resp.data or []
+
+    def create_categories(self, names: List[str]) -> List[Dict]:
+        if not names:
+            return []
+        resp = self.sb.table("categories").upsert([{"name": n} for n in names], on_conflict="name").execute()
+        return resp.data or []
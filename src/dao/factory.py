@@ -0,0 +1,85 @@
+# src/dao/factory.py
+# Picks the DAO implementation for the configured DB_BACKEND. Services call these instead of
+# instantiating a concrete DAO, so switching backends is a config change only.
+import threading
+from typing import Optional
+from src.config import DB_BACKEND
+
+_memory_client = None
+_memory_lock = threading.Lock()
+
+def get_memory_client():
+    # One in-process database shared by every DAO when DB_BACKEND=memory
+    global _memory_client
+    with _memory_lock:
+        if _memory_client is None:
+            from src.dao.memory_client import MemoryClient
+            _memory_client = MemoryClient()
+        return _memory_client
+
+def _backend(backend: Optional[str]) -> str:
+    backend = (backend or DB_BACKEND).lower()
+    if backend not in ("supabase", "sqlite", "memory", "sync"):
+        raise ValueError(f"Unknown DB_BACKEND: {backend}")
+    return backend
+
+def get_category_dao(backend: Optional[str] = None):
+    backend = _backend(backend)
+    if backend == "sqlite":
+        from src.dao.sqlite_dao import SQLiteCategoryDAO
+        return SQLiteCategoryDAO()
+    if backend == "sync":
+        from src.sync.journal import JournaledCategoryDAO
+        return JournaledCategoryDAO()
+    from src.dao.category_dao import CategoryDAO
+    return CategoryDAO(get_memory_client() if backend == "memory" else None)
+
+def get_location_dao(backend: Optional[str] = None):
+    backend = _backend(backend)
+    if backend in ("sqlite", "sync"):
+        # Locations are created on the remote by name when the journal is pushed; no journal op needed
+        from src.dao.sqlite_dao import SQLiteLocationDAO
+        return SQLiteLocationDAO()
+    from src.dao.location_dao import LocationDAO
+    return LocationDAO(get_memory_client() if backend == "memory" else None)
+
+# location_id scopes the medicine and alert DAOs to one location (see src/dao/base.py)
+def get_medicine_dao(backend: Optional[str] = None, location_id: Optional[int] = None):
+    backend = _backend(backend)
+    if backend == "sqlite":
+        from src.dao.sqlite_dao import SQLiteMedicineDAO
+        return SQLiteMedicineDAO(location_id=location_id)
+    if backend == "sync":
+        from src.sync.journal import JournaledMedicineDAO
+        return JournaledMedicineDAO(location_id=location_id)
+    from src.dao.medicine_dao import MedicineDAO
+    return MedicineDAO(get_memory_client() if backend == "memory" else None, location_id)
+
+def get_alert_dao(backend: Optional[str] = None, location_id: Optional[int] = None):
+    backend = _backend(backend)
+    if backend == "sqlite":
+        from src.dao.sqlite_dao import SQLiteAlertDAO
+        return SQLiteAlertDAO(location_id=location_id)
+    if backend == "sync":
+        from src.sync.journal import JournaledAlertDAO
+        return JournaledAlertDAO(location_id=location_id)
+    from src.dao.alert_dao import AlertDAO
+    return AlertDAO(get_memory_client() if backend == "memory" else None, location_id)
+
+def _async_dao(backend: Optional[str], supabase_cls: str, sync_factory, **kwargs):
+    # Supabase gets native async DAOs; every other backend is the blocking DAO run in a thread
+    backend = _backend(backend)
+    if backend == "supabase":
+        from src.dao import async_dao
+        return getattr(async_dao, supabase_cls)(**kwargs)
+    from src.dao.async_dao import ThreadedAsyncDAO
+    return ThreadedAsyncDAO(sync_factory(backend, **kwargs))
+
+def get_async_category_dao(backend: Optional[str] = None):
+    return _async_dao(backend, "AsyncCategoryDAO", get_category_dao)
+
+def get_async_medicine_dao(backend: Optional[str] = None, location_id: Optional[int] = None):
+    return _async_dao(backend, "AsyncMedicineDAO", get_medicine_dao, location_id=location_id)
+
+def get_async_alert_dao(backend: Optional[str] = None, location_id: Optional[int] = None):
+    return _async_dao(backend, "AsyncAlertDAO", get_alert_dao, location_id=location_id)
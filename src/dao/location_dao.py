@@ -0,0 +1,22 @@
+from typing import Dict, Iterator, List, Optional
+from src.dao.base import LocationRepository
+from src.dao.paging import iter_keyset
+from src.dao.supabase_dao import SupabaseDAO
+
+class LocationDAO(SupabaseDAO, LocationRepository):
+    def create_location(self, name: str) -> Optional[Dict]:
+        resp = self.sb.table("locations").upsert({"name": name}, on_conflict="name").execute()
+        return resp.data[0] if resp.data else None
+
+    def create_locations(self, names: List[str]) -> List[Dict]:
+        if not names:
+            return []
+        resp = self.sb.table("locations").upsert([{"name": n} for n in names], on_conflict="name").execute()
+        return resp.data or []
+
+    def get_location_by_name(self, name: str) -> Optional[Dict]:
+        resp = self.sb.table("locations").select("*").eq("name", name).limit(1).execute()
+        return resp.data[0] if resp.data else None
+
+    def iter_locations(self, page_size: Optional[int] = None, after_id: Optional[int] = None) -> Iterator[Dict]:
+        return iter_keyset(lambda: self.sb.table("locations").select("*"), page_size, after_id)
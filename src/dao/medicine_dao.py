@@ -1,41 +1,202 @@
-from typing import Optional, List, Dict
-from src.config import get_supabase
+from typing import Optional, List, Dict, Iterator, Tuple
+from src.config import BULK_ID_CHUNK, PAGE_SIZE
+from src.dao.base import MedicineRepository, StockConflict, MEDICINE_COLUMNS
+from src.dao.paging import fetch_page, iter_keyset
+from src.dao.supabase_dao import SupabaseDAO
 
-class MedicineDAO:
-    def __init__(self):
-        self.sb = get_supabase()
+# SQLSTATE raised by take_lots() in sql/005_medicine_lots.sql when a lot is short
+STOCK_CONFLICT = "MT409"
+
+class MedicineDAO(SupabaseDAO, MedicineRepository):
+    def __init__(self, client=None, location_id: Optional[int] = None):
+        super().__init__(client)
+        self.location_id = location_id
+
+    def for_location(self, location_id: Optional[int]) -> "MedicineDAO":
+        # Same client, other location; lets src/sync replay each branch's writes
+        return MedicineDAO(self._sb, location_id)
+
+    def _select(self, columns: str, **kwargs):
+        # Every medicines read starts here, so a location-scoped DAO only sees its own rows
+        query = self.sb.table("medicines").select(columns, **kwargs)
+        return query.eq("location_id", self.location_id) if self.location_id is not None else query
 
     def add_medicine(self, name: str, expiry_date: str, category_id: int, quantity: int = 1) -> Dict:
-        # Check if medicine already exists under same category
-        resp = self.sb.table("medicines")\
-            .select("*")\
-            .eq("name", name)\
-            .eq("category_id", category_id)\
-            .limit(1)\
-            .execute()
-        existing = resp.data[0] if resp.data else None
-
-        if existing:
-            # Update quantity
-            new_qty = existing["quantity"] + quantity
-            self.sb.table("medicines").update({"quantity": new_qty}).eq("id", existing["id"]).execute()
-            return self.get_medicine_by_id(existing["id"])
-
-        # Otherwise insert new medicine
-        payload = {"name": name, "expiry_date": expiry_date, "category_id": category_id, "quantity": quantity}
-        self.sb.table("medicines").insert(payload).execute()
-        resp = self.sb.table("medicines")\
-            .select("*")\
-            .eq("name", name)\
-            .eq("category_id", category_id)\
-            .limit(1)\
-            .execute()
+        # Insert or atomically increment quantity on (location_id, name, category_id); returns the row in the same request
+        resp = self.sb.rpc("add_medicine_stock", {
+            "p_name": name,
+            "p_expiry_date": expiry_date,
+            "p_category_id": category_id,
+            "p_quantity": quantity,
+            "p_location_id": self.location_id,
+        }).execute()
         return resp.data[0] if resp.data else None
 
-    def list_medicines(self) -> List[Dict]:
-        resp = self.sb.table("medicines").select("*").execute()
-        return resp.data or []
+    def page_medicines(self, after_id: Optional[int] = None, limit: int = PAGE_SIZE, columns: str = "*") -> List[Dict]:
+        return fetch_page(lambda: self._select(columns), after_id, limit)
+
+    def iter_medicines(self, page_size: Optional[int] = None, columns: str = "*") -> Iterator[Dict]:
+        return iter_keyset(lambda: self._select(columns), page_size)
 
     def get_medicine_by_id(self, med_id: int) -> Optional[Dict]:
         resp = self.sb.table("medicines").select("*").eq("id", med_id).limit(1).execute()
         return resp.data[0] if resp.data else None
+
+    def get_medicines_by_ids(self, med_ids: List[int], columns: str = MEDICINE_COLUMNS) -> List[Dict]:
+        # Chunked so a long id list neither overflows the request URL nor hits max-rows
+        ids = list(med_ids)
+        rows: List[Dict] = []
+        for i in range(0, len(ids), BULK_ID_CHUNK):
+            resp = self.sb.table("medicines").select(columns).in_("id", ids[i:i + BULK_ID_CHUNK]).execute()
+            rows.extend(resp.data or [])
+        return rows
+
+    def list_expiring_between(self, start: str, end: str, columns: str = MEDICINE_COLUMNS) -> List[Dict]:
+        # Inclusive expiry window, filtered by PostgREST instead of in Python. Paged by id so
+        # max-rows can't cut the window short; ordered by expiry_date once collected.
+        rows = list(iter_keyset(lambda: self._select(columns).gte("expiry_date", start).lte("expiry_date", end)))
+        return sorted(rows, key=lambda m: m["expiry_date"])
+
+    def list_expired(self, as_of: str, columns: str = MEDICINE_COLUMNS, in_stock: bool = False) -> List[Dict]:
+        def query():
+            q = self._select(columns).lt("expiry_date", as_of)
+            return q.gt("quantity", 0) if in_stock else q
+
+        return sorted(iter_keyset(query), key=lambda m: m["expiry_date"])
+
+    def search_medicines(self, terms: List[str], category_id: Optional[int] = None, start: Optional[str] = None,
+                         end: Optional[str] = None, limit: int = 50, offset: int = 0,
+                         columns: str = MEDICINE_COLUMNS) -> List[Dict]:
+        # Each term must start a word of the name; both ilike patterns are served by the
+        # trigram index from sql/007_medicine_search.sql
+        query = self._select(columns)
+        if terms:
+            words = [f'or(name.ilike."{t}*",name.ilike."* {t}*")' for t in terms]
+            query = query.or_(f"and({','.join(words)})")
+        if category_id is not None:
+            query = query.eq("category_id", category_id)
+        if start:
+            query = query.gte("expiry_date", start)
+        if end:
+            query = query.lte("expiry_date", end)
+        resp = query.order("name").order("id").range(offset, offset + limit - 1).execute()
+        return resp.data or []
+
+    def expire_before(self, as_of: str) -> int:
+        # Soft delete: empties every expired lot in one call; returns how many medicines lost stock
+        resp = self.sb.rpc("expire_lots_before", {"p_as_of": as_of, "p_location_id": self.location_id}).execute()
+        return resp.data or 0
+
+    def count_medicines(self, start: Optional[str] = None, end: Optional[str] = None, before: Optional[str] = None) -> int:
+        # head=True returns only the Content-Range count, no rows
+        query = self._select("id", count="exact", head=True)
+        if start:
+            query = query.gte("expiry_date", start)
+        if end:
+            query = query.lte("expiry_date", end)
+        if before:
+            query = query.lt("expiry_date", before)
+        resp = query.execute()
+        return resp.count or 0
+
+    def expiry_summary(self, as_of: str, window_end: str) -> List[Dict]:
+        # Aggregated server-side from medicine_expiry_summary (sql/008_locations.sql)
+        resp = self.sb.rpc("dashboard_stats", {"p_as_of": as_of, "p_window_end": window_end,
+                                               "p_location_id": self.location_id}).execute()
+        return resp.data or []
+
+    def location_summary(self, as_of: str, window_end: str) -> List[Dict]:
+        resp = self.sb.rpc("location_stats", {"p_as_of": as_of, "p_window_end": window_end}).execute()
+        return resp.data or []
+
+    def iter_lots(self, name: Optional[str] = None, page_size: Optional[int] = None) -> Iterator[Dict]:
+        # Lots carry only medicine_id; names are resolved once per page with one IN query
+        page_size = page_size or PAGE_SIZE
+        meds: Dict[int, Dict] = {}
+        if name is not None:
+            meds = {m["id"]: m for m in self._select("id,name,category_id,location_id")
+                    .eq("name", name).execute().data or []}
+            if not meds:
+                return
+
+        def build():
+            query = self.sb.table("medicine_lots").select("*").gt("quantity", 0)
+            return query.in_("medicine_id", list(meds)) if name is not None else query
+
+        after_id = None
+        while True:
+            lots = fetch_page(build, after_id, page_size)
+            missing = {lot["medicine_id"] for lot in lots} - meds.keys()
+            if missing:
+                meds.update({m["id"]: m for m in self.get_medicines_by_ids(missing, "id,name,category_id,location_id")})
+            for lot in lots:
+                med = meds[lot["medicine_id"]]
+                if self.location_id is not None and med["location_id"] != self.location_id:
+                    continue
+                yield dict(lot, name=med["name"], category_id=med["category_id"], location_id=med["location_id"])
+            if len(lots) < page_size:
+                return
+            after_id = lots[-1]["id"]
+
+    def take_lots(self, takes: List[Dict]) -> List[Dict]:
+        if not takes:
+            return []
+        for t in takes:
+            if t["quantity"] < 1:
+                raise ValueError(f"take from lot {t['lot_id']} must be at least 1 unit, got {t['quantity']}")
+        try:
+            resp = self.sb.rpc("take_lots", {"p_takes": takes}).execute()
+        except Exception as e:
+            if getattr(e, "code", None) == STOCK_CONFLICT:
+                raise StockConflict(str(e)) from e
+            raise
+        return resp.data or []
+
+    def dispense_fefo(self, name: str, category_id: int, quantity: int, op_id: Optional[str] = None) -> int:
+        # Server-side FEFO, clamped to the stock on hand; used to replay dispenses from src/sync.
+        # A call repeating an op_id the remote already applied takes nothing.
+        resp = self.sb.rpc("dispense_medicine", {
+            "p_name": name, "p_category_id": category_id, "p_quantity": quantity,
+            "p_location_id": self.location_id, "p_op_id": op_id,
+        }).execute()
+        return resp.data or 0
+
+    def add_medicines_bulk(self, items: List[Dict]) -> List[Dict]:
+        # Same semantics as add_medicine for a whole batch of {name, expiry_date, category_id, quantity};
+        # an unscoped DAO keeps each item's own location_id (default location if missing). Items with
+        # an op_id the remote already applied add no stock (replayed sync pushes).
+        if not items:
+            return []
+        if self.location_id is not None:
+            items = [dict(i, location_id=self.location_id) for i in items]
+        resp = self.sb.rpc("add_medicine_stock_bulk", {"p_items": items}).execute()
+        return resp.data or []
+
+    def get_medicines_by_keys(self, keys: List[Tuple[str, int]], columns: str = MEDICINE_COLUMNS) -> List[Dict]:
+        # One request for many (name, category_id) pairs; the two IN filters can over-select,
+        # so exact pairs are matched here
+        if not keys:
+            return []
+        names = sorted({name for name, _ in keys})
+        category_ids = sorted({cat_id for _, cat_id in keys})
+        resp = self._select(columns)\
+            .in_("name", names)\
+            .in_("category_id", category_ids)\
+            .execute()
+        wanted = set(keys)
+        return [r for r in (resp.data or []) if (r["name"], r["category_id"]) in wanted]
+
+    def iter_updated_since(self, updated_at: Optional[str] = None, after_id: int = 0,
+                           page_size: Optional[int] = None) -> Iterator[Dict]:
+        # Keyset on (updated_at, id) so rows sharing a timestamp are never skipped or repeated.
+        # Needs the updated_at column from sql/003_sync_updated_at.sql.
+        page_size = page_size or PAGE_SIZE
+        while True:
+            query = self.sb.table("medicines").select("*")
+            if updated_at:
+                query = query.or_(f'updated_at.gt."{updated_at}",and(updated_at.eq."{updated_at}",id.gt.{after_id})')
+            rows = query.order("updated_at").order("id").limit(page_size).execute().data or []
+            yield from rows
+            if len(rows) < page_size:
+                return
+            updated_at, after_id = rows[-1]["updated_at"], rows[-1]["id"]
@@ -0,0 +1,702 @@
+# src/dao/memory_client.py
+# In-process stand-in for the Supabase client: same table()/rpc() builder API as
+# postgrest-py, backed by Python lists. Used for benchmarks, sync tests and offline runs.
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from src.dao.base import DEFAULT_LOCATION_ID, DEFAULT_LOCATION_NAME
+
+# Unique keys enforced on insert/upsert, mirroring sql/*.sql
+UNIQUE_KEYS = {
+    "categories": [("name",)],
+    "locations": [("name",)],
+    "medicines": [("location_id", "name", "category_id")],
+    "alerts": [("medicine_id", "alert_date")],
+    "alert_lead_times": [("category_id", "lead_days")],
+    "sync_applied_ops": [("op_id",)],
+}
+
+# Non-unique lookup indexes (besides id on every table), used for eq/in filters on these columns
+INDEXED_COLUMNS = {
+    "medicines": ("name",),
+    "medicine_lots": ("medicine_id",),
+    "alerts": ("medicine_id",),
+}
+
+# Tables whose updated_at is bumped on every write (the trigger in sql/003_sync_updated_at.sql)
+TOUCH_TABLES = {"medicines"}
+
+DEFAULTS = {
+    "medicines": {"quantity": 1, "location_id": DEFAULT_LOCATION_ID},
+    "alerts": {"status": "Pending"},
+}
+
+
+class MemoryAPIError(Exception):
+    def __init__(self, message: str, code: str = "23505"):
+        super().__init__(message)
+        self.code = code
+
+
+class MemoryResponse:
+    def __init__(self, data: List[Dict], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _coerce(value: Any, sample: Any) -> Any:
+    # PostgREST filters arrive as strings; compare them with the stored type
+    if isinstance(sample, bool) or value is None:
+        return value
+    if isinstance(sample, int) and isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _match(row: Dict, op: str, column: str, value: Any) -> bool:
+    if op == "or":
+        return _logic_match(row, "or", value)
+    current = row.get(column)
+    if op == "is":
+        return current is value
+    if current is None:
+        return False
+    if op == "in":
+        return current in [_coerce(v, current) for v in value]
+    value = _coerce(value, current)
+    if op == "eq":
+        return current == value
+    if op == "neq":
+        return current != value
+    if op == "gt":
+        return current > value
+    if op == "gte":
+        return current >= value
+    if op == "lt":
+        return current < value
+    if op == "lte":
+        return current <= value
+    if op in ("like", "ilike"):
+        pattern = str(value)
+        text = str(current)
+        if op == "ilike":
+            pattern, text = pattern.lower(), text.lower()
+        return _like(text, pattern)
+    raise ValueError(f"Unsupported filter: {op}")
+
+
+def _like(text: str, pattern: str) -> bool:
+    parts = pattern.replace("*", "%").split("%")
+    if len(parts) == 1:
+        return text == pattern
+    if not text.startswith(parts[0]) or not text.endswith(parts[-1]):
+        return False
+    pos = len(parts[0])
+    for part in parts[1:-1]:
+        found = text.find(part, pos)
+        if found < 0:
+            return False
+        pos = found + len(part)
+    return pos <= len(text) - len(parts[-1])
+
+
+def _split_top(expr: str) -> List[str]:
+    parts, depth, quoted, current = [], 0, False, ""
+    for ch in expr:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0 and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += ch
+    if current:
+        parts.append(current)
+    return parts
+
+
+@lru_cache(maxsize=256)
+def _logic_tree(mode: str, expr: str) -> tuple:
+    # PostgREST logic trees: "col.op.value,and(col.op.value,...)", parsed once per distinct filter
+    terms = []
+    for term in _split_top(expr):
+        term = term.strip()
+        if term.startswith(("and(", "or(")):
+            inner_mode, inner = term.split("(", 1)
+            terms.append(_logic_tree(inner_mode, inner[:-1]))
+            continue
+        column, op, value = term.split(".", 2)
+        value = value.strip('"')
+        if op == "in":
+            value = tuple(v.strip('"') for v in _split_top(value.strip("()")))
+        terms.append((op, column, value))
+    return mode, tuple(terms)
+
+
+def _logic_match(row: Dict, mode: str, expr: str) -> bool:
+    return _eval_tree(row, _logic_tree(mode, expr))
+
+
+def _eval_tree(row: Dict, tree: tuple) -> bool:
+    mode, terms = tree
+    results = (_eval_tree(row, t) if len(t) == 2 else _match(row, *t) for t in terms)
+    return any(results) if mode == "or" else all(results)
+
+
+class MemoryQuery:
+    def __init__(self, client: "MemoryClient", table: str):
+        self.client = client
+        self.table_name = table
+        self.op = "select"
+        self.columns = "*"
+        self.count_method = None
+        self.head = False
+        self.payload = None
+        self.on_conflict = None
+        self.ignore_duplicates = False
+        self.returning = "representation"
+        self.filters: List[tuple] = []
+        self.orders: List[tuple] = []
+        self.limit_n: Optional[int] = None
+        self.offset_n = 0
+
+    # ---- operations ----
+    def select(self, *columns, count=None, head=None):
+        self.op = "select"
+        self.columns = ",".join(columns) or "*"
+        self.count_method = count
+        self.head = bool(head)
+        return self
+
+    def insert(self, json, *, count=None, returning="representation", upsert=False, default_to_null=True):
+        self.op = "upsert" if upsert else "insert"
+        self.payload = json
+        self.count_method = count
+        self.returning = getattr(returning, "value", returning)
+        return self
+
+    def upsert(self, json, *, count=None, returning="representation", ignore_duplicates=False,
+               on_conflict="", default_to_null=True):
+        self.op = "upsert"
+        self.payload = json
+        self.count_method = count
+        self.returning = getattr(returning, "value", returning)
+        self.ignore_duplicates = ignore_duplicates
+        self.on_conflict = on_conflict or None
+        return self
+
+    def update(self, json, *, count=None, returning="representation"):
+        self.op = "update"
+        self.payload = json
+        self.count_method = count
+        self.returning = getattr(returning, "value", returning)
+        return self
+
+    def delete(self, *, count=None, returning="representation"):
+        self.op = "delete"
+        self.count_method = count
+        self.returning = getattr(returning, "value", returning)
+        return self
+
+    # ---- filters / modifiers ----
+    def _filter(self, op, column, value):
+        self.filters.append((op, column, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter("eq", column, value)
+
+    def neq(self, column, value):
+        return self._filter("neq", column, value)
+
+    def gt(self, column, value):
+        return self._filter("gt", column, value)
+
+    def gte(self, column, value):
+        return self._filter("gte", column, value)
+
+    def lt(self, column, value):
+        return self._filter("lt", column, value)
+
+    def lte(self, column, value):
+        return self._filter("lte", column, value)
+
+    def in_(self, column, values):
+        return self._filter("in", column, list(values))
+
+    def like(self, column, pattern):
+        return self._filter("like", column, pattern)
+
+    def ilike(self, column, pattern):
+        return self._filter("ilike", column, pattern)
+
+    def is_(self, column, value):
+        return self._filter("is", column, None if value in (None, "null") else value)
+
+    def or_(self, filters, reference_table=None):
+        return self._filter("or", None, filters)
+
+    def order(self, column, *, desc=False, nullsfirst=None, foreign_table=None):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, size, *, foreign_table=None):
+        self.limit_n = size
+        return self
+
+    def range(self, start, end, foreign_table=None):
+        self.offset_n = start
+        self.limit_n = end - start + 1
+        return self
+
+    def execute(self) -> MemoryResponse:
+        return self.client._execute(self)
+
+
+class MemoryRpc:
+    def __init__(self, client: "MemoryClient", fn: str, params: Dict):
+        self.client = client
+        self.fn = fn
+        self.params = params or {}
+
+    def execute(self) -> MemoryResponse:
+        return self.client._call(self.fn, self.params)
+
+
+class MemoryClient:
+    def __init__(self, latency: float = 0.0):
+        # latency simulates the network round trip; it is spent outside the lock
+        self.latency = latency
+        self.lock = threading.RLock()
+        self.tables: Dict[str, List[Dict]] = defaultdict(list)
+        self._next_id: Dict[str, int] = defaultdict(int)
+        # Indexes kept in step with self.tables, so lookups by id, unique key or an
+        # INDEXED_COLUMNS value stay O(1) at benchmark sizes (see benchmarks/suite.py)
+        self._by_id: Dict[str, Dict[Any, Dict]] = defaultdict(dict)
+        self._unique: Dict[tuple, Dict[tuple, Dict]] = defaultdict(dict)
+        self._groups: Dict[tuple, Dict[Any, List[Dict]]] = defaultdict(lambda: defaultdict(list))
+        # False once a row lands out of id order (explicit ids); disables the keyset fast path
+        self._id_ordered: Dict[str, bool] = defaultdict(lambda: True)
+        self.round_trips = 0
+        self.functions: Dict[str, Callable[[Dict], Any]] = {
+            "add_medicine_stock": self._rpc_add_medicine_stock,
+            "add_medicine_stock_bulk": self._rpc_add_medicine_stock_bulk,
+            "dashboard_stats": self._rpc_dashboard_stats,
+            "take_lots": self._rpc_take_lots,
+            "dispense_medicine": self._rpc_dispense_medicine,
+            "expire_lots_before": self._rpc_expire_lots_before,
+            "regenerate_alerts": self._rpc_regenerate_alerts,
+            "set_lead_times": self._rpc_set_lead_times,
+            "location_stats": self._rpc_location_stats,
+        }
+        # The location sql/008_locations.sql creates
+        self._store("locations", {"id": DEFAULT_LOCATION_ID, "name": DEFAULT_LOCATION_NAME}, _now())
+
+    def table(self, name: str) -> MemoryQuery:
+        return MemoryQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict] = None, count=None, head=False, get=False) -> MemoryRpc:
+        return MemoryRpc(self, fn, params)
+
+    # ---- engine ----
+    def _round_trip(self):
+        with self.lock:
+            self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _call(self, fn: str, params: Dict) -> MemoryResponse:
+        self._round_trip()
+        if fn not in self.functions:
+            raise MemoryAPIError(f"function {fn} does not exist", code="PGRST202")
+        with self.lock:
+            result = self.functions[fn](params)
+        if isinstance(result, list):
+            return MemoryResponse(result)
+        return MemoryResponse(result if result is not None else [])
+
+    def _execute(self, q: MemoryQuery) -> MemoryResponse:
+        self._round_trip()
+        with self.lock:
+            if q.op == "select":
+                return self._select(q)
+            if q.op in ("insert", "upsert"):
+                return self._write(q)
+            if q.op == "update":
+                return self._update(q)
+            if q.op == "delete":
+                return self._delete(q)
+        raise ValueError(f"Unsupported operation: {q.op}")
+
+    # ---- indexes ----
+    def _index(self, table: str, row: Dict):
+        self._by_id[table][row.get("id")] = row
+        for key in UNIQUE_KEYS.get(table, []):
+            self._unique[(table, key)][tuple(row.get(k) for k in key)] = row
+        for column in INDEXED_COLUMNS.get(table, ()):
+            self._groups[(table, column)][row.get(column)].append(row)
+
+    def _unindex(self, table: str, row: Dict):
+        self._by_id[table].pop(row.get("id"), None)
+        for key in UNIQUE_KEYS.get(table, []):
+            self._unique[(table, key)].pop(tuple(row.get(k) for k in key), None)
+        for column in INDEXED_COLUMNS.get(table, ()):
+            group = self._groups[(table, column)][row.get(column)]
+            group[:] = [r for r in group if r is not row]
+
+    def _reindex(self, table: str):
+        self._by_id.pop(table, None)
+        for key in UNIQUE_KEYS.get(table, []):
+            self._unique.pop((table, key), None)
+        for column in INDEXED_COLUMNS.get(table, ()):
+            self._groups.pop((table, column), None)
+        ids = [r.get("id") for r in self.tables[table]]
+        self._id_ordered[table] = all(a < b for a, b in zip(ids, ids[1:]))
+        for row in self.tables[table]:
+            self._index(table, row)
+
+    def _candidates(self, q: MemoryQuery) -> Iterable[Dict]:
+        # Narrow the scan with an index when a filter allows it; rows come back in id order
+        # whenever the table is, and every filter is still re-checked by the caller
+        table = q.table_name
+        rows = self.tables[table]
+        for op, column, value in q.filters:
+            if op not in ("eq", "in", "gt", "gte"):
+                continue
+            if column == "id" and op in ("gt", "gte") and self._id_ordered[table] and rows:
+                bound = _coerce(value, rows[0]["id"])
+                cut = bisect_right if op == "gt" else bisect_left
+                return (rows[i] for i in range(cut(rows, bound, key=lambda r: r["id"]), len(rows)))
+            if op in ("gt", "gte"):
+                continue
+            if column == "id":
+                index = self._by_id[table]
+                found = [index.get(_coerce(v, 0)) for v in (value if op == "in" else [value])]
+                return sorted({id(r): r for r in found if r is not None}.values(), key=lambda r: r["id"])
+            if column in INDEXED_COLUMNS.get(table, ()):
+                groups = self._groups[(table, column)]
+                sample = next(iter(groups), None)
+                found = [r for v in (value if op == "in" else [value]) for r in groups.get(_coerce(v, sample), ())]
+                return sorted({id(r): r for r in found}.values(), key=lambda r: r["id"])
+        return rows
+
+    def _matching(self, q: MemoryQuery, stop: Optional[int] = None) -> List[Dict]:
+        # stop: enough rows for the caller (already in the requested order); end the scan there
+        out = []
+        for r in self._candidates(q):
+            if all(_match(r, op, col, val) for op, col, val in q.filters):
+                out.append(r)
+                if stop is not None and len(out) >= stop:
+                    break
+        return out
+
+    @staticmethod
+    def _project(row: Dict, columns: str) -> Dict:
+        if columns.strip() == "*":
+            return dict(row)
+        cols = [c.strip() for c in columns.split(",") if c.strip()]
+        return {c: row.get(c) for c in cols}
+
+    def _select(self, q: MemoryQuery) -> MemoryResponse:
+        stop = None
+        in_id_order = not q.orders or (q.orders == [("id", False)] and self._id_ordered[q.table_name])
+        if q.limit_n is not None and not q.count_method and in_id_order:
+            stop = q.offset_n + q.limit_n
+        rows = self._matching(q, stop)
+        count = len(rows) if q.count_method else None
+        if q.head:
+            return MemoryResponse([], count)
+        for column, desc in reversed(q.orders):
+            rows = sorted(rows, key=lambda r: (r.get(column) is None, r.get(column)), reverse=desc)
+        rows = rows[q.offset_n:]
+        if q.limit_n is not None:
+            rows = rows[:q.limit_n]
+        return MemoryResponse([self._project(r, q.columns) for r in rows], count)
+
+    def _find_conflict(self, table: str, row: Dict, keys: Optional[List[tuple]] = None) -> Optional[Dict]:
+        for key in keys if keys is not None else UNIQUE_KEYS.get(table, []):
+            if key in UNIQUE_KEYS.get(table, []):
+                existing = self._unique[(table, key)].get(tuple(row.get(k) for k in key))
+                if existing is not None:
+                    return existing
+                continue
+            for existing in self.tables[table]:
+                if all(existing.get(k) == row.get(k) for k in key):
+                    return existing
+        return None
+
+    @staticmethod
+    def _touch(table: str, row: Dict):
+        if table in TOUCH_TABLES:
+            row["updated_at"] = _now()
+
+    def _store(self, table: str, stored: Dict, now: str) -> Dict:
+        self._next_id[table] += 1
+        stored.setdefault("id", self._next_id[table])
+        stored.setdefault("created_at", now)
+        if table in TOUCH_TABLES:
+            stored.setdefault("updated_at", now)
+        if table == "alerts":
+            # The alerts_location trigger: an alert always carries its medicine's location
+            med = self._by_id["medicines"].get(stored["medicine_id"])
+            stored["location_id"] = med["location_id"] if med else DEFAULT_LOCATION_ID
+        rows = self.tables[table]
+        if rows and not rows[-1]["id"] < stored["id"]:
+            self._id_ordered[table] = False
+        self._next_id[table] = max(self._next_id[table], stored["id"])
+        rows.append(stored)
+        self._index(table, stored)
+        return stored
+
+    def insert_row(self, table: str, row: Dict) -> Dict:
+        if self._find_conflict(table, row):
+            raise MemoryAPIError(f"duplicate key value violates unique constraint on {table}")
+        stored = dict(DEFAULTS.get(table, {}))
+        stored.update(row)
+        stored.pop("updated_at", None)
+        return self._store(table, stored, _now())
+
+    def load(self, table: str, rows: Iterable[Dict]) -> int:
+        # Bulk seed for benchmarks: no round trip, unique-key check or trigger, and the row
+        # dicts are stored as given (not copied). Callers keep ids and roll-ups consistent.
+        now = _now()
+        defaults = DEFAULTS.get(table, {})
+        n = 0
+        with self.lock:
+            for row in rows:
+                for column, value in defaults.items():
+                    row.setdefault(column, value)
+                self._store(table, row, now)
+                n += 1
+        return n
+
+    def _write(self, q: MemoryQuery) -> MemoryResponse:
+        payload = q.payload if isinstance(q.payload, list) else [q.payload]
+        conflict_keys = [tuple(c.strip() for c in q.on_conflict.split(","))] if q.on_conflict else None
+        written = []
+        for row in payload:
+            existing = self._find_conflict(q.table_name, row, conflict_keys) if q.op == "upsert" else None
+            if existing is None:
+                written.append(self.insert_row(q.table_name, row))
+            elif not q.ignore_duplicates:
+                self._unindex(q.table_name, existing)
+                existing.update(row)
+                self._index(q.table_name, existing)
+                self._touch(q.table_name, existing)
+                written.append(existing)
+        data = [dict(r) for r in written] if q.returning == "representation" else []
+        return MemoryResponse(data, len(written) if q.count_method else None)
+
+    def _update(self, q: MemoryQuery) -> MemoryResponse:
+        rows = self._matching(q)
+        for r in rows:
+            self._unindex(q.table_name, r)
+            r.update(q.payload)
+            self._index(q.table_name, r)
+            self._touch(q.table_name, r)
+        data = [dict(r) for r in rows] if q.returning == "representation" else []
+        return MemoryResponse(data, len(rows) if q.count_method else None)
+
+    def _delete(self, q: MemoryQuery) -> MemoryResponse:
+        rows = self._matching(q)
+        doomed = {id(r) for r in rows}
+        self.tables[q.table_name] = [r for r in self.tables[q.table_name] if id(r) not in doomed]
+        self._reindex(q.table_name)
+        data = [dict(r) for r in rows] if q.returning == "representation" else []
+        return MemoryResponse(data, len(rows) if q.count_method else None)
+
+    # ---- stored procedures (see sql/002_add_medicine_stock.sql) ----
+    def _rpc_add_medicine_stock(self, params: Dict) -> List[Dict]:
+        return self._rpc_add_medicine_stock_bulk({"p_items": [{
+            "name": params["p_name"],
+            "expiry_date": params["p_expiry_date"],
+            "category_id": params["p_category_id"],
+            "quantity": params.get("p_quantity", 1),
+            "location_id": params.get("p_location_id"),
+        }]})
+
+    def _rpc_add_medicine_stock_bulk(self, params: Dict) -> List[Dict]:
+        # sql/005_medicine_lots.sql: each (medicine, expiry) in the delivery becomes a lot
+        # sql/011_sync_applied_ops.sql: an item whose op_id was applied before adds no lot
+        lots: Dict[tuple, int] = defaultdict(int)
+        meds: Dict[tuple, Dict] = {}
+        for item in params["p_items"]:
+            location_id = item.get("location_id") or DEFAULT_LOCATION_ID
+            key = (location_id, item["name"], item["category_id"])
+            if key not in meds:
+                row = {"location_id": location_id, "name": item["name"], "category_id": item["category_id"]}
+                meds[key] = self._find_conflict("medicines", row) or self.insert_row("medicines", {
+                    **row, "expiry_date": item["expiry_date"], "quantity": 0,
+                })
+            if self._claim_op(item.get("op_id")):
+                lots[(key, item["expiry_date"])] += int(item.get("quantity", 1))
+        for (key, expiry_date), quantity in lots.items():
+            lot = self.insert_row("medicine_lots", {
+                "medicine_id": meds[key]["id"], "expiry_date": expiry_date, "quantity": quantity,
+            })
+            self._rollup(lot["medicine_id"], quantity)
+        return [dict(m) for m in meds.values()]
+
+    def _claim_op(self, op_id: Optional[str]) -> bool:
+        # Records a sync op id; False if it was recorded before (the op must not be applied again)
+        if op_id is None:
+            return True
+        if self._find_conflict("sync_applied_ops", {"op_id": op_id}):
+            return False
+        self.insert_row("sync_applied_ops", {"op_id": op_id})
+        return True
+
+    # ---- sql/005_medicine_lots.sql ----
+    def _rollup(self, medicine_id: int, delta: int):
+        # The medicine_lots_rollup trigger: quantity by delta, expiry_date = earliest lot in stock
+        med = self._by_id["medicines"][medicine_id]
+        med["quantity"] += delta
+        in_stock = [l["expiry_date"] for l in self._groups[("medicine_lots", "medicine_id")].get(medicine_id, ())
+                    if l["quantity"] > 0]
+        if in_stock:
+            med["expiry_date"] = min(in_stock)
+        self._touch("medicines", med)
+
+    def _rpc_take_lots(self, params: Dict) -> List[Dict]:
+        by_id = self._by_id["medicine_lots"]
+        takes = sorted(params["p_takes"], key=lambda t: t["lot_id"])
+        for t in takes:
+            if t["quantity"] < 1:
+                raise MemoryAPIError(f"take from lot {t['lot_id']} must be at least 1 unit", code="22023")
+            lot = by_id.get(t["lot_id"])
+            if lot is None or lot["quantity"] < t["quantity"]:
+                raise MemoryAPIError(f"lot {t['lot_id']} has less than {t['quantity']} units left", code="MT409")
+        for t in takes:
+            by_id[t["lot_id"]]["quantity"] -= t["quantity"]
+            self._rollup(by_id[t["lot_id"]]["medicine_id"], -t["quantity"])
+        return [dict(by_id[t["lot_id"]]) for t in takes]
+
+    def _rpc_dispense_medicine(self, params: Dict) -> int:
+        med = self._find_conflict("medicines", {"location_id": params.get("p_location_id") or DEFAULT_LOCATION_ID,
+                                                "name": params["p_name"], "category_id": params["p_category_id"]})
+        if params["p_quantity"] < 1:
+            raise MemoryAPIError("p_quantity must be at least 1", code="22023")
+        if not self._claim_op(params.get("p_op_id")):
+            return 0
+        left = params["p_quantity"]
+        if med is None:
+            return 0
+        lots = sorted((l for l in self._groups[("medicine_lots", "medicine_id")].get(med["id"], ()) if l["quantity"] > 0),
+                      key=lambda l: (l["expiry_date"], l["id"]))
+        for lot in lots:
+            if left <= 0:
+                break
+            take = min(left, lot["quantity"])
+            lot["quantity"] -= take
+            self._rollup(med["id"], -take)
+            left -= take
+        return params["p_quantity"] - left
+
+    def _in_location(self, medicine_id: int, location_id: Optional[int]) -> bool:
+        return location_id is None or self._by_id["medicines"][medicine_id]["location_id"] == location_id
+
+    def _rpc_expire_lots_before(self, params: Dict) -> int:
+        expired = set()
+        location_id = params.get("p_location_id")
+        for lot in self.tables["medicine_lots"]:
+            if (lot["expiry_date"] < params["p_as_of"] and lot["quantity"] > 0
+                    and self._in_location(lot["medicine_id"], location_id)):
+                delta, lot["quantity"] = -lot["quantity"], 0
+                self._rollup(lot["medicine_id"], delta)
+                expired.add(lot["medicine_id"])
+        return len(expired)
+
+    # ---- sql/004_medicine_expiry_summary.sql, sql/008_locations.sql, sql/009_lot_expiry_summary.sql ----
+    def _status_buckets(self, params: Dict, group_by: str) -> Dict[tuple, Dict]:
+        # The stand-in scans medicines (counted at their roll-up expiry) and lots (units at each
+        # lot's own expiry) instead of the summary table
+        as_of, window_end = params["p_as_of"], params["p_window_end"]
+        location_id = params.get("p_location_id")
+        buckets: Dict[tuple, Dict] = {}
+
+        def bucket(med: Dict, expiry: str) -> Dict:
+            status = "Expired" if expiry < as_of else "Expiring Soon" if expiry <= window_end else "Safe"
+            return buckets.setdefault((med[group_by], status), {"medicines": 0, "quantity": 0})
+
+        for med in self.tables["medicines"]:
+            if location_id is None or med["location_id"] == location_id:
+                bucket(med, med["expiry_date"])["medicines"] += 1
+        for lot in self.tables["medicine_lots"]:
+            med = self._by_id["medicines"][lot["medicine_id"]]
+            if lot["quantity"] > 0 and (location_id is None or med["location_id"] == location_id):
+                bucket(med, lot["expiry_date"])["quantity"] += lot["quantity"]
+        return buckets
+
+    def _status_rows(self, table: str, buckets: Dict[tuple, Dict], prefix: str) -> List[Dict]:
+        # One row per (group, status); groups without stock come back once with a null status
+        out = []
+        for group in sorted(self.tables[table], key=lambda g: g["id"]):
+            statuses = [(status, b) for (group_id, status), b in buckets.items() if group_id == group["id"]]
+            for status, b in statuses or [(None, {"medicines": 0, "quantity": 0})]:
+                out.append({f"{prefix}_id": group["id"], f"{prefix}_name": group["name"], "status": status, **b})
+        return out
+
+    def _rpc_dashboard_stats(self, params: Dict) -> List[Dict]:
+        return self._status_rows("categories", self._status_buckets(params, "category_id"), "category")
+
+    def _rpc_location_stats(self, params: Dict) -> List[Dict]:
+        return self._status_rows("locations", self._status_buckets(params, "location_id"), "location")
+
+    # ---- sql/006_alert_schedule.sql ----
+    def _rpc_set_lead_times(self, params: Dict) -> None:
+        lead_days = sorted(set(params["p_lead_days"] or ()), reverse=True)
+        if any(d < 0 for d in lead_days):
+            raise MemoryAPIError("lead_days must not be negative", code="23514")
+        self.tables["alert_lead_times"] = [r for r in self.tables["alert_lead_times"]
+                                           if r["category_id"] != params["p_category_id"]]
+        self._reindex("alert_lead_times")
+        for d in lead_days:
+            self.insert_row("alert_lead_times", {"category_id": params["p_category_id"], "lead_days": d})
+
+    def _rpc_regenerate_alerts(self, params: Dict) -> List[Dict]:
+        as_of = params["p_as_of"]
+        location_id = params.get("p_location_id")
+        leads: Dict[Any, List[int]] = defaultdict(list)
+        for row in self.tables["alert_lead_times"]:
+            leads[row["category_id"]].append(row["lead_days"])
+        wanted: Dict[tuple, bool] = {}
+        for lot in self.tables["medicine_lots"]:
+            if lot["quantity"] <= 0 or not self._in_location(lot["medicine_id"], location_id):
+                continue
+            med = self._by_id["medicines"][lot["medicine_id"]]
+            days = leads.get(med["category_id"]) or params["p_default_lead_days"]
+            expiry = datetime.strptime(lot["expiry_date"], "%Y-%m-%d")
+            for d in days:
+                key = (med["id"], (expiry - timedelta(days=d)).strftime("%Y-%m-%d"))
+                wanted[key] = wanted.get(key, False) or key[1] >= as_of or d == min(days)
+        index = self._unique[("alerts", ("medicine_id", "alert_date"))]
+        inserted = 0
+        for (medicine_id, alert_date), due in wanted.items():
+            if due and (medicine_id, alert_date) not in index:
+                self.insert_row("alerts", {"medicine_id": medicine_id, "alert_date": alert_date, "status": "Pending"})
+                inserted += 1
+        kept = [a for a in self.tables["alerts"]
+                if a["status"] != "Pending" or (a["medicine_id"], a["alert_date"]) in wanted
+                or (location_id is not None and a["location_id"] != location_id)]
+        removed = len(self.tables["alerts"]) - len(kept)
+        if removed:
+            self.tables["alerts"] = kept
+            self._reindex("alerts")
+        return [{"inserted": inserted, "removed": removed}]
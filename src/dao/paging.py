@@ -0,0 +1,26 @@
+from typing import Callable, Dict, Iterator, List, Optional
+from src.config import PAGE_SIZE
+
+def fetch_page(build_query: Callable, after_id: Optional[int] = None, limit: int = PAGE_SIZE) -> List[Dict]:
+    # Keyset page: WHERE id > after_id ORDER BY id LIMIT n, so deep pages cost the same as the first
+    query = build_query()
+    if after_id is not None:
+        query = query.gt("id", after_id)
+    resp = query.order("id").limit(limit).execute()
+    return resp.data or []
+
+def iter_pages(fetch: Callable[[Optional[int], int], List[Dict]], page_size: Optional[int] = None,
+               after_id: Optional[int] = None) -> Iterator[Dict]:
+    # fetch(after_id, limit) returns the next page ordered by id
+    page_size = page_size or PAGE_SIZE
+    while True:
+        rows = fetch(after_id, page_size)
+        yield from rows
+        if len(rows) < page_size:
+            return
+        after_id = rows[-1]["id"]
+
+def iter_keyset(build_query: Callable, page_size: Optional[int] = None, after_id: Optional[int] = None) -> Iterator[Dict]:
+    # build_query must return a fresh builder each call; PostgREST builders are mutable.
+    # Keep page_size at or below the server's max-rows, otherwise a capped page looks like the last one.
+    return iter_pages(lambda cursor, limit: fetch_page(build_query, cursor, limit), page_size, after_id)
@@ -0,0 +1,805 @@
+# src/dao/sqlite_dao.py
+# Embedded SQLite backend implementing the DAO interfaces in src/dao/base.py.
+# One WAL-mode connection per store, shared across threads behind a lock; every statement is
+# a constant SQL string with ? parameters so sqlite3's statement cache reuses the prepared plan.
+import functools
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from src.config import PAGE_SIZE, SQLITE_PATH
+from src.dao.base import (AlertRepository, CategoryRepository, LocationRepository, MedicineRepository, StockConflict,
+                          DEFAULT_LOCATION_ID, DEFAULT_LOCATION_NAME, MEDICINE_COLUMNS)
+from src.dao.paging import iter_pages
+from src.instrumentation import pass_through, payload_bytes, recorder
+
+NOW = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+
+# Applied in order; PRAGMA user_version records how many have run
+MIGRATIONS = [
+    f"""
+    CREATE TABLE IF NOT EXISTS categories (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        created_at TEXT NOT NULL DEFAULT ({NOW})
+    );
+    CREATE TABLE IF NOT EXISTS medicines (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        expiry_date TEXT NOT NULL,
+        category_id INTEGER NOT NULL REFERENCES categories(id),
+        quantity INTEGER NOT NULL DEFAULT 1,
+        created_at TEXT NOT NULL DEFAULT ({NOW})
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS medicines_name_category_idx ON medicines(name, category_id);
+    CREATE INDEX IF NOT EXISTS medicines_expiry_idx ON medicines(expiry_date);
+    CREATE TABLE IF NOT EXISTS alerts (
+        id INTEGER PRIMARY KEY,
+        medicine_id INTEGER NOT NULL REFERENCES medicines(id),
+        alert_date TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'Pending',
+        created_at TEXT NOT NULL DEFAULT ({NOW})
+    );
+    CREATE INDEX IF NOT EXISTS alerts_status_date_idx ON alerts(status, alert_date);
+    """,
+    # Write-behind journal and watermarks for src/sync
+    """
+    CREATE TABLE IF NOT EXISTS sync_journal (
+        id INTEGER PRIMARY KEY,
+        op TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS sync_state (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    """,
+    # Dashboard aggregates kept up to date by triggers (mirrors sql/004_medicine_expiry_summary.sql)
+    """
+    CREATE TABLE IF NOT EXISTS medicine_expiry_summary (
+        category_id INTEGER NOT NULL,
+        expiry_date TEXT NOT NULL,
+        medicines INTEGER NOT NULL DEFAULT 0,
+        quantity INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (category_id, expiry_date)
+    );
+    CREATE TRIGGER IF NOT EXISTS medicines_summary_insert AFTER INSERT ON medicines BEGIN
+        INSERT INTO medicine_expiry_summary(category_id, expiry_date, medicines, quantity)
+        VALUES (NEW.category_id, NEW.expiry_date, 1, NEW.quantity)
+        ON CONFLICT(category_id, expiry_date) DO UPDATE SET
+            medicines = medicines + excluded.medicines, quantity = quantity + excluded.quantity;
+    END;
+    CREATE TRIGGER IF NOT EXISTS medicines_summary_delete AFTER DELETE ON medicines BEGIN
+        INSERT INTO medicine_expiry_summary(category_id, expiry_date, medicines, quantity)
+        VALUES (OLD.category_id, OLD.expiry_date, -1, -OLD.quantity)
+        ON CONFLICT(category_id, expiry_date) DO UPDATE SET
+            medicines = medicines + excluded.medicines, quantity = quantity + excluded.quantity;
+    END;
+    CREATE TRIGGER IF NOT EXISTS medicines_summary_update
+    AFTER UPDATE OF category_id, expiry_date, quantity ON medicines BEGIN
+        INSERT INTO medicine_expiry_summary(category_id, expiry_date, medicines, quantity)
+        VALUES (OLD.category_id, OLD.expiry_date, -1, -OLD.quantity)
+        ON CONFLICT(category_id, expiry_date) DO UPDATE SET
+            medicines = medicines + excluded.medicines, quantity = quantity + excluded.quantity;
+        INSERT INTO medicine_expiry_summary(category_id, expiry_date, medicines, quantity)
+        VALUES (NEW.category_id, NEW.expiry_date, 1, NEW.quantity)
+        ON CONFLICT(category_id, expiry_date) DO UPDATE SET
+            medicines = medicines + excluded.medicines, quantity = quantity + excluded.quantity;
+    END;
+    DELETE FROM medicine_expiry_summary;
+    INSERT INTO medicine_expiry_summary(category_id, expiry_date, medicines, quantity)
+    SELECT category_id, expiry_date, COUNT(*), COALESCE(SUM(quantity), 0) FROM medicines
+    GROUP BY category_id, expiry_date;
+    """,
+    # Lot-level stock (mirrors sql/005_medicine_lots.sql). medicines keeps the roll-up: quantity moves
+    # by each lot's delta, expiry_date follows the earliest lot still in stock.
+    f"""
+    CREATE TABLE IF NOT EXISTS medicine_lots (
+        id INTEGER PRIMARY KEY,
+        medicine_id INTEGER NOT NULL REFERENCES medicines(id) ON DELETE CASCADE,
+        expiry_date TEXT NOT NULL,
+        quantity INTEGER NOT NULL CHECK (quantity >= 0),
+        received_at TEXT NOT NULL DEFAULT ({NOW})
+    );
+    CREATE INDEX IF NOT EXISTS medicine_lots_fefo_idx ON medicine_lots(medicine_id, expiry_date, id) WHERE quantity > 0;
+    CREATE INDEX IF NOT EXISTS medicine_lots_expiry_idx ON medicine_lots(expiry_date) WHERE quantity > 0;
+    INSERT INTO medicine_lots(medicine_id, expiry_date, quantity)
+    SELECT id, expiry_date, quantity FROM medicines WHERE quantity > 0;
+    CREATE TRIGGER IF NOT EXISTS medicine_lots_insert AFTER INSERT ON medicine_lots BEGIN
+        UPDATE medicines SET quantity = quantity + NEW.quantity,
+            expiry_date = COALESCE((SELECT MIN(expiry_date) FROM medicine_lots
+                                    WHERE medicine_id = NEW.medicine_id AND quantity > 0), expiry_date)
+        WHERE id = NEW.medicine_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS medicine_lots_update AFTER UPDATE OF quantity ON medicine_lots BEGIN
+        UPDATE medicines SET quantity = quantity + NEW.quantity - OLD.quantity,
+            expiry_date = COALESCE((SELECT MIN(expiry_date) FROM medicine_lots
+                                    WHERE medicine_id = NEW.medicine_id AND quantity > 0), expiry_date)
+        WHERE id = NEW.medicine_id;
+    END;
+    """,
+    # Alert schedule (mirrors sql/006_alert_schedule.sql): one alert per (medicine_id, alert_date),
+    # duplicates collapsed onto the oldest row (Sent if any copy was sent), per-category lead times
+    """
+    UPDATE alerts SET status = 'Sent'
+    WHERE id IN (SELECT MIN(id) FROM alerts GROUP BY medicine_id, alert_date
+                 HAVING COUNT(*) > 1 AND MAX(status = 'Sent') = 1);
+    DELETE FROM alerts
+    WHERE id NOT IN (SELECT MIN(id) FROM alerts GROUP BY medicine_id, alert_date);
+    CREATE UNIQUE INDEX IF NOT EXISTS alerts_medicine_date_key ON alerts(medicine_id, alert_date);
+    CREATE TABLE IF NOT EXISTS alert_lead_times (
+        category_id INTEGER NOT NULL REFERENCES categories(id) ON DELETE CASCADE,
+        lead_days INTEGER NOT NULL CHECK (lead_days >= 0),
+        PRIMARY KEY (category_id, lead_days)
+    );
+    """,
+    # Medicine search (see sql/007_medicine_search.sql); SQLite has no trigram index, so name
+    # terms are matched while walking the name-ordered indexes until the page is full
+    """
+    CREATE INDEX IF NOT EXISTS medicines_category_name_idx ON medicines(category_id, name, id);
+    """,
+    # Locations (mirrors sql/008_locations.sql). SQLite cannot add a REFERENCES column with a
+    # non-null default, so location_id is checked by the DAOs rather than a foreign key; alerts
+    # get their medicine's location from the INSERTs in SQLiteAlertDAO.
+    f"""
+    CREATE TABLE IF NOT EXISTS locations (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        created_at TEXT NOT NULL DEFAULT ({NOW})
+    );
+    INSERT OR IGNORE INTO locations(id, name) VALUES ({DEFAULT_LOCATION_ID}, '{DEFAULT_LOCATION_NAME}');
+    ALTER TABLE medicines ADD COLUMN location_id INTEGER NOT NULL DEFAULT {DEFAULT_LOCATION_ID};
+    DROP INDEX IF EXISTS medicines_name_category_idx;
+    CREATE UNIQUE INDEX IF NOT EXISTS medicines_location_name_category_idx ON medicines(location_id, name, category_id);
+    CREATE INDEX IF NOT EXISTS medicines_location_expiry_idx ON medicines(location_id, expiry_date);
+    CREATE INDEX IF NOT EXISTS medicines_location_category_name_idx ON medicines(location_id, category_id, name, id);
+    ALTER TABLE alerts ADD COLUMN location_id INTEGER NOT NULL DEFAULT {DEFAULT_LOCATION_ID};
+    CREATE INDEX IF NOT EXISTS alerts_location_status_date_idx ON alerts(location_id, status, alert_date);
+    DROP TRIGGER IF EXISTS medicines_summary_insert;
+    DROP TRIGGER IF EXISTS medicines_summary_delete;
+    DROP TRIGGER IF EXISTS medicines_summary_update;
+    DROP TABLE IF EXISTS medicine_expiry_summary;
+    CREATE TABLE medicine_expiry_summary (
+        location_id INTEGER NOT NULL,
+        category_id INTEGER NOT NULL,
+        expiry_date TEXT NOT NULL,
+        medicines INTEGER NOT NULL DEFAULT 0,
+        quantity INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (location_id, category_id, expiry_date)
+    );
+    CREATE TRIGGER medicines_summary_insert AFTER INSERT ON medicines BEGIN
+        INSERT INTO medicine_expiry_summary(location_id, category_id, expiry_date, medicines, quantity)
+        VALUES (NEW.location_id, NEW.category_id, NEW.expiry_date, 1, NEW.quantity)
+        ON CONFLICT(location_id, category_id, expiry_date) DO UPDATE SET
+            medicines = medicines + excluded.medicines, quantity = quantity + excluded.quantity;
+    END;
+    CREATE TRIGGER medicines_summary_delete AFTER DELETE ON medicines BEGIN
+        INSERT INTO medicine_expiry_summary(location_id, category_id, expiry_date, medicines, quantity)
+        VALUES (OLD.location_id, OLD.category_id, OLD.expiry_date, -1, -OLD.quantity)
+        ON CONFLICT(location_id, category_id, expiry_date) DO UPDATE SET
+            medicines = medicines + excluded.medicines, quantity = quantity + excluded.quantity;
+    END;
+    CREATE TRIGGER medicines_summary_update
+    AFTER UPDATE OF location_id, category_id, expiry_date, quantity ON medicines BEGIN
+        INSERT INTO medicine_expiry_summary(location_id, category_id, expiry_date, medicines, quantity)
+        VALUES (OLD.location_id, OLD.category_id, OLD.expiry_date, -1, -OLD.quantity)
+        ON CONFLICT(location_id, category_id, expiry_date) DO UPDATE SET
+            medicines = medicines + excluded.medicines, quantity = quantity + excluded.quantity;
+        INSERT INTO medicine_expiry_summary(location_id, category_id, expiry_date, medicines, quantity)
+        VALUES (NEW.location_id, NEW.category_id, NEW.expiry_date, 1, NEW.quantity)
+        ON CONFLICT(location_id, category_id, expiry_date) DO UPDATE SET
+            medicines = medicines + excluded.medicines, quantity = quantity + excluded.quantity;
+    END;
+    INSERT INTO medicine_expiry_summary(location_id, category_id, expiry_date, medicines, quantity)
+    SELECT location_id, category_id, expiry_date, COUNT(*), COALESCE(SUM(quantity), 0) FROM medicines
+    GROUP BY location_id, category_id, expiry_date;
+    """,
+    # Expiry summary quantities from lots (mirrors sql/009_lot_expiry_summary.sql). A medicine is still
+    # counted once, at its roll-up expiry_date; its units are counted at each lot's own expiry_date.
+    """
+    DROP TRIGGER IF EXISTS medicines_summary_insert;
+    DROP TRIGGER IF EXISTS medicines_summary_delete;
+    DROP TRIGGER IF EXISTS medicines_summary_update;
+    CREATE TRIGGER medicines_summary_insert AFTER INSERT ON medicines BEGIN
+        INSERT INTO medicine_expiry_summary(location_id, category_id, expiry_date, medicines, quantity)
+        VALUES (NEW.location_id, NEW.category_id, NEW.expiry_date, 1, 0)
+        ON CONFLICT(location_id, category_id, expiry_date) DO UPDATE SET medicines = medicines + excluded.medicines;
+    END;
+    CREATE TRIGGER medicines_summary_delete AFTER DELETE ON medicines BEGIN
+        INSERT INTO medicine_expiry_summary(location_id, category_id, expiry_date, medicines, quantity)
+        VALUES (OLD.location_id, OLD.category_id, OLD.expiry_date, -1, 0)
+        ON CONFLICT(location_id, category_id, expiry_date) DO UPDATE SET medicines = medicines + excluded.medicines;
+    END;
+    CREATE TRIGGER medicines_summary_update
+    AFTER UPDATE OF location_id, category_id, expiry_date ON medicines BEGIN
+        INSERT INTO medicine_expiry_summary(location_id, category_id, expiry_date, medicines, quantity)
+        VALUES (OLD.location_id, OLD.category_id, OLD.expiry_date, -1, 0)
+        ON CONFLICT(location_id, category_id, expiry_date) DO UPDATE SET medicines = medicines + excluded.medicines;
+        INSERT INTO medicine_expiry_summary(location_id, category_id, expiry_date, medicines, quantity)
+        VALUES (NEW.location_id, NEW.category_id, NEW.expiry_date, 1, 0)
+        ON CONFLICT(location_id, category_id, expiry_date) DO UPDATE SET medicines = medicines + excluded.medicines;
+    END;
+    CREATE TRIGGER medicine_lots_summary_insert AFTER INSERT ON medicine_lots BEGIN
+        INSERT INTO medicine_expiry_summary(location_id, category_id, expiry_date, medicines, quantity)
+        SELECT location_id, category_id, NEW.expiry_date, 0, NEW.quantity FROM medicines WHERE id = NEW.medicine_id
+        ON CONFLICT(location_id, category_id, expiry_date) DO UPDATE SET quantity = quantity + excluded.quantity;
+    END;
+    CREATE TRIGGER medicine_lots_summary_update AFTER UPDATE OF expiry_date, quantity ON medicine_lots BEGIN
+        INSERT INTO medicine_expiry_summary(location_id, category_id, expiry_date, medicines, quantity)
+        SELECT location_id, category_id, OLD.expiry_date, 0, -OLD.quantity FROM medicines WHERE id = OLD.medicine_id
+        ON CONFLICT(location_id, category_id, expiry_date) DO UPDATE SET quantity = quantity + excluded.quantity;
+        INSERT INTO medicine_expiry_summary(location_id, category_id, expiry_date, medicines, quantity)
+        SELECT location_id, category_id, NEW.expiry_date, 0, NEW.quantity FROM medicines WHERE id = NEW.medicine_id
+        ON CONFLICT(location_id, category_id, expiry_date) DO UPDATE SET quantity = quantity + excluded.quantity;
+    END;
+    DELETE FROM medicine_expiry_summary;
+    INSERT INTO medicine_expiry_summary(location_id, category_id, expiry_date, medicines, quantity)
+    SELECT location_id, category_id, expiry_date, COUNT(*), 0 FROM medicines
+    GROUP BY location_id, category_id, expiry_date;
+    INSERT INTO medicine_expiry_summary(location_id, category_id, expiry_date, medicines, quantity)
+    SELECT m.location_id, m.category_id, l.expiry_date, 0, SUM(l.quantity)
+    FROM medicine_lots l JOIN medicines m ON m.id = l.medicine_id
+    GROUP BY m.location_id, m.category_id, l.expiry_date
+    ON CONFLICT(location_id, category_id, expiry_date) DO UPDATE SET quantity = quantity + excluded.quantity;
+    """,
+    # Journal ids are half of the op ids the remote dedupes pushes by (src/sync/engine.py), so they
+    # must never be reused once acknowledged entries are deleted: AUTOINCREMENT
+    """
+    CREATE TABLE sync_journal_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        op TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+    INSERT INTO sync_journal_new(id, op, payload, created_at) SELECT id, op, payload, created_at FROM sync_journal;
+    DROP TABLE sync_journal;
+    ALTER TABLE sync_journal_new RENAME TO sync_journal;
+    """,
+    # Deleted lots leave the expiry summary (mirrors sql/013_lot_summary_delete.sql). Deleting a
+    # medicine cascades to its lots after the medicine row is gone, so the medicine's BEFORE DELETE
+    # trigger takes its lots' units off and the lot trigger only handles lots deleted on their own.
+    """
+    CREATE TRIGGER medicines_lots_summary_delete BEFORE DELETE ON medicines BEGIN
+        INSERT INTO medicine_expiry_summary(location_id, category_id, expiry_date, medicines, quantity)
+        SELECT OLD.location_id, OLD.category_id, expiry_date, 0, -SUM(quantity) FROM medicine_lots
+        WHERE medicine_id = OLD.id GROUP BY expiry_date
+        ON CONFLICT(location_id, category_id, expiry_date) DO UPDATE SET quantity = quantity + excluded.quantity;
+    END;
+    CREATE TRIGGER medicine_lots_summary_delete AFTER DELETE ON medicine_lots BEGIN
+        INSERT INTO medicine_expiry_summary(location_id, category_id, expiry_date, medicines, quantity)
+        SELECT location_id, category_id, OLD.expiry_date, 0, -OLD.quantity FROM medicines WHERE id = OLD.medicine_id
+        ON CONFLICT(location_id, category_id, expiry_date) DO UPDATE SET quantity = quantity + excluded.quantity;
+    END;
+    """,
+]
+
+MAX_VARIABLES = 900  # stay under SQLITE_MAX_VARIABLE_NUMBER on older builds
+
+
+def _chunks(values: List, size: int = MAX_VARIABLES) -> Iterator[List]:
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _placeholders(n: int) -> str:
+    return ",".join("?" * n)
+
+
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+(\w+)", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=512)
+def statement_name(sql: str) -> str:
+    # "medicines.select", "medicine_lots.update", ... to match the Supabase query names
+    words = sql.split(None, 1)
+    operation = words[0].lower() if words else "?"
+    table = _TABLE.search(sql)
+    return f"{table.group(1)}.{operation}" if table else operation
+
+
+class _BufferedCursor:
+    # What an instrumented execute() returns: the rows were already fetched inside the timer
+    def __init__(self, cursor: sqlite3.Cursor, rows: List):
+        self.rows = rows
+        self.rowcount = cursor.rowcount
+        self.lastrowid = cursor.lastrowid
+        self.description = cursor.description
+        self._pos = 0
+
+    def fetchone(self):
+        if self._pos >= len(self.rows):
+            return None
+        self._pos += 1
+        return self.rows[self._pos - 1]
+
+    def fetchmany(self, size: int = 1) -> List:
+        rows = self.rows[self._pos:self._pos + size]
+        self._pos += len(rows)
+        return rows
+
+    def fetchall(self) -> List:
+        rows = self.rows[self._pos:]
+        self._pos = len(self.rows)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    # Every statement, including the conn.execute() calls in src/sync, is timed when the recorder is on
+    @pass_through
+    def execute(self, sql, parameters=()):
+        if not recorder.enabled:
+            return super().execute(sql, parameters)
+        with recorder.call("query", statement_name(sql), sent_bytes=payload_bytes(list(parameters))) as call:
+            cursor = super().execute(sql, parameters)
+            rows = cursor.fetchall() if cursor.description else []
+            buffered = _BufferedCursor(cursor, rows)
+            call.rows = len(rows) if cursor.description else max(cursor.rowcount, 0)
+            call.received_bytes = payload_bytes([tuple(r) for r in rows])
+        return buffered
+
+    @pass_through
+    def executemany(self, sql, seq_of_parameters):
+        if not recorder.enabled:
+            return super().executemany(sql, seq_of_parameters)
+        seq_of_parameters = list(seq_of_parameters)
+        with recorder.call("query", statement_name(sql), sent_bytes=payload_bytes(seq_of_parameters)) as call:
+            cursor = super().executemany(sql, seq_of_parameters)
+            call.rows = max(cursor.rowcount, 0)
+        return cursor
+
+
+class SQLiteStore:
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, cached_statements=256,
+                                    factory=InstrumentedConnection)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock:
+            if path != ":memory:":
+                self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA foreign_keys=ON")
+            self._migrate()
+
+    def _migrate(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        for i, script in enumerate(MIGRATIONS[version:], start=version + 1):
+            self.conn.executescript(script)
+            self.conn.execute(f"PRAGMA user_version = {i}")
+        self.conn.commit()
+
+    @pass_through
+    def query(self, sql: str, params: Iterable = ()) -> List[Dict]:
+        with self.lock:
+            return [dict(r) for r in self.conn.execute(sql, tuple(params)).fetchall()]
+
+    @pass_through
+    def query_one(self, sql: str, params: Iterable = ()) -> Optional[Dict]:
+        with self.lock:
+            row = self.conn.execute(sql, tuple(params)).fetchone()
+            return dict(row) if row else None
+
+    @pass_through
+    def write(self, sql: str, params: Iterable = ()) -> List[Dict]:
+        # Single statement in its own transaction; RETURNING rows come back in the same call
+        with self.lock, self.conn:
+            return [dict(r) for r in self.conn.execute(sql, tuple(params)).fetchall()]
+
+    @pass_through
+    def write_many(self, sql: str, rows: Iterable[Iterable]) -> int:
+        with self.lock, self.conn:
+            return self.conn.executemany(sql, [tuple(r) for r in rows]).rowcount
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_stores: Dict[str, SQLiteStore] = {}
+_stores_lock = threading.Lock()
+
+def get_store(path: str = SQLITE_PATH) -> SQLiteStore:
+    # One store (connection) per database file per process
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = SQLiteStore(path)
+        return _stores[path]
+
+
+class _SQLiteDAO:
+    TABLE = ""
+    COLUMNS: tuple = ()
+
+    def __init__(self, store: Optional[SQLiteStore] = None, location_id: Optional[int] = None):
+        self._store = store
+        self.location_id = location_id
+
+    @property
+    def store(self) -> SQLiteStore:
+        if self._store is None:
+            self._store = get_store()
+        return self._store
+
+    def _select_list(self, columns: str) -> str:
+        # Same comma-separated projection strings the Supabase DAOs accept, checked against the schema
+        if columns.strip() == "*":
+            return "*"
+        cols = [c.strip() for c in columns.split(",") if c.strip()]
+        unknown = [c for c in cols if c not in self.COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown {self.TABLE} columns: {unknown}")
+        return ",".join(cols)
+
+    def _in_location(self, column: str = "location_id") -> Tuple[str, tuple]:
+        # " AND <column> = ?" and its parameter for a location-scoped DAO; nothing otherwise, so each
+        # statement has exactly two constant forms for the statement cache
+        if self.location_id is None:
+            return "", ()
+        return f" AND {column} = ?", (self.location_id,)
+
+
+class SQLiteLocationDAO(_SQLiteDAO, LocationRepository):
+    TABLE = "locations"
+    COLUMNS = ("id", "name", "created_at")
+
+    def create_location(self, name: str) -> Optional[Dict]:
+        rows = self.store.write(
+            "INSERT INTO locations(name) VALUES (?) "
+            "ON CONFLICT(name) DO UPDATE SET name = excluded.name RETURNING *", (name,))
+        return rows[0] if rows else None
+
+    def create_locations(self, names: List[str]) -> List[Dict]:
+        if not names:
+            return []
+        self.store.write_many("INSERT INTO locations(name) VALUES (?) ON CONFLICT(name) DO NOTHING",
+                              ((n,) for n in names))
+        out = []
+        for chunk in _chunks(list(names)):
+            out.extend(self.store.query(f"SELECT * FROM locations WHERE name IN ({_placeholders(len(chunk))})", chunk))
+        return out
+
+    def get_location_by_name(self, name: str) -> Optional[Dict]:
+        return self.store.query_one("SELECT * FROM locations WHERE name = ?", (name,))
+
+    def iter_locations(self, page_size: Optional[int] = None, after_id: Optional[int] = None) -> Iterator[Dict]:
+        return iter_pages(lambda cursor, limit: self.store.query(
+            "SELECT * FROM locations WHERE id > ? ORDER BY id LIMIT ?", (cursor or 0, limit)), page_size, after_id)
+
+
+class SQLiteCategoryDAO(_SQLiteDAO, CategoryRepository):
+    TABLE = "categories"
+    COLUMNS = ("id", "name", "created_at")
+
+    def create_category(self, name: str) -> Optional[Dict]:
+        rows = self.store.write(
+            "INSERT INTO categories(name) VALUES (?) "
+            "ON CONFLICT(name) DO UPDATE SET name = excluded.name RETURNING *", (name,))
+        return rows[0] if rows else None
+
+    def create_categories(self, names: List[str]) -> List[Dict]:
+        if not names:
+            return []
+        self.store.write_many("INSERT INTO categories(name) VALUES (?) ON CONFLICT(name) DO NOTHING",
+                              ((n,) for n in names))
+        return self.get_categories_by_names(names)
+
+    def get_category_by_name(self, name: str) -> Optional[Dict]:
+        return self.store.query_one("SELECT * FROM categories WHERE name = ?", (name,))
+
+    def get_categories_by_names(self, names: List[str]) -> List[Dict]:
+        out = []
+        for chunk in _chunks(list(names)):
+            out.extend(self.store.query(f"SELECT * FROM categories WHERE name IN ({_placeholders(len(chunk))})", chunk))
+        return out
+
+    def page_categories(self, after_id: Optional[int] = None, limit: int = PAGE_SIZE) -> List[Dict]:
+        return self.store.query("SELECT * FROM categories WHERE id > ? ORDER BY id LIMIT ?", (after_id or 0, limit))
+
+    def iter_categories(self, page_size: Optional[int] = None, after_id: Optional[int] = None) -> Iterator[Dict]:
+        return iter_pages(self.page_categories, page_size, after_id)
+
+
+class SQLiteMedicineDAO(_SQLiteDAO, MedicineRepository):
+    TABLE = "medicines"
+    COLUMNS = ("id", "name", "expiry_date", "category_id", "location_id", "quantity", "created_at")
+
+    # Upsert only resolves the medicine id; the lot insert moves quantity/expiry_date via the roll-up trigger
+    MEDICINE_SQL = (
+        "INSERT INTO medicines(name, expiry_date, category_id, location_id, quantity) VALUES (?, ?, ?, ?, 0) "
+        "ON CONFLICT(location_id, name, category_id) DO UPDATE SET name = excluded.name RETURNING id"
+    )
+    LOT_SQL = "INSERT INTO medicine_lots(medicine_id, expiry_date, quantity) VALUES (?, ?, ?)"
+
+    def _location_for(self, item_location_id: Optional[int] = None) -> int:
+        # Where a write lands: the DAO's location, else the item's own, else the default location
+        if self.location_id is not None:
+            return self.location_id
+        return item_location_id if item_location_id is not None else DEFAULT_LOCATION_ID
+
+    def _add_stock(self, conn, name: str, expiry_date: str, category_id: int, quantity: int,
+                   location_id: Optional[int] = None) -> Dict:
+        med_id = conn.execute(self.MEDICINE_SQL,
+                              (name, expiry_date, category_id, self._location_for(location_id))).fetchone()["id"]
+        conn.execute(self.LOT_SQL, (med_id, expiry_date, quantity))
+        return dict(conn.execute("SELECT * FROM medicines WHERE id = ?", (med_id,)).fetchone())
+
+    def add_medicine(self, name: str, expiry_date: str, category_id: int, quantity: int = 1) -> Dict:
+        with self.store.lock, self.store.conn:
+            return self._add_stock(self.store.conn, name, expiry_date, category_id, quantity)
+
+    def add_medicines_bulk(self, items: List[Dict]) -> List[Dict]:
+        # One transaction for the batch; same prepared statements for every row
+        with self.store.lock, self.store.conn:
+            return [self._add_stock(self.store.conn, i["name"], i["expiry_date"], i["category_id"],
+                                    int(i.get("quantity", 1)), i.get("location_id")) for i in items]
+
+    def page_medicines(self, after_id: Optional[int] = None, limit: int = PAGE_SIZE, columns: str = "*") -> List[Dict]:
+        scope, scope_params = self._in_location()
+        return self.store.query(
+            f"SELECT {self._select_list(columns)} FROM medicines WHERE id > ?{scope} ORDER BY id LIMIT ?",
+            (after_id or 0, *scope_params, limit))
+
+    def iter_medicines(self, page_size: Optional[int] = None, columns: str = "*") -> Iterator[Dict]:
+        return iter_pages(lambda cursor, limit: self.page_medicines(cursor, limit, columns), page_size)
+
+    def get_medicine_by_id(self, med_id: int) -> Optional[Dict]:
+        return self.store.query_one("SELECT * FROM medicines WHERE id = ?", (med_id,))
+
+    def get_medicines_by_ids(self, med_ids: List[int], columns: str = MEDICINE_COLUMNS) -> List[Dict]:
+        out = []
+        cols = self._select_list(columns)
+        for chunk in _chunks(list(med_ids)):
+            out.extend(self.store.query(f"SELECT {cols} FROM medicines WHERE id IN ({_placeholders(len(chunk))})", chunk))
+        return out
+
+    def list_expiring_between(self, start: str, end: str, columns: str = MEDICINE_COLUMNS) -> List[Dict]:
+        scope, scope_params = self._in_location()
+        return self.store.query(
+            f"SELECT {self._select_list(columns)} FROM medicines "
+            f"WHERE expiry_date >= ? AND expiry_date <= ?{scope} ORDER BY expiry_date", (start, end, *scope_params))
+
+    def list_expired(self, as_of: str, columns: str = MEDICINE_COLUMNS, in_stock: bool = False) -> List[Dict]:
+        scope, scope_params = self._in_location()
+        sql = f"SELECT {self._select_list(columns)} FROM medicines WHERE expiry_date < ?{scope}"
+        if in_stock:
+            sql += " AND quantity > 0"
+        return self.store.query(sql + " ORDER BY expiry_date", (as_of, *scope_params))
+
+    def search_medicines(self, terms: List[str], category_id: Optional[int] = None, start: Optional[str] = None,
+                         end: Optional[str] = None, limit: int = 50, offset: int = 0,
+                         columns: str = MEDICINE_COLUMNS) -> List[Dict]:
+        where, params = [], []
+        for term in terms:
+            # LIKE is case-insensitive for ASCII in SQLite
+            where.append("(name LIKE ? OR name LIKE ?)")
+            params += [f"{term}%", f"% {term}%"]
+        for sql, value in (("location_id = ?", self.location_id), ("category_id = ?", category_id),
+                           ("expiry_date >= ?", start), ("expiry_date <= ?", end)):
+            if value is not None:
+                where.append(sql)
+                params.append(value)
+        return self.store.query(
+            f"SELECT {self._select_list(columns)} FROM medicines WHERE {' AND '.join(where) or '1'} "
+            "ORDER BY name, id LIMIT ? OFFSET ?", (*params, limit, offset))
+
+    def _expire(self, conn, as_of: str) -> int:
+        scope, scope_params = self._in_location()
+        lot_scope = " AND medicine_id IN (SELECT id FROM medicines WHERE location_id = ?)" if scope else ""
+        expired = conn.execute("SELECT COUNT(DISTINCT medicine_id) AS n FROM medicine_lots "
+                               f"WHERE expiry_date < ? AND quantity > 0{lot_scope}", (as_of, *scope_params)).fetchone()["n"]
+        conn.execute(f"UPDATE medicine_lots SET quantity = 0 WHERE expiry_date < ? AND quantity > 0{lot_scope}",
+                     (as_of, *scope_params))
+        # Rows with no lots behind them (stock pulled from Supabase by src/sync) are zeroed directly
+        expired += conn.execute(
+            f"UPDATE medicines SET quantity = 0 WHERE expiry_date < ? AND quantity > 0{scope} AND NOT EXISTS "
+            "(SELECT 1 FROM medicine_lots l WHERE l.medicine_id = medicines.id AND l.quantity > 0)",
+            (as_of, *scope_params)).rowcount
+        return expired
+
+    def expire_before(self, as_of: str) -> int:
+        # Empties expired lots; unexpired lots of the same medicine keep their stock
+        with self.store.lock, self.store.conn:
+            return self._expire(self.store.conn, as_of)
+
+    def page_lots(self, after_id: Optional[int] = None, limit: int = PAGE_SIZE, name: Optional[str] = None) -> List[Dict]:
+        sql = ("SELECT l.*, m.name AS name, m.category_id AS category_id, m.location_id AS location_id "
+               "FROM medicine_lots l "
+               "JOIN medicines m ON m.id = l.medicine_id WHERE l.quantity > 0 AND l.id > ?")
+        params: List = [after_id or 0]
+        if name is not None:
+            sql += " AND m.name = ?"
+            params.append(name)
+        scope, scope_params = self._in_location("m.location_id")
+        sql += scope
+        params.extend(scope_params)
+        return self.store.query(sql + " ORDER BY l.id LIMIT ?", params + [limit])
+
+    def iter_lots(self, name: Optional[str] = None, page_size: Optional[int] = None) -> Iterator[Dict]:
+        return iter_pages(lambda cursor, limit: self.page_lots(cursor, limit, name), page_size)
+
+    def _take_lots(self, conn, takes: List[Dict]) -> List[Dict]:
+        out = []
+        for t in takes:
+            if t["quantity"] < 1:
+                raise ValueError(f"take from lot {t['lot_id']} must be at least 1 unit, got {t['quantity']}")
+            row = conn.execute("UPDATE medicine_lots SET quantity = quantity - ? WHERE id = ? AND quantity >= ? "
+                               "RETURNING *", (t["quantity"], t["lot_id"], t["quantity"])).fetchone()
+            if row is None:
+                raise StockConflict(f"lot {t['lot_id']} has less than {t['quantity']} units left")
+            out.append(dict(row))
+        return out
+
+    def take_lots(self, takes: List[Dict]) -> List[Dict]:
+        # All or nothing: the transaction rolls back if any lot is short
+        with self.store.lock, self.store.conn:
+            return self._take_lots(self.store.conn, takes)
+
+    def count_medicines(self, start: Optional[str] = None, end: Optional[str] = None,
+                        before: Optional[str] = None) -> int:
+        clauses, params = [], []
+        if self.location_id is not None:
+            clauses.append("location_id = ?")
+            params.append(self.location_id)
+        if start:
+            clauses.append("expiry_date >= ?")
+            params.append(start)
+        if end:
+            clauses.append("expiry_date <= ?")
+            params.append(end)
+        if before:
+            clauses.append("expiry_date < ?")
+            params.append(before)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return self.store.query_one(f"SELECT COUNT(*) AS n FROM medicines{where}", params)["n"]
+
+    def expiry_summary(self, as_of: str, window_end: str) -> List[Dict]:
+        # Reads the trigger-maintained summary table, never the medicines rows
+        scope, scope_params = self._in_location("s.location_id")
+        return self.store.query(
+            "SELECT c.id AS category_id, c.name AS category_name, "
+            "CASE WHEN s.expiry_date IS NULL THEN NULL WHEN s.expiry_date < ? THEN 'Expired' "
+            "WHEN s.expiry_date <= ? THEN 'Expiring Soon' ELSE 'Safe' END AS status, "
+            "COALESCE(SUM(s.medicines), 0) AS medicines, COALESCE(SUM(s.quantity), 0) AS quantity "
+            "FROM categories c LEFT JOIN medicine_expiry_summary s ON s.category_id = c.id "
+            f"AND (s.medicines > 0 OR s.quantity > 0){scope} "
+            "GROUP BY c.id, status ORDER BY c.id",
+            (as_of, window_end, *scope_params))
+
+    def location_summary(self, as_of: str, window_end: str) -> List[Dict]:
+        # Every location in one pass over the summary table (its primary key leads with location_id)
+        return self.store.query(
+            "SELECT l.id AS location_id, l.name AS location_name, "
+            "CASE WHEN s.expiry_date IS NULL THEN NULL WHEN s.expiry_date < ? THEN 'Expired' "
+            "WHEN s.expiry_date <= ? THEN 'Expiring Soon' ELSE 'Safe' END AS status, "
+            "COALESCE(SUM(s.medicines), 0) AS medicines, COALESCE(SUM(s.quantity), 0) AS quantity "
+            "FROM locations l LEFT JOIN medicine_expiry_summary s ON s.location_id = l.id "
+            "AND (s.medicines > 0 OR s.quantity > 0) "
+            "GROUP BY l.id, status ORDER BY l.id",
+            (as_of, window_end))
+
+
+class SQLiteAlertDAO(_SQLiteDAO, AlertRepository):
+    TABLE = "alerts"
+    COLUMNS = ("id", "medicine_id", "alert_date", "status", "location_id", "created_at")
+
+    # Idempotent on (medicine_id, alert_date); an existing alert (Pending or Sent) is left alone.
+    # location_id is copied from the medicine. Parameters: medicine_id, alert_date, status, medicine_id.
+    ADD_SQL = ("INSERT INTO alerts(medicine_id, alert_date, status, location_id) "
+               "VALUES (?, ?, ?, (SELECT location_id FROM medicines WHERE id = ?)) "
+               "ON CONFLICT(medicine_id, alert_date) DO NOTHING")
+
+    # Every (medicine, alert_date) the lead-time schedule wants from in-stock lots; "due" rows are
+    # created, the rest only protect existing pending alerts from pruning (see regenerate_alerts)
+    WANTED_SQL = """
+        WITH defaults(lead_days) AS (VALUES {defaults}),
+        leads AS (
+            SELECT category_id, lead_days FROM alert_lead_times
+            UNION ALL
+            SELECT c.id, d.lead_days FROM categories c CROSS JOIN defaults d
+            WHERE NOT EXISTS (SELECT 1 FROM alert_lead_times t WHERE t.category_id = c.id)
+        ),
+        last_call AS (SELECT category_id, MIN(lead_days) AS lead_days FROM leads GROUP BY category_id)
+        INSERT INTO temp.wanted_alerts(medicine_id, alert_date, due)
+        SELECT l.medicine_id, date(l.expiry_date, '-' || s.lead_days || ' days') AS alert_date,
+               MAX(date(l.expiry_date, '-' || s.lead_days || ' days') >= ? OR s.lead_days = lc.lead_days)
+        FROM medicine_lots l
+        JOIN medicines m ON m.id = l.medicine_id
+        JOIN leads s ON s.category_id = m.category_id
+        JOIN last_call lc ON lc.category_id = m.category_id
+        WHERE l.quantity > 0{scope}
+        GROUP BY l.medicine_id, alert_date
+    """
+
+    def add_alert(self, medicine_id: int, alert_date: str, status: str = "Pending") -> Optional[Dict]:
+        rows = self.store.write(self.ADD_SQL + " RETURNING *", (medicine_id, alert_date, status, medicine_id))
+        return rows[0] if rows else None
+
+    def add_alerts(self, alerts: List[Dict]) -> int:
+        if not alerts:
+            return 0
+        return self.store.write_many(
+            self.ADD_SQL, ((a["medicine_id"], a["alert_date"], a.get("status", "Pending"), a["medicine_id"])
+                           for a in alerts))
+
+    def _page_pending(self, due_by: Optional[str], after_id: Optional[int], limit: int) -> List[Dict]:
+        scope, scope_params = self._in_location()
+        if due_by:
+            return self.store.query(
+                f"SELECT * FROM alerts WHERE status = 'Pending'{scope} AND alert_date <= ? AND id > ? ORDER BY id LIMIT ?",
+                (*scope_params, due_by, after_id or 0, limit))
+        return self.store.query(
+            f"SELECT * FROM alerts WHERE status = 'Pending'{scope} AND id > ? ORDER BY id LIMIT ?",
+            (*scope_params, after_id or 0, limit))
+
+    def page_pending_alerts(self, after_id: Optional[int] = None, limit: int = PAGE_SIZE) -> List[Dict]:
+        return self._page_pending(None, after_id, limit)
+
+    def iter_pending_alerts(self, due_by: Optional[str] = None, page_size: Optional[int] = None,
+                            after_id: Optional[int] = None) -> Iterator[Dict]:
+        return iter_pages(lambda cursor, limit: self._page_pending(due_by, cursor, limit), page_size, after_id)
+
+    def update_alert_status(self, alert_id: int, status: str):
+        self.store.write("UPDATE alerts SET status = ? WHERE id = ?", (status, alert_id))
+
+    def update_status_bulk(self, alert_ids: List[int], status: str) -> int:
+        updated = 0
+        with self.store.lock, self.store.conn:
+            for chunk in _chunks(list(alert_ids)):
+                updated += self.store.conn.execute(
+                    f"UPDATE alerts SET status = ? WHERE id IN ({_placeholders(len(chunk))})",
+                    [status, *chunk]).rowcount
+        return updated
+
+    def claim_pending(self, alert_ids: List[int], status: str) -> List[int]:
+        claimed: List[int] = []
+        with self.store.lock, self.store.conn:
+            for chunk in _chunks(list(alert_ids)):
+                claimed.extend(row[0] for row in self.store.conn.execute(
+                    f"UPDATE alerts SET status = ? WHERE status = 'Pending' AND id IN ({_placeholders(len(chunk))})"
+                    " RETURNING id", [status, *chunk]).fetchall())
+        return claimed
+
+    def get_lead_times(self) -> Dict[int, List[int]]:
+        lead_times: Dict[int, List[int]] = {}
+        for row in self.store.query(
+                "SELECT category_id, lead_days FROM alert_lead_times ORDER BY category_id, lead_days DESC"):
+            lead_times.setdefault(row["category_id"], []).append(row["lead_days"])
+        return lead_times
+
+    def set_lead_times(self, category_id: int, lead_days: List[int]):
+        with self.store.lock, self.store.conn:
+            self.store.conn.execute("DELETE FROM alert_lead_times WHERE category_id = ?", (category_id,))
+            self.store.conn.executemany("INSERT INTO alert_lead_times(category_id, lead_days) VALUES (?, ?)",
+                                        [(category_id, d) for d in sorted(set(lead_days), reverse=True)])
+
+    def _regenerate(self, conn, as_of: str, default_lead_days: List[int]) -> Tuple[List[Dict], int]:
+        # Three set-based statements, as in sql/006_alert_schedule.sql; returns (inserted rows, removed)
+        if not default_lead_days:
+            raise ValueError("default_lead_days must not be empty")
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted_alerts "
+                     "(medicine_id INTEGER, alert_date TEXT, due INTEGER, PRIMARY KEY (medicine_id, alert_date))")
+        conn.execute("DELETE FROM temp.wanted_alerts")
+        defaults = sorted(set(default_lead_days))
+        scope, scope_params = self._in_location("m.location_id")
+        conn.execute(self.WANTED_SQL.format(defaults=",".join(["(?)"] * len(defaults)), scope=scope),
+                     (*defaults, as_of, *scope_params))
+        inserted = [dict(r) for r in conn.execute(
+            "INSERT INTO alerts(medicine_id, alert_date, status, location_id) "
+            "SELECT w.medicine_id, w.alert_date, 'Pending', m.location_id FROM temp.wanted_alerts w "
+            "JOIN medicines m ON m.id = w.medicine_id WHERE w.due "
+            "ON CONFLICT(medicine_id, alert_date) DO NOTHING RETURNING *").fetchall()]
+        scope, scope_params = self._in_location()
+        removed = conn.execute(
+            f"DELETE FROM alerts WHERE status = 'Pending'{scope} AND NOT EXISTS (SELECT 1 FROM temp.wanted_alerts w "
+            "WHERE w.medicine_id = alerts.medicine_id AND w.alert_date = alerts.alert_date)", scope_params).rowcount
+        return inserted, removed
+
+    def regenerate_alerts(self, as_of: str, default_lead_days: List[int]) -> Dict:
+        with self.store.lock, self.store.conn:
+            inserted, removed = self._regenerate(self.store.conn, as_of, default_lead_days)
+        return {"inserted": len(inserted), "removed": removed}
@@ -0,0 +1,121 @@
+# src/dao/supabase_client.py
+# Pooled Supabase clients. Kept out of src/config so that reading a setting never pays for
+# importing supabase/httpx; only the Supabase DAOs (via src.config.get_supabase) load this.
+import threading
+from typing import Dict, Optional
+
+import httpx
+from supabase import create_client, acreate_client, AsyncClient, AsyncClientOptions, Client, ClientOptions
+from src.config import SUPABASE_URL, SUPABASE_KEY, SUPABASE_POOL_SIZE, SUPABASE_KEEPALIVE, SUPABASE_TIMEOUT
+
+
+class CountingTransport(httpx.HTTPTransport):
+    # Counts how many requests opened a new TCP/TLS connection vs reused a pooled one
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self._seen = set()
+        self.opened = 0
+        self.reused = 0
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = super().handle_request(request)
+        stream = response.extensions.get("network_stream")
+        with self._lock:
+            if stream is None or id(stream) not in self._seen:
+                self.opened += 1
+                if stream is not None:
+                    self._seen.add(id(stream))
+            else:
+                self.reused += 1
+        return response
+
+
+class ClientRegistry:
+    # Process-wide cache of Supabase clients, one per (url, key), all sharing a pooled HTTP session
+    def __init__(self, pool_size: int = SUPABASE_POOL_SIZE, keepalive: float = SUPABASE_KEEPALIVE,
+                 timeout: float = SUPABASE_TIMEOUT):
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._clients: Dict[tuple, Client] = {}
+        self._transport: Optional[CountingTransport] = None
+        self._http: Optional[httpx.Client] = None
+        self._async_clients: Dict[tuple, AsyncClient] = {}
+        self._async_http: Optional[httpx.AsyncClient] = None
+
+    def _http_client(self) -> httpx.Client:
+        if self._http is None:
+            limits = httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+                keepalive_expiry=self.keepalive,
+            )
+            self._transport = CountingTransport(limits=limits)
+            self._http = httpx.Client(transport=self._transport, timeout=self.timeout, follow_redirects=True)
+        return self._http
+
+    def get(self, url: str = None, key: str = None) -> Client:
+        url = url or SUPABASE_URL
+        key = key or SUPABASE_KEY
+        client = self._clients.get((url, key))
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get((url, key))
+            if client is None:
+                options = ClientOptions(httpx_client=self._http_client(), postgrest_client_timeout=self.timeout)
+                client = create_client(url, key, options=options)
+                self._clients[(url, key)] = client
+            return client
+
+    async def aget(self, url: str = None, key: str = None) -> AsyncClient:
+        # Async clients are bound to the event loop that created them; callers use one long-lived
+        # loop (src/services/async_runner.py), so one pooled httpx.AsyncClient serves them all
+        url = url or SUPABASE_URL
+        key = key or SUPABASE_KEY
+        client = self._async_clients.get((url, key))
+        if client is None:
+            if self._async_http is None:
+                limits = httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                    keepalive_expiry=self.keepalive,
+                )
+                self._async_http = httpx.AsyncClient(limits=limits, timeout=self.timeout, follow_redirects=True)
+            options = AsyncClientOptions(httpx_client=self._async_http, postgrest_client_timeout=self.timeout)
+            client = await acreate_client(url, key, options=options)
+            self._async_clients[(url, key)] = client
+        return client
+
+    def stats(self) -> Dict:
+        transport = self._transport
+        return {
+            "clients": len(self._clients),
+            "async_clients": len(self._async_clients),
+            "pool_size": self.pool_size,
+            "keepalive": self.keepalive,
+            "connections_opened": transport.opened if transport else 0,
+            "connections_reused": transport.reused if transport else 0,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._http is not None:
+                self._http.close()
+            self._clients.clear()
+            self._http = None
+            self._transport = None
+            # The async pool belongs to its event loop; aclose() it from there if the loop outlives this
+            self._async_clients.clear()
+            self._async_http = None
+
+    async def aclose(self):
+        if self._async_http is not None:
+            await self._async_http.aclose()
+        self._async_clients.clear()
+        self._async_http = None
+
+
+registry = ClientRegistry()
@@ -0,0 +1,15 @@
+from src.config import get_supabase
+from src.instrumentation import instrument_client, recorder
+
+class SupabaseDAO:
+    # Shared client handling of the Supabase DAOs (the async ones have _AsyncSupabaseDAO)
+    def __init__(self, client=None):
+        self._sb = client
+
+    @property
+    def sb(self):
+        # Resolved on first query so constructing a DAO never touches the network
+        if self._sb is None:
+            self._sb = get_supabase()
+        # Wrapped per access while instrumentation is on, so it can be switched on at runtime
+        return instrument_client(self._sb) if recorder.enabled else self._sb
@@ -0,0 +1,440 @@
+# src/instrumentation.py
+# Where a request's time goes. Every DAO query (Supabase/memory builder .execute(), SQLite
+# statements) and every public MedicineService/CategoryService method is recorded with its
+# latency, row count, payload bytes and call site. Totals export as Prometheus text; single
+# events go to a JSON-lines log (INSTRUMENTATION_LOG) and to the active Profile, which is how
+# `medicine-cli --profile` and the app's ?debug=1 panel count queries per request.
+# Off by default (INSTRUMENTATION=1 or recorder.enable() turns it on process-wide; a profile
+# begun with enable=True turns it on for its own context only); when off each hook is a flag check.
+import contextvars
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Histogram upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# A call site executed at least this many times in one request is reported as repeated (N+1)
+REPEATED_CALLS = 5
+# Builder methods that send a payload, and the operation they make the query
+WRITE_METHODS = {"insert": "insert", "upsert": "upsert", "update": "update"}
+OPERATIONS = ("select", "insert", "upsert", "update", "delete")
+
+# Frames skipped when looking for the call site: this module and the shared paging helpers
+_PASS_THROUGH_FILES = {__file__, os.path.join(os.path.dirname(__file__), "dao", "paging.py")}
+_PASS_THROUGH_CODES = set()
+
+_spans: contextvars.ContextVar = contextvars.ContextVar("instrumentation_spans", default=())
+_profile: contextvars.ContextVar = contextvars.ContextVar("instrumentation_profile", default=None)
+_enabled: contextvars.ContextVar = contextvars.ContextVar("instrumentation_enabled", default=False)
+
+
+def pass_through(func: Callable) -> Callable:
+    # Marks a helper (e.g. SQLiteStore.query) so call sites point at whoever called it
+    _PASS_THROUGH_CODES.add(func.__code__)
+    return func
+
+
+def call_site(depth: int = 2) -> str:
+    frame = sys._getframe(depth)
+    while frame is not None and (frame.f_code.co_filename in _PASS_THROUGH_FILES
+                                 or frame.f_code in _PASS_THROUGH_CODES):
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+def payload_bytes(value: Any) -> int:
+    if value is None:
+        return 0
+    return len(json.dumps(value, default=str))
+
+
+def row_count(data: Any) -> int:
+    if isinstance(data, list):
+        return len(data)
+    return 0 if data is None else 1
+
+
+class Profile:
+    # Events recorded in one request (a CLI command, a Streamlit rerun)
+    def __init__(self, label: str):
+        self.label = label
+        self.events: List[Dict] = []
+        self.started = time.perf_counter()
+        self.wall_ms: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, event: Dict):
+        with self._lock:
+            self.events.append(event)
+
+    def finish(self):
+        self.wall_ms = (time.perf_counter() - self.started) * 1000
+
+    def summary(self) -> Dict:
+        with self._lock:
+            events = list(self.events)
+        queries = [e for e in events if e["kind"] == "query"]
+        sites: Dict[Tuple[str, str], Dict] = {}
+        for e in queries:
+            site = sites.setdefault((e["site"], e["name"]), {"site": e["site"], "name": e["name"], "calls": 0,
+                                                             "ms": 0.0, "rows": 0})
+            site["calls"] += 1
+            site["ms"] += e["ms"]
+            site["rows"] += e["rows"]
+        # Time by kind counts only top-level events, so a service call and its queries are not added twice
+        by_kind: Dict[str, float] = defaultdict(float)
+        for e in events:
+            if e["parent"] is None:
+                by_kind[e["kind"]] += e["ms"]
+        wall_ms = self.wall_ms if self.wall_ms is not None else (time.perf_counter() - self.started) * 1000
+        ranked = sorted(sites.values(), key=lambda s: (-s["calls"], -s["ms"]))
+        for site in ranked:
+            site["ms"] = round(site["ms"], 3)
+        return {
+            "label": self.label,
+            "wall_ms": round(wall_ms, 3),
+            "queries": len(queries),
+            "query_ms": round(sum(e["ms"] for e in queries), 3),
+            "rows": sum(e["rows"] for e in queries),
+            "sent_bytes": sum(e["sent_bytes"] for e in queries),
+            "received_bytes": sum(e["received_bytes"] for e in queries),
+            "errors": sum(1 for e in events if e["error"]),
+            "ms_by_kind": {kind: round(ms, 3) for kind, ms in by_kind.items()},
+            "other_ms": round(max(0.0, wall_ms - sum(by_kind.values())), 3),
+            "sites": ranked,
+            "repeated": [s for s in ranked if s["calls"] >= REPEATED_CALLS],
+        }
+
+
+def format_profile(summary: Dict, top: int = 10) -> str:
+    # Plain-text report of Profile.summary() for terminals
+    lines = [
+        f"profile: {summary['label']}",
+        f"  wall {summary['wall_ms']:.1f} ms | {summary['queries']} queries, {summary['query_ms']:.1f} ms | "
+        f"{summary['rows']} rows | sent {summary['sent_bytes']} B, received {summary['received_bytes']} B"
+        + (f" | {summary['errors']} errors" if summary["errors"] else ""),
+        "  time: " + ", ".join(f"{kind} {ms:.1f} ms" for kind, ms in sorted(summary["ms_by_kind"].items()))
+        + f", other {summary['other_ms']:.1f} ms",
+    ]
+    if summary["sites"]:
+        lines.append(f"  {'calls':>5s} {'ms':>9s} {'rows':>8s}  query / call site")
+        for site in summary["sites"][:top]:
+            lines.append(f"  {site['calls']:5d} {site['ms']:9.1f} {site['rows']:8d}  {site['name']}  {site['site']}")
+    for site in summary["repeated"]:
+        lines.append(f"  repeated: {site['name']} ran {site['calls']}x from {site['site']} (N+1, unbatched loop or many pages?)")
+    return "\n".join(lines)
+
+
+class _Timer:
+    # One recorded call; used as a context manager by the hooks below
+    def __init__(self, recorder: "Recorder", kind: str, name: str, site: str, sent_bytes: int = 0):
+        self.recorder = recorder
+        self.kind = kind
+        self.name = name
+        self.site = site
+        self.sent_bytes = sent_bytes
+        self.rows = 0
+        self.received_bytes = 0
+        self.queries = 0
+
+    def result(self, data: Any):
+        self.rows = row_count(data)
+        self.received_bytes = payload_bytes(data)
+
+    def __enter__(self):
+        stack = _spans.get()
+        self.parent = stack[-1].name if stack else None
+        self._token = _spans.set(stack + (self,))
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        _spans.reset(self._token)
+        if self.kind == "query":
+            for span in _spans.get():
+                span.queries += 1
+        self.recorder.record({
+            "ts": time.time(),
+            "kind": self.kind,
+            "name": self.name,
+            "site": self.site,
+            "parent": self.parent,
+            "ms": round(elapsed * 1000, 3),
+            "rows": self.rows,
+            "sent_bytes": self.sent_bytes,
+            "received_bytes": self.received_bytes,
+            "queries": self.queries,
+            "error": exc_type.__name__ if exc_type else None,
+        }, elapsed)
+        return False
+
+
+class _Noop:
+    def result(self, data: Any):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _Noop()
+
+
+class Recorder:
+    def __init__(self, enabled: bool = False, log_path: Optional[str] = None):
+        self._on = enabled
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._log = None
+        self._totals: Dict[Tuple[str, str], Dict] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._on or _enabled.get()
+
+    def enable(self, on: bool = True):
+        self._on = on
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+
+    # ---- hooks ----
+    def call(self, kind: str, name: str, site: Optional[str] = None, sent_bytes: int = 0):
+        if not self.enabled:
+            return _NOOP
+        return _Timer(self, kind, name, site or call_site(), sent_bytes)
+
+    def span(self, kind: str, name: str):
+        return self.call(kind, name, site=name)
+
+    def record(self, event: Dict, elapsed: float):
+        with self._lock:
+            totals = self._totals.get((event["kind"], event["name"]))
+            if totals is None:
+                totals = self._totals[(event["kind"], event["name"])] = {
+                    "calls": 0, "errors": 0, "seconds": 0.0, "rows": 0, "sent_bytes": 0,
+                    "received_bytes": 0, "queries": 0, "buckets": [0] * len(BUCKETS)}
+            totals["calls"] += 1
+            totals["errors"] += 1 if event["error"] else 0
+            totals["seconds"] += elapsed
+            totals["rows"] += event["rows"]
+            totals["sent_bytes"] += event["sent_bytes"]
+            totals["received_bytes"] += event["received_bytes"]
+            totals["queries"] += event["queries"]
+            for i, bound in enumerate(BUCKETS):
+                if elapsed <= bound:
+                    totals["buckets"][i] += 1
+                    break
+            if self.log_path:
+                if self._log is None:
+                    self._log = open(self.log_path, "a", buffering=1)
+                self._log.write(json.dumps(event) + "\n")
+        profile = _profile.get()
+        if profile is not None:
+            profile.add(event)
+
+    # ---- requests ----
+    def begin(self, label: str, enable: bool = False) -> Profile:
+        # For callers that can't wrap the request in a with block (a Streamlit script). Call it at
+        # the start of every request: it also clears what a request that never reached end() left
+        # in this context.
+        profile = Profile(label)
+        _profile.set(profile)
+        _enabled.set(enable)
+        return profile
+
+    def end(self, profile: Profile) -> Profile:
+        profile.finish()
+        if _profile.get() is profile:
+            _profile.set(None)
+            _enabled.set(False)
+        return profile
+
+    def profile(self, label: str, enable: bool = False) -> "_ProfileScope":
+        return _ProfileScope(self, label, enable)
+
+    # ---- export ----
+    def totals(self) -> List[Dict]:
+        with self._lock:
+            return [dict(t, kind=kind, name=name, buckets=list(t["buckets"]))
+                    for (kind, name), t in sorted(self._totals.items())]
+
+    def prometheus(self, prefix: str = "medicine_tracker") -> str:
+        totals = self.totals()
+        lines = []
+
+        def family(metric: str, kind: str, help_text: str, field: str, only: Iterable[str] = ()):
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} {kind}")
+            for t in totals:
+                if not only or t["kind"] in only:
+                    lines.append(f'{prefix}_{metric}{{kind="{t["kind"]}",name="{t["name"]}"}} {t[field]}')
+
+        family("calls_total", "counter", "Instrumented calls.", "calls")
+        family("errors_total", "counter", "Instrumented calls that raised.", "errors")
+        family("rows_total", "counter", "Rows returned by queries.", "rows", ("query",))
+        family("sent_bytes_total", "counter", "JSON payload bytes sent by queries.", "sent_bytes", ("query",))
+        family("received_bytes_total", "counter", "JSON payload bytes returned by queries.", "received_bytes",
+               ("query",))
+        family("queries_total", "counter", "Queries issued inside service calls.", "queries", ("service",))
+
+        metric = f"{prefix}_duration_seconds"
+        lines.append(f"# HELP {metric} Call latency.")
+        lines.append(f"# TYPE {metric} histogram")
+        for t in totals:
+            labels = f'kind="{t["kind"]}",name="{t["name"]}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS, t["buckets"]):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {t["calls"]}')
+            lines.append(f"{metric}_sum{{{labels}}} {t['seconds']:.6f}")
+            lines.append(f"{metric}_count{{{labels}}} {t['calls']}")
+        return "\n".join(lines) + "\n"
+
+
+class _ProfileScope:
+    def __init__(self, recorder: Recorder, label: str, enable: bool = False):
+        self.recorder = recorder
+        self.label = label
+        self.enable = enable
+
+    def __enter__(self) -> Profile:
+        self.profile = Profile(self.label)
+        self._token = _profile.set(self.profile)
+        self._enabled_token = _enabled.set(_enabled.get() or self.enable)
+        return self.profile
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profile.finish()
+        _enabled.reset(self._enabled_token)
+        _profile.reset(self._token)
+        return False
+
+
+def _default_recorder() -> Recorder:
+    from src.config import INSTRUMENTATION, INSTRUMENTATION_LOG
+    return Recorder(INSTRUMENTATION, INSTRUMENTATION_LOG or None)
+
+
+recorder = _default_recorder()
+
+
+# ------------------------
+# Query hooks: Supabase / memory client builders
+# ------------------------
+class InstrumentedBuilder:
+    # Forwards every builder method and times execute(); sync and async builders alike
+    def __init__(self, builder, table: str, operation: str = "select", sent: Any = None):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+        self._sent = sent
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def chain(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if not hasattr(result, "execute"):
+                return result
+            operation, sent = self._operation, self._sent
+            if name in OPERATIONS:
+                operation = name
+                if name in WRITE_METHODS:
+                    sent = args[0] if args else kwargs.get("json")
+            return InstrumentedBuilder(result, self._table, operation, sent)
+        return chain
+
+    def _name(self) -> str:
+        return f"{self._table}.{self._operation}"
+
+    def execute(self):
+        if not recorder.enabled:
+            return self._builder.execute()
+        site = call_site()
+        sent = payload_bytes(self._sent)
+        timer = recorder.call("query", self._name(), site, sent)
+        if inspect.iscoroutinefunction(self._builder.execute):
+            return self._execute_async(timer)
+        with timer:
+            resp = self._builder.execute()
+            timer.result(getattr(resp, "data", None))
+        return resp
+
+    async def _execute_async(self, timer):
+        with timer:
+            resp = await self._builder.execute()
+            timer.result(getattr(resp, "data", None))
+        return resp
+
+
+class InstrumentedClient:
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, name: str):
+        return InstrumentedBuilder(self._client.table(name), name)
+
+    def from_(self, name: str):
+        return self.table(name)
+
+    def rpc(self, fn: str, params: Optional[Dict] = None, *args, **kwargs):
+        return InstrumentedBuilder(self._client.rpc(fn, params, *args, **kwargs), "rpc", fn, params)
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+
+def instrument_client(client):
+    if client is None or isinstance(client, InstrumentedClient):
+        return client
+    return InstrumentedClient(client)
+
+
+# ------------------------
+# Method hooks: services and other hot functions
+# ------------------------
+def timed(kind: str, name: str) -> Callable:
+    def decorate(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not recorder.enabled:
+                    return await func(*args, **kwargs)
+                with recorder.span(kind, name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not recorder.enabled:
+                return func(*args, **kwargs)
+            with recorder.span(kind, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def instrument_methods(cls):
+    # Class decorator: times every public method defined on the class as "Class.method"
+    for attr, func in list(vars(cls).items()):
+        if attr.startswith("_") or not inspect.isfunction(func):
+            continue
+        setattr(cls, attr, timed("service", f"{cls.__name__}.{attr}")(func))
+    return cls
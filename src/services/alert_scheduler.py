@@ -0,0 +1,132 @@
+# src/services/alert_scheduler.py
+import heapq
+import json
+import sys
+import threading
+import time
+from datetime import datetime, time as dtime
+from typing import Callable, Dict, List, Optional
+from src.services.medicine_service import MedicineService, DATE_FMT
+
+# ------------------------
+# Senders
+# ------------------------
+class StdoutSender:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, alerts: List[Dict]):
+        for alert in alerts:
+            self.stream.write(json.dumps(alert) + "\n")
+        self.stream.flush()
+
+
+class FileSender:
+    # Appends one JSON line per notification
+    def __init__(self, path: str):
+        self.path = path
+
+    def send(self, alerts: List[Dict]):
+        with open(self.path, "a", encoding="utf-8") as fh:
+            for alert in alerts:
+                fh.write(json.dumps(alert) + "\n")
+
+
+# ------------------------
+# Scheduler
+# ------------------------
+class AlertScheduler:
+    # Pending alerts live in a min-heap keyed by (alert_date, id). Each refresh only fetches
+    # alerts with an id above the watermark, so the alerts table is read once, then incrementally.
+    def __init__(self, med_service: Optional[MedicineService] = None, sender=None,
+                 refresh_interval: float = 60.0, batch_size: int = 100,
+                 clock: Callable[[], float] = time.time):
+        self.med_service = med_service or MedicineService()
+        self.sender = sender or StdoutSender()
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self.clock = clock
+        self._heap: List[tuple] = []
+        self._queued = set()
+        self.watermark: Optional[int] = None
+        self.sent = 0
+        self._stop = threading.Event()
+
+    def refresh(self) -> int:
+        added = 0
+        for alert in self.med_service.alert_dao.iter_pending_alerts(after_id=self.watermark):
+            self.watermark = max(self.watermark or 0, alert["id"])
+            if alert["id"] in self._queued:
+                continue
+            heapq.heappush(self._heap, (alert["alert_date"], alert["id"], alert))
+            self._queued.add(alert["id"])
+            added += 1
+        return added
+
+    def _today(self) -> str:
+        return datetime.fromtimestamp(self.clock()).strftime(DATE_FMT)
+
+    def next_due_in(self) -> Optional[float]:
+        # Seconds until the earliest queued alert is due (alerts fire at local midnight of alert_date)
+        if not self._heap:
+            return None
+        due_day = datetime.strptime(self._heap[0][0], DATE_FMT).date()
+        due_ts = datetime.combine(due_day, dtime.min).timestamp()
+        return max(0.0, due_ts - self.clock())
+
+    def pop_due(self) -> List[Dict]:
+        today = self._today()
+        due = []
+        while self._heap and self._heap[0][0] <= today:
+            _, alert_id, alert = heapq.heappop(self._heap)
+            self._queued.discard(alert_id)
+            due.append(alert)
+        return due
+
+    def _with_medicines(self, alerts: List[Dict]) -> List[Dict]:
+        meds = self.med_service.med_dao.get_medicines_by_ids({a["medicine_id"] for a in alerts})
+        by_id = {m["id"]: m for m in meds}
+        return [dict(a, medicine=by_id.get(a["medicine_id"])) for a in alerts]
+
+    def _requeue(self, alerts: List[Dict]):
+        for alert in alerts:
+            if alert["id"] not in self._queued:
+                heapq.heappush(self._heap, (alert["alert_date"], alert["id"], alert))
+                self._queued.add(alert["id"])
+
+    def dispatch_due(self) -> int:
+        # Each batch is claimed (Pending -> Sent) before it goes out, so an alert that
+        # regenerate_alerts removed after it was queued is dropped instead of sent.
+        # A failed send puts the batch back to Pending and the unsent alerts back on the heap.
+        due = self.pop_due()
+        sent = 0
+        for i in range(0, len(due), self.batch_size):
+            claimed = set(self.med_service.mark_alerts_sent([a["id"] for a in due[i:i + self.batch_size]]))
+            batch = [a for a in due[i:i + self.batch_size] if a["id"] in claimed]
+            if not batch:
+                continue
+            try:
+                self.sender.send(self._with_medicines(batch))
+            except Exception:
+                self.med_service.unmark_alerts_sent(list(claimed))
+                self._requeue(batch + due[i + self.batch_size:])
+                raise
+            sent += len(batch)
+            self.sent += len(batch)
+        return sent
+
+    def run_once(self) -> int:
+        self.refresh()
+        return self.dispatch_due()
+
+    def run(self, once: bool = False):
+        while not self._stop.is_set():
+            self.run_once()
+            if once:
+                return
+            wait = self.next_due_in()
+            wait = self.refresh_interval if wait is None else min(wait, self.refresh_interval)
+            self._stop.wait(wait)
+
+    def stop(self):
+        self._stop.set()
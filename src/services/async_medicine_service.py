@@ -0,0 +1,108 @@
+# src/services/async_medicine_service.py
+# Async facade over the read side of MedicineService. Independent queries for one screen are
+# gathered concurrently, bounded by a semaphore, each with its own timeout. Results share the
+# TTL cache keys MedicineService/CategoryService use, so their write-through invalidation applies.
+import asyncio
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+from src.config import ASYNC_CONCURRENCY, ASYNC_TIMEOUT, CATEGORY_CACHE_TTL
+from src.dao.factory import get_async_alert_dao, get_async_category_dao, get_async_medicine_dao
+from src.instrumentation import instrument_methods
+from src.services.async_runner import BlockingProxy, LoopRunner
+from src.services.cache import get_default_cache, scoped_cache
+from src.services.medicine_service import DATE_FMT, EXPIRING_SOON_DAYS, expiry_window_end, fold_expiry_summary
+
+_MISS = object()
+
+
+@instrument_methods
+class AsyncMedicineService:
+    def __init__(self, med_dao=None, cat_dao=None, alert_dao=None, cache=None,
+                 concurrency: int = ASYNC_CONCURRENCY, timeout: float = ASYNC_TIMEOUT,
+                 location_id: Optional[int] = None):
+        self.med_dao = med_dao or get_async_medicine_dao(location_id=location_id)
+        self.cat_dao = cat_dao or get_async_category_dao()
+        self.alert_dao = alert_dao or get_async_alert_dao(location_id=location_id)
+        self.location_id = location_id
+        self.cache = scoped_cache(cache or get_default_cache(), location_id)
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _bounded(self, make_call: Callable[[], Awaitable]) -> Any:
+        async with self._semaphore:
+            return await asyncio.wait_for(make_call(), self.timeout)
+
+    async def _cached(self, key: Hashable, make_call: Callable[[], Awaitable], ttl: Optional[float] = None) -> Any:
+        value = self.cache.get(key, _MISS)
+        if value is _MISS:
+            value = await self._bounded(make_call)
+            self.cache.set(key, value, ttl)
+        return value
+
+    # ------------------------
+    # Single queries
+    # ------------------------
+    async def list_categories(self) -> List[Dict]:
+        return await self._cached(("categories", "all"), self.cat_dao.list_categories, CATEGORY_CACHE_TTL)
+
+    async def page_medicines(self, after_id: Optional[int] = None, limit: int = 50) -> List[Dict]:
+        return await self._cached(("medicines", "page", after_id, limit),
+                                  lambda: self.med_dao.page_medicines(after_id, limit))
+
+    async def page_pending_alerts(self, after_id: Optional[int] = None, limit: int = 50) -> List[Dict]:
+        return await self._cached(("alerts", "page", after_id, limit),
+                                  lambda: self.alert_dao.page_pending_alerts(after_id, limit))
+
+    async def get_expiring_soon(self, as_of: str = None) -> List[Dict]:
+        as_of = as_of or datetime.today().strftime(DATE_FMT)
+        return await self._cached(("alerts", "due", as_of),
+                                  lambda: self.alert_dao.list_pending_alerts(due_by=as_of))
+
+    async def count_by_status(self, as_of: str = None, window_days: int = EXPIRING_SOON_DAYS) -> Dict[str, int]:
+        as_of = as_of or datetime.today().strftime(DATE_FMT)
+        key = ("medicines", "counts", as_of, window_days)
+        counts = self.cache.get(key, _MISS)
+        if counts is _MISS:
+            window_end = expiry_window_end(as_of, window_days)
+            total, expired, expiring = await asyncio.gather(
+                self._bounded(self.med_dao.count_medicines),
+                self._bounded(lambda: self.med_dao.count_medicines(before=as_of)),
+                self._bounded(lambda: self.med_dao.count_medicines(start=as_of, end=window_end)),
+            )
+            counts = {
+                "Total": total,
+                "Expired": expired,
+                "Expiring Soon": expiring,
+                "Safe": total - expired - expiring,
+            }
+            self.cache.set(key, counts)
+        return counts
+
+    async def get_dashboard_stats(self, as_of: str = None, window_days: int = EXPIRING_SOON_DAYS) -> Dict:
+        as_of = as_of or datetime.today().strftime(DATE_FMT)
+        async def load():
+            rows = await self.med_dao.expiry_summary(as_of, expiry_window_end(as_of, window_days))
+            return fold_expiry_summary(rows, as_of, window_days)
+        return await self._cached(("medicines", "stats", as_of, window_days), load)
+
+    # ------------------------
+    # Screens: everything one render needs, fetched concurrently
+    # ------------------------
+    async def dashboard(self, after_id: Optional[int] = None, limit: int = 50, as_of: str = None,
+                        window_days: int = EXPIRING_SOON_DAYS) -> Dict[str, Any]:
+        stats, medicines, due_alerts = await asyncio.gather(
+            self.get_dashboard_stats(as_of, window_days),
+            self.page_medicines(after_id, limit),
+            self.get_expiring_soon(as_of),
+        )
+        return {"stats": stats, "medicines": medicines, "due_alerts": due_alerts}
+
+    async def view_medicines(self, after_id: Optional[int] = None, limit: int = 50) -> Dict[str, Any]:
+        categories, medicines = await asyncio.gather(self.list_categories(), self.page_medicines(after_id, limit))
+        return {"categories": categories, "medicines": medicines}
+
+
+def blocking_medicine_service(service: Optional[AsyncMedicineService] = None,
+                              runner: Optional[LoopRunner] = None) -> BlockingProxy:
+    # Sync entry point for CLIApp and Streamlit: same methods, called without await
+    return BlockingProxy(service or AsyncMedicineService(), runner)
@@ -0,0 +1,68 @@
+# src/services/async_runner.py
+# Lets blocking callers (CLIApp, Streamlit reruns) use the async services. One event loop runs
+# forever in a daemon thread, so the pooled httpx.AsyncClient and its connections survive
+# between calls instead of being torn down by a fresh asyncio.run() each time.
+import asyncio
+import contextvars
+import threading
+from typing import Any, Awaitable, Optional
+
+
+class LoopRunner:
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="async-runner", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        # The task runs in a copy of the caller's context, so contextvars set by the caller
+        # (e.g. the instrumentation profile of the current request) are seen by the coroutine
+        context = contextvars.copy_context()
+
+        async def in_caller_context():
+            return await context.run(asyncio.ensure_future, coro)
+        return asyncio.run_coroutine_threadsafe(in_caller_context(), self._ensure_loop()).result(timeout)
+
+    def close(self):
+        with self._lock:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join()
+                self._loop.close()
+            self._loop = None
+            self._thread = None
+
+
+class BlockingProxy:
+    # Exposes every coroutine method of an async service as a plain blocking method
+    def __init__(self, service, runner: Optional[LoopRunner] = None):
+        self.service = service
+        self.runner = runner or get_loop_runner()
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.service, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self.runner.run(attr(*args, **kwargs))
+        return call
+
+
+_runner: Optional[LoopRunner] = None
+_runner_lock = threading.Lock()
+
+def get_loop_runner() -> LoopRunner:
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = LoopRunner()
+        return _runner
@@ -0,0 +1,119 @@
+# src/services/cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+from src.config import CACHE_TTL, CACHE_MAXSIZE
+
+_MISSING = object()
+
+class TTLCache:
+    # Keys are tuples whose first element is a namespace ("categories", "medicines", "alerts")
+    # so writes can drop everything derived from the table they touched.
+    def __init__(self, ttl: float = CACHE_TTL, maxsize: int = CACHE_MAXSIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, *namespaces: str):
+        # No namespaces clears everything
+        with self._lock:
+            if not namespaces:
+                self._data.clear()
+            else:
+                for key in [k for k in self._data if isinstance(k, tuple) and k and k[0] in namespaces]:
+                    del self._data[key]
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class ScopedCache:
+    # A view of a TTLCache for services scoped to one location: keys become (namespace, scope, ...)
+    # so per-location results never collide, while invalidate(namespace) still drops the namespace
+    # for every scope (a write in one branch also changes the cross-branch views)
+    def __init__(self, cache: TTLCache, scope: Hashable):
+        self.cache = cache
+        self.scope = scope
+
+    def _key(self, key: Hashable) -> Hashable:
+        if isinstance(key, tuple) and key:
+            return (key[0], ("scope", self.scope)) + key[1:]
+        return key
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        return self.cache.get(self._key(key), default)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self.cache.set(self._key(key), value, ttl)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        return self.cache.get_or_load(self._key(key), loader, ttl)
+
+    def invalidate(self, *namespaces: str):
+        self.cache.invalidate(*namespaces)
+
+    def stats(self) -> Dict:
+        return self.cache.stats()
+
+
+def scoped_cache(cache: TTLCache, scope: Optional[Hashable]):
+    # None (unscoped) uses the cache as is
+    return cache if scope is None else ScopedCache(cache, scope)
+
+
+_default_cache: Optional[TTLCache] = None
+_default_lock = threading.Lock()
+
+def get_default_cache() -> TTLCache:
+    # One cache per process, shared by every service that isn't handed its own
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = TTLCache()
+    return _default_cache
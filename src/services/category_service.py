@@ -1,14 +1,65 @@
-from src.dao.category_dao import CategoryDAO
+from typing import Dict, Iterable, Optional
+from src.config import CATEGORY_CACHE_TTL
+from src.dao.factory import get_category_dao
+from src.instrumentation import instrument_methods
+from src.services.cache import get_default_cache
 
+@instrument_methods
 class CategoryService:
-    def __init__(self, dao=None):
-        self.dao = dao or CategoryDAO()
+    def __init__(self, dao=None, cache=None):
+        self.dao = dao or get_category_dao()
+        self.cache = cache or get_default_cache()
 
     def add_category(self, name: str):
-        existing = self.dao.get_category_by_name(name)
+        # name -> row lookups are served from the cache; categories rarely change. On a miss the
+        # create_category upsert returns the row whether or not it existed, in one round trip.
+        key = ("categories", "by_name", name)
+        existing = self.cache.get(key)
         if existing:
             return existing
-        return self.dao.create_category(name)
+        category = self.dao.create_category(name)
+        if category:
+            listed = self.cache.get(("categories", "all"))
+            if listed is not None and all(c["id"] != category["id"] for c in listed):
+                self.cache.invalidate("categories")
+            self.cache.set(key, category, CATEGORY_CACHE_TTL)
+        return category
+
+    def get_category(self, name: str) -> Optional[Dict]:
+        key = ("categories", "by_name", name)
+        category = self.cache.get(key)
+        if category is None:
+            category = self.dao.get_category_by_name(name)
+            if category:
+                self.cache.set(key, category, CATEGORY_CACHE_TTL)
+        return category
+
+    def add_categories(self, names: Iterable[str]) -> Dict[str, Dict]:
+        # Batched add_category: cached names first, then one lookup and one insert for the rest
+        out = {}
+        missing = []
+        for name in dict.fromkeys(names):
+            cached = self.cache.get(("categories", "by_name", name))
+            if cached:
+                out[name] = cached
+            else:
+                missing.append(name)
+        if missing:
+            found = {c["name"]: c for c in self.dao.get_categories_by_names(missing)}
+            to_create = [n for n in missing if n not in found]
+            if to_create:
+                found.update((c["name"], c) for c in self.dao.create_categories(to_create))
+                self.cache.invalidate("categories")
+            for name, category in found.items():
+                self.cache.set(("categories", "by_name", name), category, CATEGORY_CACHE_TTL)
+            out.update(found)
+        return out
 
     def list_categories(self):
-        return self.dao.list_categories()
+        return self.cache.get_or_load(("categories", "all"), self.dao.list_categories, CATEGORY_CACHE_TTL)
+
+    def iter_categories(self, page_size=None):
+        return self.dao.iter_categories(page_size)
+
+    def invalidate_cache(self):
+        self.cache.invalidate("categories")
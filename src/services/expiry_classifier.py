@@ -0,0 +1,68 @@
+# src/services/expiry_classifier.py
+# Vectorized status / date-range columns for medicine tables. Dates are parsed once per
+# column with pd.to_datetime and compared against a single `today`, never row by row.
+from datetime import date
+from typing import Optional
+import numpy as np
+import pandas as pd
+from src.instrumentation import timed
+
+EXPIRED = "Expired"
+EXPIRING_SOON = "Expiring Soon"
+SAFE = "Safe"
+UNKNOWN = "Unknown"
+
+STATUS_COLORS = {
+    EXPIRED: "#ff4b4b",        # Red
+    EXPIRING_SOON: "#ffb84b",  # Orange
+    SAFE: "#4caf50",           # Green
+    UNKNOWN: "#9e9e9e",        # Grey
+}
+
+def parse_expiry(values: pd.Series) -> pd.Series:
+    # Unparseable dates become NaT instead of raising
+    return pd.to_datetime(values, format="%Y-%m-%d", errors="coerce")
+
+def expiry_status(expiry: pd.Series, today: Optional[date] = None, window_days: int = 7) -> np.ndarray:
+    today_ts = pd.Timestamp(today or date.today()).normalize()
+    window_end = today_ts + pd.Timedelta(days=window_days)
+    return np.select(
+        [expiry.isna().to_numpy(), (expiry < today_ts).to_numpy(), (expiry <= window_end).to_numpy()],
+        [UNKNOWN, EXPIRED, EXPIRING_SOON],
+        default=SAFE,
+    )
+
+def _iso_dates(values: pd.Series) -> pd.Series:
+    # Parsed columns (from a snapshot, see src/services/export_service.py) back to YYYY-MM-DD text
+    return values.dt.strftime("%Y-%m-%d").fillna("")
+
+def date_range_column(created_at: pd.Series, expiry_date: pd.Series) -> pd.Series:
+    # "YYYY-MM-DD - YYYY-MM-DD" from an ISO created_at timestamp and the expiry date
+    if pd.api.types.is_datetime64_any_dtype(expiry_date):
+        expiry_date = _iso_dates(expiry_date)
+    if pd.api.types.is_datetime64_any_dtype(created_at):
+        return _iso_dates(created_at) + " - " + expiry_date.fillna("").astype(str)
+    created = created_at.fillna("").astype(str)
+    # ISO timestamps have the date in the first 10 chars; only odd values pay for str.split
+    prefix = created.str.slice(0, 10)
+    irregular = ((created.str.len() > 10) & (created.str.slice(10, 11) != "T")) | prefix.str.contains("T", regex=False)
+    if irregular.any():
+        prefix = prefix.where(~irregular, created[irregular].str.split("T", n=1).str[0])
+    return prefix + " - " + expiry_date.fillna("").astype(str)
+
+@timed("pandas", "classify_expiry")
+def classify_expiry(df: pd.DataFrame, today: Optional[date] = None, window_days: int = 7) -> pd.DataFrame:
+    # Adds status, color and date_range columns; returns a copy
+    out = df.copy()
+    if out.empty:
+        for col in ("status", "color", "date_range"):
+            out[col] = pd.Series(dtype=object)
+        return out
+    status = expiry_status(parse_expiry(out["expiry_date"]), today, window_days)
+    out["status"] = status
+    out["color"] = pd.Series(status, index=out.index).map(STATUS_COLORS)
+    if "created_at" in out:
+        out["date_range"] = date_range_column(out["created_at"], out["expiry_date"])
+    else:
+        out["date_range"] = out["expiry_date"].astype(str)
+    return out
@@ -0,0 +1,209 @@
+# src/services/export_service.py
+# Snapshot export of the medicine table for audits and wastage reports. Rows stream from the
+# keyset-paged DAO into the writer one batch at a time, so memory stays at EXPORT_BATCH_ROWS rows
+# whatever the table size:
+#   parquet / arrow  typed columns (int64 ids and quantity, date32 expiry_date, UTC timestamp
+#                    created_at), one record batch / row group per batch; these need pyarrow
+#   csv / jsonl      plain text, written row by row ("-" writes to stdout)
+# Category and location names are looked up once and written next to their ids, so a snapshot
+# can be analysed offline (load_snapshot, the Streamlit "Snapshot" page) without the database.
+import csv
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+import pandas as pd
+from src.config import EXPORT_BATCH_ROWS
+from src.dao.base import MEDICINE_COLUMNS
+from src.services.expiry_classifier import parse_expiry
+from src.services.import_service import chunked
+
+COLUMNS = ("id", "name", "category_id", "category", "location_id", "location", "expiry_date", "quantity",
+           "created_at")
+COLUMNAR_FORMATS = ("parquet", "arrow")
+EXPORT_FORMATS = COLUMNAR_FORMATS + ("csv", "jsonl")
+
+_EXTENSIONS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow",
+               ".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+def snapshot_format(path: str, fmt: Optional[str] = None) -> str:
+    fmt = fmt or _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported snapshot format: {fmt or path} (use one of {', '.join(EXPORT_FORMATS)})")
+    return fmt
+
+def list_snapshots(snapshot_dir: str) -> List[str]:
+    # File names in snapshot_dir with a snapshot extension that snapshot_path accepts
+    root = os.path.realpath(snapshot_dir)
+    return sorted(name for name in os.listdir(root)
+                  if os.path.splitext(name)[1].lower() in _EXTENSIONS
+                  and os.path.dirname(os.path.realpath(os.path.join(root, name))) == root
+                  and os.path.isfile(os.path.join(root, name)))
+
+def snapshot_path(snapshot_dir: str, name: str) -> str:
+    # A bare file name inside snapshot_dir; anything that resolves elsewhere (../, absolute paths,
+    # symlinks pointing out) is rejected
+    root = os.path.realpath(snapshot_dir)
+    path = os.path.realpath(os.path.join(root, name))
+    if not name or os.path.basename(name) != name or os.path.dirname(path) != root:
+        raise ValueError(f"Not a snapshot in {snapshot_dir}: {name}")
+    return path
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ValueError("parquet and arrow snapshots need pyarrow: pip install pyarrow")
+    return pyarrow
+
+def arrow_schema():
+    pa = _pyarrow()
+    return pa.schema([
+        ("id", pa.int64()),
+        ("name", pa.string()),
+        ("category_id", pa.int64()),
+        ("category", pa.string()),
+        ("location_id", pa.int64()),
+        ("location", pa.string()),
+        ("expiry_date", pa.date32()),
+        ("quantity", pa.int64()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+    ])
+
+def record_batch(rows: List[Dict], schema):
+    # Dates and timestamps arrive as ISO strings; arrow parses a whole column per cast
+    pa = _pyarrow()
+    arrays = []
+    for field in schema:
+        values = [r.get(field.name) for r in rows]
+        if pa.types.is_date(field.type) or pa.types.is_timestamp(field.type):
+            arrays.append(pa.array(values, pa.string()).cast(field.type))
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+class _ParquetWriter:
+    def __init__(self, path: str):
+        import pyarrow.parquet as pq
+        self.schema = arrow_schema()
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows: List[Dict]):
+        self.writer.write_batch(record_batch(rows, self.schema))
+
+    def close(self):
+        self.writer.close()
+
+class _ArrowWriter:
+    # Arrow IPC file (Feather v2): load_snapshot memory-maps it instead of reading it in
+    def __init__(self, path: str):
+        pa = _pyarrow()
+        import pyarrow.ipc
+        self.schema = arrow_schema()
+        self.sink = pa.OSFile(path, "wb")
+        self.writer = pa.ipc.new_file(self.sink, self.schema)
+
+    def write(self, rows: List[Dict]):
+        self.writer.write_batch(record_batch(rows, self.schema))
+
+    def close(self):
+        self.writer.close()
+        self.sink.close()
+
+class _TextWriter:
+    def __init__(self, path: str, fmt: str):
+        self.fh = sys.stdout if path == "-" else open(path, "w", newline="", encoding="utf-8")
+        self.fmt = fmt
+        if fmt == "csv":
+            self.csv = csv.DictWriter(self.fh, COLUMNS, extrasaction="ignore")
+            self.csv.writeheader()
+
+    def write(self, rows: List[Dict]):
+        if self.fmt == "csv":
+            self.csv.writerows(rows)
+        else:
+            self.fh.writelines(json.dumps({c: r.get(c) for c in COLUMNS}) + "\n" for r in rows)
+
+    def close(self):
+        if self.fh is sys.stdout:
+            self.fh.flush()
+        else:
+            self.fh.close()
+
+def open_writer(path: str, fmt: str):
+    if fmt in COLUMNAR_FORMATS and path == "-":
+        raise ValueError(f"{fmt} snapshots need a file path")
+    if fmt == "parquet":
+        return _ParquetWriter(path)
+    if fmt == "arrow":
+        return _ArrowWriter(path)
+    return _TextWriter(path, fmt)
+
+def load_snapshot(source, fmt: Optional[str] = None) -> pd.DataFrame:
+    # source is a path or a binary file object (then fmt is required). Every format comes back with
+    # the same dtypes: datetime64 expiry_date and created_at (UTC), int64 ids and quantity.
+    fmt = snapshot_format(source if isinstance(source, str) else "", fmt)
+    if fmt in COLUMNAR_FORMATS:
+        pa = _pyarrow()
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            table = pq.read_table(source)
+        else:
+            import pyarrow.ipc
+            table = pa.ipc.open_file(pa.memory_map(source) if isinstance(source, str) else source).read_all()
+        return table.to_pandas(date_as_object=False)
+    if fmt == "csv":
+        df = pd.read_csv(source, dtype={"name": str, "category": str, "location": str, "created_at": str})
+    else:
+        df = pd.read_json(source, lines=True, dtype=False, convert_dates=False)
+    if df.empty:
+        return pd.DataFrame(columns=list(COLUMNS))
+    df["expiry_date"] = parse_expiry(df["expiry_date"])
+    df["created_at"] = pd.to_datetime(df["created_at"], utc=True, format="ISO8601", errors="coerce")
+    return df
+
+class ExportService:
+    def __init__(self, med_service=None, cat_service=None, loc_service=None):
+        if med_service is None:
+            from src.services.medicine_service import MedicineService
+            med_service = MedicineService()
+        if cat_service is None:
+            from src.services.category_service import CategoryService
+            cat_service = CategoryService()
+        if loc_service is None:
+            from src.services.location_service import LocationService
+            loc_service = LocationService()
+        self.med_service = med_service
+        self.cat_service = cat_service
+        self.loc_service = loc_service
+
+    def iter_rows(self, page_size: Optional[int] = None) -> Iterator[Dict]:
+        categories = {c["id"]: c["name"] for c in self.cat_service.list_categories()}
+        locations = {l["id"]: l["name"] for l in self.loc_service.list_locations()}
+        for med in self.med_service.iter_medicines(page_size, MEDICINE_COLUMNS):
+            med["category"] = categories.get(med["category_id"])
+            med["location"] = locations.get(med.get("location_id"))
+            yield med
+
+    def export(self, path: str, fmt: Optional[str] = None, page_size: Optional[int] = None,
+               batch_rows: Optional[int] = None, progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        fmt = snapshot_format(path, fmt)
+        totals = {"format": fmt, "path": path, "rows": 0, "batches": 0}
+        start = time.perf_counter()
+        writer = open_writer(path, fmt)
+        try:
+            for rows in chunked(self.iter_rows(page_size), batch_rows or EXPORT_BATCH_ROWS):
+                writer.write(rows)
+                totals["rows"] += len(rows)
+                totals["batches"] += 1
+                if progress:
+                    progress(dict(totals))
+        finally:
+            writer.close()
+        elapsed = time.perf_counter() - start
+        totals["seconds"] = round(elapsed, 3)
+        totals["rows_per_sec"] = round(totals["rows"] / elapsed, 1) if elapsed else 0.0
+        if path != "-":
+            totals["bytes"] = os.path.getsize(path)
+        return totals
@@ -0,0 +1,88 @@
+# src/services/forecast.py
+# Expiry forecast: how much in-stock quantity expires in each day / week / month of a horizon,
+# split by category, location or medicine. The lots arrive as one frame; bucketing is integer
+# arithmetic on whole NumPy columns and the group-by is a single bincount over (group, bucket),
+# so a million lots take a fraction of a second (benchmarks/bench_forecast.py).
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+import numpy as np
+import pandas as pd
+from src.services.expiry_classifier import parse_expiry
+
+BUCKETS = ("day", "week", "month")
+GROUPS = {"category": "category_id", "location": "location_id", "medicine": "medicine_id", None: None}
+LOT_COLUMNS = ["medicine_id", "name", "category_id", "location_id", "expiry_date", "quantity"]
+
+def lots_frame(lots: Iterable[Dict]) -> pd.DataFrame:
+    # One row per lot with a parsed expiry_date; lots without a readable date are dropped
+    df = pd.DataFrame.from_records(lots, columns=LOT_COLUMNS)
+    df["expiry_date"] = parse_expiry(df["expiry_date"])
+    df = df[df["expiry_date"].notna()]
+    df["quantity"] = df["quantity"].astype("int64")
+    return df.reset_index(drop=True)
+
+def bucket_starts(days: np.ndarray, bucket: str) -> np.ndarray:
+    # Days since 1970-01-01 -> first day of their bucket. Weeks start on Monday (the epoch was a Thursday).
+    if bucket == "day":
+        return days
+    if bucket == "week":
+        return days - (days + 3) % 7
+    if bucket == "month":
+        return days.astype("datetime64[D]").astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    raise ValueError(f"Unknown bucket: {bucket} (use one of {', '.join(BUCKETS)})")
+
+def forecast_expiry(lots: pd.DataFrame, as_of: str, horizon_days: int = 90, bucket: str = "week",
+                    by: Optional[str] = "category", limit: Optional[int] = None) -> Dict:
+    # Quantity expiring from as_of up to (not including) as_of + horizon_days, per bucket and group.
+    # "expired" is stock still on hand that expired before as_of (wastage not yet written off).
+    # Series are sorted by quantity, largest first; limit keeps the top ones.
+    if by not in GROUPS:
+        raise ValueError(f"Unknown forecast grouping: {by} (use category, location or medicine)")
+    if horizon_days < 1:
+        raise ValueError("horizon_days must be at least 1")
+    start = int(np.datetime64(datetime.strptime(as_of, "%Y-%m-%d").date(), "D").astype(np.int64))
+    buckets = np.unique(bucket_starts(np.arange(start, start + horizon_days, dtype=np.int64), bucket))
+
+    days = lots["expiry_date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    qty = lots["quantity"].to_numpy(dtype=np.int64)
+    in_stock = qty > 0
+    expired = in_stock & (days < start)
+    window = in_stock & (days >= start) & (days < start + horizon_days)
+    columns = np.searchsorted(buckets, bucket_starts(days[window], bucket))
+    window_qty = qty[window]
+
+    result = {
+        "as_of": as_of,
+        "horizon_days": horizon_days,
+        "bucket": bucket,
+        "by": by,
+        "buckets": [str(d) for d in buckets.astype("datetime64[D]")],
+        "total": {"quantity": int(window_qty.sum()), "lots": int(window.sum()),
+                  "by_bucket": np.bincount(columns, window_qty, len(buckets)).astype(np.int64).tolist()},
+        "expired": {"quantity": int(qty[expired].sum()), "lots": int(expired.sum())},
+        "series": [],
+    }
+    if by is None or not window.any():
+        return result
+
+    keys, first, rows = np.unique(lots[GROUPS[by]].to_numpy()[window], return_index=True, return_inverse=True)
+    matrix = np.bincount(rows * len(buckets) + columns, window_qty, len(keys) * len(buckets))
+    matrix = matrix.astype(np.int64).reshape(len(keys), len(buckets))
+    quantities = matrix.sum(axis=1)
+    lot_counts = np.bincount(rows, minlength=len(keys))
+    order = np.argsort(-quantities, kind="stable")[:limit]
+    names = lots["name"].to_numpy()[window][first] if by == "medicine" else None
+    for i in order:
+        key = keys[i].item()
+        entry = {"key": key, "quantity": int(quantities[i]), "lots": int(lot_counts[i]),
+                 "by_bucket": matrix[i].tolist()}
+        if by == "medicine":
+            entry["label"] = names[i]
+        result["series"].append(entry)
+    return result
+
+def label_series(result: Dict, names: Dict) -> Dict:
+    # Category/location series carry ids only; names is id -> name from the category or location
+    # service. Returns a copy, the result itself may be cached.
+    return dict(result, series=[dict(e, label=e.get("label", names.get(e["key"], str(e["key"]))))
+                                for e in result["series"]])
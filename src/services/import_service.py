@@ -0,0 +1,146 @@
+import csv
+import json
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from src.services.category_service import CategoryService
+from src.services.medicine_service import MedicineService, DATE_FMT, alert_schedule
+
+IMPORT_CHUNK_SIZE = 1000
+# Invalid lines listed in the error message; the rest are only counted
+MAX_REPORTED_ERRORS = 10
+
+class InvalidRows(ValueError):
+    # Raised before anything is written; errors is [(line_no, message)]
+    def __init__(self, errors: List[Tuple[int, str]], total: int):
+        self.errors = errors
+        self.total = total
+        listed = "; ".join(f"line {line_no}: {message}" for line_no, message in errors)
+        more = f" (and {total - len(errors)} more)" if total > len(errors) else ""
+        super().__init__(f"{total} invalid rows, nothing imported: {listed}{more}")
+
+def read_rows(path: str, fmt: Optional[str] = None) -> Iterator[Tuple[int, Dict]]:
+    # Streams (line number, row) from the file; never holds more than the current line in memory
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    with open(path, newline="", encoding="utf-8") as fh:
+        if fmt == "csv":
+            reader = csv.DictReader(fh)
+            for row in reader:
+                yield reader.line_num, row
+        elif fmt == "jsonl":
+            for line_no, line in enumerate(fh, start=1):
+                if line.strip():
+                    try:
+                        yield line_no, json.loads(line)
+                    except ValueError as e:
+                        yield line_no, e
+        else:
+            raise ValueError(f"Unsupported import format: {fmt}")
+
+def validate_rows(rows: Iterable[Tuple[int, Dict]]) -> int:
+    # Checks every row; raises InvalidRows listing the first bad lines, else returns the row count
+    count, errors, bad = 0, [], 0
+    for line_no, row in rows:
+        count += 1
+        try:
+            if isinstance(row, Exception):
+                raise ValueError(f"invalid JSON: {row}")
+            normalize_row(row)
+        except (ValueError, TypeError) as e:
+            bad += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append((line_no, str(e)))
+    if bad:
+        raise InvalidRows(errors, bad)
+    return count
+
+def normalize_row(row: Dict) -> Dict:
+    name = (row.get("name") or "").strip()
+    category_name = (row.get("category_name") or row.get("category") or "").strip()
+    expiry_date = (row.get("expiry_date") or "").strip()
+    if not name or not category_name or not expiry_date:
+        raise ValueError(f"name, category_name and expiry_date are required: {row}")
+    datetime.strptime(expiry_date, DATE_FMT)
+    quantity = int(row.get("quantity") or 1)
+    return {"name": name, "category_name": category_name, "expiry_date": expiry_date, "quantity": quantity}
+
+def chunked(rows: Iterable, size: int) -> Iterator[List]:
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+class ImportService:
+    def __init__(self, cat_service=None, med_service=None):
+        self.cat_service = cat_service or CategoryService()
+        self.med_service = med_service or MedicineService()
+        # category name -> id, filled once per name for the whole import
+        self._category_ids: Dict[str, int] = {}
+
+    def _resolve_categories(self, names: Iterable[str]):
+        missing = sorted({n for n in names if n not in self._category_ids})
+        if not missing:
+            return
+        cat_dao = self.cat_service.dao
+        for cat in cat_dao.get_categories_by_names(missing):
+            self._category_ids[cat["name"]] = cat["id"]
+        to_create = [n for n in missing if n not in self._category_ids]
+        if to_create:
+            for cat in cat_dao.create_categories(to_create):
+                self._category_ids[cat["name"]] = cat["id"]
+            self.cat_service.invalidate_cache()
+
+    def import_chunk(self, rows: List[Dict]) -> Dict:
+        self._resolve_categories(r["category_name"] for r in rows)
+
+        # Collapse repeated lines for the same medicine before touching the database
+        merged: Dict[tuple, Dict] = {}
+        for r in rows:
+            key = (r["name"], self._category_ids[r["category_name"]])
+            if key in merged:
+                merged[key]["quantity"] += r["quantity"]
+            else:
+                merged[key] = {"name": key[0], "category_id": key[1],
+                               "expiry_date": r["expiry_date"], "quantity": r["quantity"]}
+
+        # One atomic server-side merge for the whole chunk; quantities are added, not overwritten
+        saved = self.med_service.med_dao.add_medicines_bulk(list(merged.values()))
+
+        alerts = []
+        today = datetime.today().strftime(DATE_FMT)
+        for med in saved:
+            # Alerts follow the delivered lot's expiry and the category's lead times, as add_medicine does
+            expiry_date = merged[(med["name"], med["category_id"])]["expiry_date"]
+            for alert_date in alert_schedule(expiry_date, self.med_service.alert_lead_days(med["category_id"]), today):
+                alerts.append({"medicine_id": med["id"], "alert_date": alert_date, "status": "Pending"})
+        # Alerts already scheduled by an earlier delivery of the same expiry are not counted again
+        created = self.med_service.alert_dao.add_alerts(alerts)
+        self.med_service.invalidate_cache()
+        return {"rows": len(rows), "medicines": len(saved), "alerts": created}
+
+    def import_rows(self, rows: Iterable[Dict], chunk_size: int = IMPORT_CHUNK_SIZE,
+                    progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        # rows are normalized chunk by chunk as they are written; import_file validates the whole
+        # file first, so a bad line never leaves a partial import behind
+        totals = {"rows": 0, "medicines": 0, "alerts": 0}
+        start = time.perf_counter()
+        for chunk in chunked((normalize_row(r) for r in rows), chunk_size):
+            result = self.import_chunk(chunk)
+            for k, v in result.items():
+                totals[k] += v
+            elapsed = time.perf_counter() - start
+            totals["seconds"] = round(elapsed, 3)
+            totals["rows_per_sec"] = round(totals["rows"] / elapsed, 1) if elapsed else 0.0
+            if progress:
+                progress(dict(totals))
+        totals.setdefault("seconds", 0.0)
+        totals.setdefault("rows_per_sec", 0.0)
+        return totals
+
+    def import_file(self, path: str, fmt: Optional[str] = None, chunk_size: int = IMPORT_CHUNK_SIZE,
+                    progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        validate_rows(read_rows(path, fmt))
+        return self.import_rows((row for _, row in read_rows(path, fmt)), chunk_size, progress)
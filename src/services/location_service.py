@@ -0,0 +1,31 @@
+from typing import Dict, List, Optional
+from src.config import CATEGORY_CACHE_TTL
+from src.dao.factory import get_location_dao
+from src.instrumentation import instrument_methods
+from src.services.cache import get_default_cache
+
+@instrument_methods
+class LocationService:
+    # Branches change about as often as categories, so they share CATEGORY_CACHE_TTL
+    def __init__(self, dao=None, cache=None):
+        self.dao = dao or get_location_dao()
+        self.cache = cache or get_default_cache()
+
+    def add_location(self, name: str) -> Dict:
+        location = self.get_location(name)
+        if location is None:
+            location = self.dao.create_location(name)
+            self.cache.invalidate("locations")
+        return location
+
+    def get_location(self, name: str) -> Optional[Dict]:
+        key = ("locations", "by_name", name)
+        location = self.cache.get(key)
+        if location is None:
+            location = self.dao.get_location_by_name(name)
+            if location:
+                self.cache.set(key, location, CATEGORY_CACHE_TTL)
+        return location
+
+    def list_locations(self) -> List[Dict]:
+        return self.cache.get_or_load(("locations", "all"), self.dao.list_locations, CATEGORY_CACHE_TTL)
@@ -0,0 +1,95 @@
+# src/services/lot_index.py
+# In-memory FEFO index over medicine lots. Each medicine name gets a min-heap of
+# [expiry_date, lot_id, quantity, medicine_id], loaded from the DAO the first time the name is
+# dispensed or looked up. Dispensing pops/decrements from the top (O(k log n) for k lots
+# touched) and peeking the next lot to expire is O(1); neither rescans the lots table.
+import heapq
+import threading
+from typing import Callable, Dict, List, Optional
+
+EXPIRY, LOT_ID, QUANTITY, MEDICINE_ID = range(4)
+
+
+class InsufficientStock(ValueError):
+    pass
+
+
+class LotIndex:
+    def __init__(self, med_dao):
+        self.med_dao = med_dao
+        self._heaps: Dict[str, List[list]] = {}
+        self._totals: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def _heap(self, name: str) -> List[list]:
+        heap = self._heaps.get(name)
+        if heap is None:
+            heap = [[lot["expiry_date"], lot["id"], lot["quantity"], lot["medicine_id"]]
+                    for lot in self.med_dao.iter_lots(name)]
+            heapq.heapify(heap)
+            self._heaps[name] = heap
+            self._totals[name] = sum(entry[QUANTITY] for entry in heap)
+        return heap
+
+    def _drop_expired(self, name: str, heap: List[list], as_of: Optional[str]):
+        # Expired lots sit at the top of the heap and must never be dispensed
+        while as_of and heap and heap[0][EXPIRY] < as_of:
+            self._totals[name] -= heapq.heappop(heap)[QUANTITY]
+
+    def forget(self, name: Optional[str] = None):
+        # Drop cached lots (one name, or all); they reload on next use
+        with self._lock:
+            if name is None:
+                self._heaps.clear()
+                self._totals.clear()
+            else:
+                self._heaps.pop(name, None)
+                self._totals.pop(name, None)
+
+    def available(self, name: str, as_of: Optional[str] = None) -> int:
+        with self._lock:
+            heap = self._heap(name)
+            self._drop_expired(name, heap, as_of)
+            return self._totals[name]
+
+    def next_lot(self, name: str, as_of: Optional[str] = None) -> Optional[Dict]:
+        with self._lock:
+            heap = self._heap(name)
+            self._drop_expired(name, heap, as_of)
+            if not heap:
+                return None
+            top = heap[0]
+            return {"id": top[LOT_ID], "medicine_id": top[MEDICINE_ID], "name": name,
+                    "expiry_date": top[EXPIRY], "quantity": top[QUANTITY]}
+
+    def dispense(self, name: str, quantity: int, take_lots: Callable[[List[Dict]], List[Dict]],
+                 as_of: Optional[str] = None) -> List[Dict]:
+        # Plans the FEFO takes from the heap, then has take_lots apply them atomically. If that
+        # fails (e.g. another process dispensed the same lot) this name is reloaded on next use.
+        if quantity < 1:
+            raise ValueError(f"quantity to dispense must be at least 1, got {quantity}")
+        with self._lock:
+            heap = self._heap(name)
+            self._drop_expired(name, heap, as_of)
+            if quantity > self._totals[name]:
+                raise InsufficientStock(f"only {self._totals[name]} units of {name} in stock, {quantity} requested")
+            takes = []
+            left = quantity
+            while left:
+                top = heap[0]
+                take = min(left, top[QUANTITY])
+                takes.append({"lot_id": top[LOT_ID], "medicine_id": top[MEDICINE_ID],
+                              "expiry_date": top[EXPIRY], "quantity": take})
+                left -= take
+                if take == top[QUANTITY]:
+                    heapq.heappop(heap)
+                else:
+                    # Same expiry and id, so the entry keeps its place at the top
+                    top[QUANTITY] -= take
+            self._totals[name] -= quantity
+            try:
+                take_lots([{"lot_id": t["lot_id"], "quantity": t["quantity"]} for t in takes])
+            except Exception:
+                self.forget(name)
+                raise
+            return takes
@@ -1,28 +1,318 @@
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional, Tuple
 from datetime import datetime, timedelta
-from src.dao.medicine_dao import MedicineDAO
-from src.dao.alert_dao import AlertDAO
+from src.config import ALERT_LEAD_DAYS, CATEGORY_CACHE_TTL, FORECAST_TTL, SEARCH_INDEX_TTL
+from src.dao.base import StockConflict
+from src.dao.factory import get_medicine_dao, get_alert_dao
+from src.instrumentation import instrument_methods
+from src.services.cache import get_default_cache, scoped_cache
+from src.services.lot_index import InsufficientStock, LotIndex
+from src.services.search_index import MedicineSearchIndex, search_terms
 
+DATE_FMT = "%Y-%m-%d"
+EXPIRING_SOON_DAYS = 7
+STATUSES = ("Expired", "Expiring Soon", "Safe")
+
+
+def expiry_window_end(as_of: str, window_days: int) -> str:
+    return (datetime.strptime(as_of, DATE_FMT) + timedelta(days=window_days)).strftime(DATE_FMT)
+
+
+def status_bounds(status: Optional[str], as_of: str, window_days: int) -> Tuple[Optional[str], Optional[str]]:
+    # Inclusive expiry_date bounds of one of STATUSES, the same buckets classify_expiry draws
+    if status is None:
+        return None, None
+    day = timedelta(days=1)
+    window_end = expiry_window_end(as_of, window_days)
+    if status == "Expired":
+        return None, (datetime.strptime(as_of, DATE_FMT) - day).strftime(DATE_FMT)
+    if status == "Expiring Soon":
+        return as_of, window_end
+    if status == "Safe":
+        return (datetime.strptime(window_end, DATE_FMT) + day).strftime(DATE_FMT), None
+    raise ValueError(f"Unknown status: {status}")
+
+
+def alert_schedule(expiry_date: str, lead_days: List[int], as_of: str) -> List[str]:
+    # Alert dates for one lot: expiry minus each lead time. Dates already behind as_of are only
+    # kept for the shortest lead, so short-dated stock gets one due alert instead of several.
+    expiry_dt = datetime.strptime(expiry_date, DATE_FMT)
+    last_call = min(lead_days)
+    dates = []
+    for days in sorted(set(lead_days), reverse=True):
+        alert_date = (expiry_dt - timedelta(days=days)).strftime(DATE_FMT)
+        if alert_date >= as_of or days == last_call:
+            dates.append(alert_date)
+    return dates
+
+
+def _fold_status_rows(rows: List[Dict], group: str) -> Tuple[Dict, List[Dict]]:
+    # Rows of {<group>_id, <group>_name, status, medicines, quantity} -> (totals per status, one
+    # entry per group with its own totals and per-status split)
+    def empty():
+        return {"medicines": 0, "quantity": 0}
+
+    by_status = {status: empty() for status in STATUSES}
+    groups: Dict[int, Dict] = {}
+    for r in rows:
+        entry = groups.setdefault(r[f"{group}_id"], {
+            f"{group}_id": r[f"{group}_id"], group: r[f"{group}_name"], **empty(),
+            "by_status": {status: empty() for status in STATUSES},
+        })
+        if r["status"] is None:
+            continue
+        for bucket in (by_status[r["status"]], entry["by_status"][r["status"]], entry):
+            bucket["medicines"] += r["medicines"]
+            bucket["quantity"] += r["quantity"]
+    return by_status, list(groups.values())
+
+
+def _totals(by_status: Dict) -> Dict:
+    return {"medicines": sum(b["medicines"] for b in by_status.values()),
+            "quantity": sum(b["quantity"] for b in by_status.values())}
+
+
+def fold_expiry_summary(rows: List[Dict], as_of: str, window_days: int) -> Dict:
+    # Turns expiry_summary rows (one per category and status) into totals per status and per category
+    by_status, by_category = _fold_status_rows(rows, "category")
+    return {
+        "as_of": as_of,
+        "window_days": window_days,
+        "total": _totals(by_status),
+        "categories": len(by_category),
+        "by_status": by_status,
+        "by_category": by_category,
+    }
+
+
+def fold_location_summary(rows: List[Dict], as_of: str, window_days: int) -> Dict:
+    # Same for location_summary rows: chain-wide totals plus one entry per location
+    by_status, by_location = _fold_status_rows(rows, "location")
+    return {
+        "as_of": as_of,
+        "window_days": window_days,
+        "total": _totals(by_status),
+        "locations": len(by_location),
+        "by_status": by_status,
+        "by_location": by_location,
+    }
+
+
+@instrument_methods
 class MedicineService:
-    def __init__(self, med_dao=None, alert_dao=None):
-        self.med_dao = med_dao or MedicineDAO()
-        self.alert_dao = alert_dao or AlertDAO()
+    # location_id scopes stock, reports and alerts to one location (None: every location, with new
+    # stock going to the default one). Cached results are kept apart per location.
+    def __init__(self, med_dao=None, alert_dao=None, cache=None, location_id: Optional[int] = None):
+        self.med_dao = med_dao or get_medicine_dao(location_id=location_id)
+        self.alert_dao = alert_dao or get_alert_dao(location_id=location_id)
+        self.location_id = location_id if location_id is not None else getattr(self.med_dao, "location_id", None)
+        self.cache = scoped_cache(cache or get_default_cache(), self.location_id)
+        self.lots = LotIndex(self.med_dao)
 
     def add_medicine(self, name: str, expiry_date: str, category_id: int, quantity: int = 1) -> Dict:
+        # One alert per lead time of the category; restocking the same expiry adds none. The
+        # schedule parses expiry_date, so a bad date fails before any stock is written.
+        today = datetime.today().strftime(DATE_FMT)
+        dates = alert_schedule(expiry_date, self.alert_lead_days(category_id), today)
+        # Each call records a new lot with its own expiry; the medicine row rolls the lots up
         med = self.med_dao.add_medicine(name, expiry_date, category_id, quantity)
-        # Add alert 7 days before expiry
-        expiry_dt = datetime.strptime(expiry_date, "%Y-%m-%d")
-        alert_dt = expiry_dt - timedelta(days=7)
-        self.alert_dao.add_alert(med["id"], alert_dt.strftime("%Y-%m-%d"))
+        self.lots.forget(name)
+        self.alert_dao.add_alerts([{"medicine_id": med["id"], "alert_date": d, "status": "Pending"} for d in dates])
+        self.invalidate_cache()
         return med
 
+    def add_medicines(self, items: List[Dict]) -> List[Dict]:
+        # Batched add_medicine for [{name, expiry_date, category_id, quantity}]: one stock write and
+        # one alert write for the whole list. Returns one row per distinct (name, category_id).
+        if not items:
+            return []
+        for item in items:
+            datetime.strptime(item["expiry_date"], DATE_FMT)
+        meds = self.med_dao.add_medicines_bulk(items)
+        ids = {(m["name"], m["category_id"]): m["id"] for m in meds}
+        today = datetime.today().strftime(DATE_FMT)
+        alerts = {(ids[(i["name"], i["category_id"])], d): None for i in items
+                  for d in alert_schedule(i["expiry_date"], self.alert_lead_days(i["category_id"]), today)}
+        self.alert_dao.add_alerts([{"medicine_id": med_id, "alert_date": d, "status": "Pending"}
+                                   for med_id, d in alerts])
+        for name in {i["name"] for i in items}:
+            self.lots.forget(name)
+        self.invalidate_cache()
+        return meds
+
+    def alert_lead_times(self) -> Dict[int, List[int]]:
+        # Per-category lead times; categories missing here use ALERT_LEAD_DAYS
+        return self.cache.get_or_load(("schedules", "alert_lead_times"), self.alert_dao.get_lead_times,
+                                      CATEGORY_CACHE_TTL)
+
+    def alert_lead_days(self, category_id: int) -> List[int]:
+        return self.alert_lead_times().get(category_id) or ALERT_LEAD_DAYS
+
+    def set_alert_lead_times(self, category_id: int, lead_days: List[int]):
+        if not lead_days or min(lead_days) < 0:
+            raise ValueError("lead_days must be one or more non-negative day counts")
+        self.alert_dao.set_lead_times(category_id, lead_days)
+        self.cache.invalidate("schedules")
+
+    def regenerate_alerts(self, as_of: str = None) -> Dict:
+        # Rebuilds the pending alert schedule from in-stock lots; returns {"inserted", "removed"}
+        as_of = as_of or datetime.today().strftime(DATE_FMT)
+        result = self.alert_dao.regenerate_alerts(as_of, ALERT_LEAD_DAYS)
+        self.cache.invalidate("alerts")
+        return result
+
     def list_medicines(self) -> List[Dict]:
-        return self.med_dao.list_medicines()
+        return self.cache.get_or_load(("medicines", "all"), self.med_dao.list_medicines)
+
+    def iter_medicines(self, page_size: Optional[int] = None, columns: str = "*") -> Iterator[Dict]:
+        return self.med_dao.iter_medicines(page_size, columns)
+
+    def page_medicines(self, after_id: Optional[int] = None, limit: int = 50) -> List[Dict]:
+        return self.cache.get_or_load(("medicines", "page", after_id, limit),
+                                      lambda: self.med_dao.page_medicines(after_id, limit))
+
+    def search(self, query: Optional[str] = None, category: Optional[int] = None, status: Optional[str] = None,
+               limit: int = 50, offset: int = 0, as_of: str = None, window_days: int = EXPIRING_SOON_DAYS,
+               use_index: bool = False) -> List[Dict]:
+        # Medicines whose name has a word starting with every word of query, optionally within one
+        # category id and expiry status, in (name, id) order. use_index answers from the in-memory
+        # prefix index over the medicine snapshot (worth it for type-ahead in a long-lived process);
+        # otherwise the backend's indexed search runs once per distinct page.
+        as_of = as_of or datetime.today().strftime(DATE_FMT)
+        terms = search_terms(query)
+        start, end = status_bounds(status, as_of, window_days)
+        if use_index:
+            return self.search_index().search(terms, category, start, end, limit, offset)
+        return self.cache.get_or_load(
+            ("medicines", "search", tuple(terms), category, start, end, limit, offset),
+            lambda: self.med_dao.search_medicines(terms, category, start, end, limit, offset))
+
+    def search_index(self) -> MedicineSearchIndex:
+        # Kept in the "medicines" namespace, so every local stock write drops it with the snapshot
+        return self.cache.get_or_load(("medicines", "search_index"),
+                                      lambda: MedicineSearchIndex(self.list_medicines()), SEARCH_INDEX_TTL)
+
+    def iter_pending_alerts(self, page_size: Optional[int] = None) -> Iterator[Dict]:
+        return self.alert_dao.iter_pending_alerts(page_size=page_size)
+
+    def page_pending_alerts(self, after_id: Optional[int] = None, limit: int = 50) -> List[Dict]:
+        return self.cache.get_or_load(("alerts", "page", after_id, limit),
+                                      lambda: self.alert_dao.page_pending_alerts(after_id, limit))
+
+    def list_expiring_between(self, start: str, end: str) -> List[Dict]:
+        return self.cache.get_or_load(("medicines", "expiring", start, end),
+                                      lambda: self.med_dao.list_expiring_between(start, end))
+
+    def list_expiring_within(self, days: int, as_of: str = None) -> List[Dict]:
+        start = as_of or datetime.today().strftime(DATE_FMT)
+        end = (datetime.strptime(start, DATE_FMT) + timedelta(days=days)).strftime(DATE_FMT)
+        return self.list_expiring_between(start, end)
+
+    def list_expired(self, as_of: str = None, in_stock: bool = False) -> List[Dict]:
+        as_of = as_of or datetime.today().strftime(DATE_FMT)
+        return self.cache.get_or_load(("medicines", "expired", as_of, in_stock),
+                                      lambda: self.med_dao.list_expired(as_of, in_stock=in_stock))
+
+    def expire_before(self, as_of: str = None) -> int:
+        # Zeroes the quantity of all stock expiring before as_of (default today); returns rows changed
+        as_of = as_of or datetime.today().strftime(DATE_FMT)
+        updated = self.med_dao.expire_before(as_of)
+        self.lots.forget()
+        self.invalidate_cache()
+        return updated
+
+    def dispense(self, name: str, quantity: int, as_of: str = None) -> List[Dict]:
+        # First-Expired-First-Out across every lot of this medicine that has not expired yet.
+        # Returns the takes [{lot_id, medicine_id, expiry_date, quantity}]; raises InsufficientStock.
+        if quantity < 1:
+            raise ValueError(f"quantity to dispense must be at least 1, got {quantity}")
+        as_of = as_of or datetime.today().strftime(DATE_FMT)
+        try:
+            takes = self.lots.dispense(name, quantity, self.med_dao.take_lots, as_of)
+        except (StockConflict, InsufficientStock):
+            # The index may be stale (another process dispensed or restocked); reload and plan once more
+            self.lots.forget(name)
+            takes = self.lots.dispense(name, quantity, self.med_dao.take_lots, as_of)
+        self.invalidate_cache()
+        return takes
+
+    def next_lot(self, name: str, as_of: str = None) -> Optional[Dict]:
+        return self.lots.next_lot(name, as_of or datetime.today().strftime(DATE_FMT))
+
+    def list_lots(self, name: str) -> List[Dict]:
+        # FEFO order, expired lots included
+        return sorted(self.med_dao.iter_lots(name), key=lambda lot: (lot["expiry_date"], lot["id"]))
+
+    def count_by_status(self, as_of: str = None, window_days: int = EXPIRING_SOON_DAYS) -> Dict[str, int]:
+        # Three server-side counts instead of downloading the table to len() it
+        as_of = as_of or datetime.today().strftime(DATE_FMT)
+        return self.cache.get_or_load(("medicines", "counts", as_of, window_days),
+                                      lambda: self._count_by_status(as_of, window_days))
+
+    def _count_by_status(self, as_of: str, window_days: int) -> Dict[str, int]:
+        window_end = expiry_window_end(as_of, window_days)
+        total = self.med_dao.count_medicines()
+        expired = self.med_dao.count_medicines(before=as_of)
+        expiring = self.med_dao.count_medicines(start=as_of, end=window_end)
+        return {
+            "Total": total,
+            "Expired": expired,
+            "Expiring Soon": expiring,
+            "Safe": total - expired - expiring,
+        }
+
+    def get_dashboard_stats(self, as_of: str = None, window_days: int = EXPIRING_SOON_DAYS) -> Dict:
+        # Counts and quantities per status and per category in one aggregate query
+        as_of = as_of or datetime.today().strftime(DATE_FMT)
+        window_end = expiry_window_end(as_of, window_days)
+        return self.cache.get_or_load(
+            ("medicines", "stats", as_of, window_days),
+            lambda: fold_expiry_summary(self.med_dao.expiry_summary(as_of, window_end), as_of, window_days))
+
+    def location_rollup(self, as_of: str = None, window_days: int = EXPIRING_SOON_DAYS) -> Dict:
+        # Every location's counts and quantities per status from one aggregate query, whatever
+        # location this service is scoped to
+        as_of = as_of or datetime.today().strftime(DATE_FMT)
+        window_end = expiry_window_end(as_of, window_days)
+        return self.cache.get_or_load(
+            ("medicines", "rollup", as_of, window_days),
+            lambda: fold_location_summary(self.med_dao.location_summary(as_of, window_end), as_of, window_days))
+
+    def lots_frame(self):
+        # Every in-stock lot as a DataFrame, kept with the "medicines" snapshots so any local stock
+        # write drops it; FORECAST_TTL bounds how long other processes' writes stay invisible
+        from src.services.forecast import lots_frame
+        return self.cache.get_or_load(("medicines", "lots_frame"), lambda: lots_frame(self.med_dao.iter_lots()),
+                                      FORECAST_TTL)
+
+    def forecast_expiry(self, horizon_days: int = 90, bucket: str = "week", by: Optional[str] = "category",
+                        as_of: str = None, limit: Optional[int] = None) -> Dict:
+        # Quantity expiring per bucket (day/week/month) and category/location/medicine over the
+        # horizon; see src/services/forecast.py. Cached until the next stock write.
+        from src.services.forecast import forecast_expiry
+        as_of = as_of or datetime.today().strftime(DATE_FMT)
+        return self.cache.get_or_load(
+            ("medicines", "forecast", as_of, horizon_days, bucket, by, limit),
+            lambda: forecast_expiry(self.lots_frame(), as_of, horizon_days, bucket, by, limit), FORECAST_TTL)
 
     def get_expiring_soon(self) -> List[Dict]:
-        pending_alerts = self.alert_dao.list_pending_alerts()
-        today_str = datetime.today().strftime("%Y-%m-%d")
-        return [alert for alert in pending_alerts if alert["alert_date"] <= today_str]
+        today_str = datetime.today().strftime(DATE_FMT)
+        return self.cache.get_or_load(("alerts", "due", today_str),
+                                      lambda: self.alert_dao.list_pending_alerts(due_by=today_str))
 
     def mark_alert_sent(self, alert_id: int):
         self.alert_dao.update_alert_status(alert_id, "Sent")
+        self.cache.invalidate("alerts")
+
+    def mark_alerts_sent(self, alert_ids: List[int]) -> List[int]:
+        # Claims the alerts still Pending and returns their ids; only those may be sent
+        claimed = self.alert_dao.claim_pending(alert_ids, "Sent")
+        self.cache.invalidate("alerts")
+        return claimed
+
+    def unmark_alerts_sent(self, alert_ids: List[int]):
+        self.alert_dao.update_status_bulk(alert_ids, "Pending")
+        self.cache.invalidate("alerts")
+
+    def invalidate_cache(self):
+        # Any stock write can change medicine snapshots, counts and pending alerts
+        self.cache.invalidate("medicines", "alerts")
@@ -0,0 +1,55 @@
+# src/services/search_index.py
+# In-memory prefix index over medicine names, built from the cached medicine snapshot. Every
+# whitespace-separated word of a lowercased name goes into one sorted token list; a search term
+# is a bisect plus a walk over the tokens starting with it, so a query touches only matching
+# rows instead of scanning the table. Matching is the same as the DAOs' search_medicines: each
+# term must start a word of the name, case-insensitively ("amox 500" finds "Amoxicillin 500mg").
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+# Wildcard and PostgREST syntax characters never reach a LIKE pattern
+_STRIP = str.maketrans("", "", '%_*\\"(),')
+
+
+def search_terms(query: Optional[str]) -> List[str]:
+    return (query or "").lower().translate(_STRIP).split()
+
+
+class MedicineSearchIndex:
+    def __init__(self, rows: Iterable[Dict]):
+        # Rows in result order (name, id); everything else refers to them by position
+        self.rows = sorted(rows, key=lambda r: (r["name"], r["id"]))
+        words = [r["name"].lower().split() for r in self.rows]
+        self._tokens = sorted({(word, pos) for pos, ws in enumerate(words) for word in ws})
+        # " word word ..." per row, so "does a word start with t" is one substring test for " t"
+        self._spaced = [" " + " ".join(ws) for ws in words]
+
+    def _span(self, term: str) -> range:
+        # Slice of _tokens whose word starts with term
+        return range(bisect_left(self._tokens, (term,)), bisect_left(self._tokens, (term + "\U0010ffff",)))
+
+    def _matches(self, terms: List[str]) -> List[int]:
+        # Positions from the narrowest term's span; the other terms are checked against the row's words
+        narrowest, *rest = sorted(set(terms), key=lambda t: len(self._span(t)))
+        tokens, spaced = self._tokens, self._spaced
+        out = {tokens[i][1] for i in self._span(narrowest)}
+        for term in rest:
+            term = " " + term
+            out = {pos for pos in out if term in spaced[pos]}
+        return sorted(out)
+
+    def search(self, terms: List[str], category_id: Optional[int] = None, start: Optional[str] = None,
+               end: Optional[str] = None, limit: int = 50, offset: int = 0) -> List[Dict]:
+        # Same arguments and order as search_medicines on the DAOs; start/end bound expiry_date inclusively
+        positions: Iterable[int] = self._matches(terms) if terms else range(len(self.rows))
+        out = []
+        for pos in positions:
+            r = self.rows[pos]
+            if category_id is not None and r["category_id"] != category_id:
+                continue
+            if (start and r["expiry_date"] < start) or (end and r["expiry_date"] > end):
+                continue
+            out.append(r)
+            if len(out) >= offset + limit:
+                break
+        return out[offset:]
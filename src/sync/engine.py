@@ -0,0 +1,287 @@
+# src/sync/engine.py
+# Background worker that drains sync_journal into Supabase in batches and pulls remote
+# medicine changes back into the local replica using (updated_at, id) watermarks.
+# Push is at-least-once: a segment the remote applied may be sent again if its acknowledgement
+# is lost. Additive entries (stock, dispense) therefore carry an op id, "<replica id>:<journal id>",
+# which the remote records in sync_applied_ops with the write and skips when it sees it again
+# (sql/011_sync_applied_ops.sql); every other op is idempotent by itself.
+import threading
+import time
+from itertools import groupby
+from typing import Dict, List, Optional, Tuple
+from src.config import SYNC_BATCH_SIZE, SYNC_INTERVAL
+from src.dao.base import DEFAULT_LOCATION_NAME
+from src.dao.sqlite_dao import SQLiteStore, get_store
+from src.sync.journal import Journal, ALERT, CATEGORY, DISPENSE, EXPIRE, STOCK
+
+PULL_UPDATED_AT = "pull_updated_at"
+PULL_AFTER_ID = "pull_after_id"
+# Ops replayed one by one, in journal order, between batched stock/alert segments
+ORDERED_OPS = (EXPIRE, DISPENSE)
+
+# Remote medicine key: (location_id, name, category_id)
+MedKey = Tuple[int, str, int]
+
+
+class SyncEngine:
+    def __init__(self, store: Optional[SQLiteStore] = None, remote_cat_dao=None, remote_med_dao=None,
+                 remote_alert_dao=None, batch_size: int = SYNC_BATCH_SIZE, interval: float = SYNC_INTERVAL,
+                 remote_location_dao=None):
+        from src.dao.alert_dao import AlertDAO
+        from src.dao.category_dao import CategoryDAO
+        from src.dao.location_dao import LocationDAO
+        from src.dao.medicine_dao import MedicineDAO
+        self.store = store or get_store()
+        self.journal = Journal(self.store)
+        self.remote_cat_dao = remote_cat_dao or CategoryDAO()
+        self.remote_med_dao = remote_med_dao or MedicineDAO()
+        self.remote_alert_dao = remote_alert_dao or AlertDAO()
+        self.remote_location_dao = remote_location_dao or LocationDAO()
+        self.batch_size = batch_size
+        self.interval = interval
+        self._remote_categories: Dict[int, str] = {}
+        self._remote_category_cursor: Optional[int] = None
+        self._remote_locations: Dict[int, str] = {}
+        self._remote_location_cursor: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._replica_id: Optional[str] = None
+        self.pushed_total = 0
+        self.pulled_total = 0
+        self.push_batches = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_push_at: Optional[float] = None
+        self.last_pull_at: Optional[float] = None
+
+    # ------------------------
+    # Push
+    # ------------------------
+    def _op_id(self, entry_id: int) -> str:
+        if self._replica_id is None:
+            self._replica_id = self.journal.replica_id()
+        return f"{self._replica_id}:{entry_id}"
+
+    def push_once(self) -> int:
+        # Pushes up to batch_size journal entries; returns how many were acknowledged
+        with self._lock:
+            entries = self.journal.peek(self.batch_size)
+            if not entries:
+                self.last_push_at = time.time()
+                return 0
+            names = sorted({p.get("category_name") or p.get("name") for _, op, p in entries
+                            if op in (CATEGORY, STOCK, ALERT, DISPENSE)} - {None})
+            category_ids = {c["name"]: c["id"] for c in self.remote_cat_dao.create_categories(names)}
+            # Entries journaled before locations existed carry no location_name: default location
+            locations = sorted({p.get("location_name") or DEFAULT_LOCATION_NAME for _, op, p in entries
+                                if op != CATEGORY})
+            location_ids = {l["name"]: l["id"] for l in self.remote_location_dao.create_locations(locations)}
+
+            acked = 0
+            med_ids: Dict[MedKey, int] = {}
+            # Stock and alert entries commute (alerts only need their medicine to exist), so each
+            # segment between expire_before/dispense entries goes out as one bulk stock call plus
+            # one bulk alert insert. A segment is acknowledged as soon as it lands, so a failure
+            # only retries the segments after it.
+            for ordered, segment in groupby(entries, key=lambda e: e[1] in ORDERED_OPS):
+                segment = list(segment)
+                if ordered:
+                    self._push_ordered(segment, category_ids, location_ids)
+                else:
+                    self._push_segment(segment, category_ids, location_ids, med_ids)
+                self.journal.ack([entry_id for entry_id, _, _ in segment])
+                acked += len(segment)
+            self.pushed_total += acked
+            self.push_batches += 1
+            self.last_push_at = time.time()
+            return acked
+
+    @staticmethod
+    def _location_id(p: Dict, location_ids: Dict[str, int]) -> int:
+        return location_ids[p.get("location_name") or DEFAULT_LOCATION_NAME]
+
+    def _push_ordered(self, segment: List[Tuple[int, str, Dict]], category_ids: Dict[str, int],
+                      location_ids: Dict[str, int]):
+        last_expire = None
+        for entry_id, op, p in segment:
+            if op == EXPIRE:
+                # A journaled expire without location_name covered every location
+                location_id = location_ids[p["location_name"]] if p.get("location_name") else None
+                if (p["as_of"], location_id) != last_expire:
+                    self.remote_med_dao.for_location(location_id).expire_before(p["as_of"])
+                    last_expire = (p["as_of"], location_id)
+            elif op == DISPENSE:
+                self.remote_med_dao.for_location(self._location_id(p, location_ids)).dispense_fefo(
+                    p["name"], category_ids[p["category_name"]], p["quantity"], op_id=self._op_id(entry_id))
+
+    def _push_segment(self, segment: List[Tuple[int, str, Dict]], category_ids: Dict[str, int],
+                      location_ids: Dict[str, int], med_ids: Dict[MedKey, int]):
+        stock = [(entry_id, p) for entry_id, op, p in segment if op == STOCK]
+        alerts = [p for _, op, p in segment if op == ALERT]
+        if stock:
+            # One bulk call for every location in the segment; each item names its own
+            items = [{"name": p["name"], "expiry_date": p["expiry_date"], "category_id": category_ids[p["category_name"]],
+                      "location_id": self._location_id(p, location_ids), "quantity": p["quantity"],
+                      "op_id": self._op_id(entry_id)} for entry_id, p in stock]
+            for med in self.remote_med_dao.add_medicines_bulk(items):
+                med_ids[(med["location_id"], med["name"], med["category_id"])] = med["id"]
+        if alerts:
+            alert_keys = [(p, (self._location_id(p, location_ids), p["name"], category_ids[p["category_name"]]))
+                          for p in alerts]
+            missing = list({(name, cat_id) for _, (loc_id, name, cat_id) in alert_keys
+                            if (loc_id, name, cat_id) not in med_ids})
+            for med in self.remote_med_dao.get_medicines_by_keys(missing, columns="id,name,category_id,location_id"):
+                med_ids[(med["location_id"], med["name"], med["category_id"])] = med["id"]
+            self.remote_alert_dao.add_alerts([
+                {"medicine_id": med_ids[key], "alert_date": p["alert_date"], "status": p["status"]}
+                for p, key in alert_keys if key in med_ids])
+
+    def flush(self) -> int:
+        # Push until the journal is empty
+        total = 0
+        while True:
+            pushed = self.push_once()
+            total += pushed
+            if pushed < self.batch_size:
+                return total
+
+    # ------------------------
+    # Pull
+    # ------------------------
+    def _refresh_remote_categories(self):
+        for cat in self.remote_cat_dao.iter_categories(after_id=self._remote_category_cursor):
+            self._remote_categories[cat["id"]] = cat["name"]
+            self._remote_category_cursor = cat["id"]
+
+    def _refresh_remote_locations(self):
+        for loc in self.remote_location_dao.iter_locations(after_id=self._remote_location_cursor):
+            self._remote_locations[loc["id"]] = loc["name"]
+            self._remote_location_cursor = loc["id"]
+
+    def pull_once(self) -> int:
+        with self._lock:
+            updated_at = self.journal.get_state(PULL_UPDATED_AT)
+            after_id = int(self.journal.get_state(PULL_AFTER_ID, "0"))
+            self._refresh_remote_categories()
+            self._refresh_remote_locations()
+            pending = self.journal.pending_stock()
+            pulled = 0
+            conn = self.store.conn
+            page: List[Dict] = []
+            for row in self.remote_med_dao.iter_updated_since(updated_at, after_id, self.batch_size):
+                page.append(row)
+                if len(page) >= self.batch_size:
+                    pulled += self._apply(conn, page, pending)
+                    page = []
+            if page:
+                pulled += self._apply(conn, page, pending)
+            self.pulled_total += pulled
+            self.last_pull_at = time.time()
+            return pulled
+
+    def _apply(self, conn, rows: List[Dict], pending: Dict[Tuple[str, str, str], int]) -> int:
+        if any(r["category_id"] not in self._remote_categories for r in rows):
+            self._refresh_remote_categories()
+        if any(r["location_id"] not in self._remote_locations for r in rows):
+            self._refresh_remote_locations()
+        with self.store.lock, conn:
+            for r in rows:
+                cat_name = self._remote_categories.get(r["category_id"])
+                loc_name = self._remote_locations.get(r["location_id"])
+                if cat_name is None or loc_name is None:
+                    continue
+                conn.execute("INSERT INTO categories(name) VALUES (?) ON CONFLICT(name) DO NOTHING", (cat_name,))
+                local_cat = conn.execute("SELECT id FROM categories WHERE name = ?", (cat_name,)).fetchone()["id"]
+                conn.execute("INSERT INTO locations(name) VALUES (?) ON CONFLICT(name) DO NOTHING", (loc_name,))
+                local_loc = conn.execute("SELECT id FROM locations WHERE name = ?", (loc_name,)).fetchone()["id"]
+                # Remote total plus whatever this site has added but not pushed yet
+                quantity = r["quantity"] + pending.get((loc_name, r["name"], cat_name), 0)
+                med_id = conn.execute(
+                    "INSERT INTO medicines(name, expiry_date, category_id, location_id, quantity) VALUES (?, ?, ?, ?, 0) "
+                    "ON CONFLICT(location_id, name, category_id) DO UPDATE SET name = excluded.name RETURNING id",
+                    (r["name"], r["expiry_date"], local_cat, local_loc)).fetchone()["id"]
+                self._reconcile_lots(conn, med_id, quantity, r["expiry_date"])
+            last = rows[-1]
+            conn.execute("INSERT INTO sync_state(key, value) VALUES (?, ?) "
+                         "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (PULL_UPDATED_AT, last["updated_at"]))
+            conn.execute("INSERT INTO sync_state(key, value) VALUES (?, ?) "
+                         "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (PULL_AFTER_ID, str(last["id"])))
+        return len(rows)
+
+    @staticmethod
+    def _reconcile_lots(conn, med_id: int, quantity: int, expiry_date: str):
+        # The remote sends roll-ups, not lots. Local lots are brought to the pulled total so the
+        # medicines row (kept by the lot triggers) and FEFO dispensing agree: a surplus is booked
+        # as one lot at the remote's earliest expiry, a shortfall is taken from the local lots
+        # earliest expiry first.
+        have = conn.execute("SELECT COALESCE(SUM(quantity), 0) AS n FROM medicine_lots WHERE medicine_id = ?",
+                            (med_id,)).fetchone()["n"]
+        if quantity > have:
+            conn.execute("INSERT INTO medicine_lots(medicine_id, expiry_date, quantity) VALUES (?, ?, ?)",
+                         (med_id, expiry_date, quantity - have))
+            return
+        short = have - quantity
+        for lot in conn.execute("SELECT id, quantity FROM medicine_lots WHERE medicine_id = ? AND quantity > 0 "
+                                "ORDER BY expiry_date, id", (med_id,)).fetchall():
+            if short <= 0:
+                break
+            take = min(short, lot["quantity"])
+            conn.execute("UPDATE medicine_lots SET quantity = quantity - ? WHERE id = ?", (take, lot["id"]))
+            short -= take
+
+    # ------------------------
+    # Worker
+    # ------------------------
+    def sync_once(self) -> Dict:
+        # Push before pull so pulled totals already include this site's deltas
+        pushed = self.flush()
+        pulled = self.pull_once()
+        return {"pushed": pushed, "pulled": pulled}
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync_once()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sync-engine", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def metrics(self) -> Dict:
+        oldest = self.journal.oldest_created_at()
+        return {
+            "queue_depth": self.journal.depth(),
+            "lag_seconds": round(time.time() - oldest, 3) if oldest else 0.0,
+            "pushed_total": self.pushed_total,
+            "pulled_total": self.pulled_total,
+            "push_batches": self.push_batches,
+            "last_push_at": self.last_push_at,
+            "last_pull_at": self.last_pull_at,
+            "pull_watermark": self.journal.get_state(PULL_UPDATED_AT),
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "running": bool(self._thread and self._thread.is_alive()),
+        }
+
+
+_engine: Optional[SyncEngine] = None
+_engine_lock = threading.Lock()
+
+def get_sync_engine() -> SyncEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SyncEngine()
+        return _engine
@@ -0,0 +1,212 @@
+# src/sync/journal.py
+# Local-first DAOs: every write lands in the SQLite replica and, in the same transaction,
+# in sync_journal. SyncEngine later pushes the journal to Supabase.
+import json
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from src.dao.base import DEFAULT_LOCATION_NAME
+from src.dao.sqlite_dao import SQLiteStore, SQLiteAlertDAO, SQLiteCategoryDAO, SQLiteMedicineDAO, get_store
+
+# Journal ops
+CATEGORY = "category"
+STOCK = "stock"
+ALERT = "alert"
+EXPIRE = "expire_before"
+DISPENSE = "dispense"
+
+REPLICA_ID = "replica_id"
+
+
+class Journal:
+    def __init__(self, store: Optional[SQLiteStore] = None):
+        self.store = store or get_store()
+
+    def append(self, op: str, payload: Dict):
+        # Caller holds store.lock inside an open transaction, so the row and its journal entry commit together
+        self.store.conn.execute(
+            "INSERT INTO sync_journal(op, payload, created_at) VALUES (?, ?, ?)",
+            (op, json.dumps(payload), time.time()))
+
+    def peek(self, limit: int) -> List[Tuple[int, str, Dict]]:
+        rows = self.store.query("SELECT id, op, payload FROM sync_journal ORDER BY id LIMIT ?", (limit,))
+        return [(r["id"], r["op"], json.loads(r["payload"])) for r in rows]
+
+    def ack(self, entry_ids: List[int]):
+        if entry_ids:
+            self.store.write_many("DELETE FROM sync_journal WHERE id = ?", ((i,) for i in entry_ids))
+
+    def depth(self) -> int:
+        return self.store.query_one("SELECT COUNT(*) AS n FROM sync_journal")["n"]
+
+    def oldest_created_at(self) -> Optional[float]:
+        return self.store.query_one("SELECT MIN(created_at) AS t FROM sync_journal")["t"]
+
+    def pending_stock(self) -> Dict[Tuple[str, str, str], int]:
+        # Unpushed quantity deltas per (location_name, name, category_name); added on top of pulled
+        # remote quantities. Entries journaled before locations existed belong to the default location.
+        deltas: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        for r in self.store.query(
+                "SELECT COALESCE(json_extract(payload, '$.location_name'), ?) AS loc, "
+                "json_extract(payload, '$.name') AS name, json_extract(payload, '$.category_name') AS cat, "
+                "SUM(CASE WHEN op = ? THEN -1 ELSE 1 END * json_extract(payload, '$.quantity')) AS qty "
+                "FROM sync_journal WHERE op IN (?, ?) GROUP BY loc, name, cat",
+                (DEFAULT_LOCATION_NAME, DISPENSE, STOCK, DISPENSE)):
+            deltas[(r["loc"], r["name"], r["cat"])] = r["qty"]
+        return deltas
+
+    def get_state(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self.store.query_one("SELECT value FROM sync_state WHERE key = ?", (key,))
+        return row["value"] if row else default
+
+    def replica_id(self) -> str:
+        # Random id of this replica, created on first use; with a journal id it makes the op id
+        # the remote records so a replayed push is applied once
+        value = self.get_state(REPLICA_ID)
+        if value is None:
+            self.store.write("INSERT INTO sync_state(key, value) VALUES (?, ?) ON CONFLICT(key) DO NOTHING",
+                             (REPLICA_ID, uuid.uuid4().hex))
+            value = self.get_state(REPLICA_ID)
+        return value
+
+    def set_state(self, key: str, value: Optional[str]):
+        self.store.write("INSERT INTO sync_state(key, value) VALUES (?, ?) "
+                         "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+
+def _category_name(conn, category_id: int) -> Optional[str]:
+    row = conn.execute("SELECT name FROM categories WHERE id = ?", (category_id,)).fetchone()
+    return row["name"] if row else None
+
+
+def _location_name(conn, location_id: Optional[int]) -> Optional[str]:
+    if location_id is None:
+        return None
+    row = conn.execute("SELECT name FROM locations WHERE id = ?", (location_id,)).fetchone()
+    return row["name"] if row else None
+
+
+def _medicine_key(conn, medicine_id: int) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    # (name, category_name, location_name): how a medicine is identified across replicas
+    row = conn.execute(
+        "SELECT m.name AS name, c.name AS category_name, l.name AS location_name FROM medicines m "
+        "JOIN categories c ON c.id = m.category_id JOIN locations l ON l.id = m.location_id "
+        "WHERE m.id = ?", (medicine_id,)).fetchone()
+    return (row["name"], row["category_name"], row["location_name"]) if row else (None, None, None)
+
+
+class JournaledCategoryDAO(SQLiteCategoryDAO):
+    def __init__(self, store: Optional[SQLiteStore] = None, journal: Optional[Journal] = None):
+        super().__init__(store)
+        self.journal = journal or Journal(self.store)
+
+    def _create(self, conn, name: str) -> Dict:
+        row = conn.execute("INSERT INTO categories(name) VALUES (?) ON CONFLICT(name) DO NOTHING RETURNING *",
+                           (name,)).fetchone()
+        if row is None:
+            return dict(conn.execute("SELECT * FROM categories WHERE name = ?", (name,)).fetchone())
+        self.journal.append(CATEGORY, {"name": name})
+        return dict(row)
+
+    def create_category(self, name: str) -> Optional[Dict]:
+        with self.store.lock, self.store.conn:
+            return self._create(self.store.conn, name)
+
+    def create_categories(self, names: List[str]) -> List[Dict]:
+        with self.store.lock, self.store.conn:
+            return [self._create(self.store.conn, n) for n in names]
+
+
+class JournaledMedicineDAO(SQLiteMedicineDAO):
+    def __init__(self, store: Optional[SQLiteStore] = None, journal: Optional[Journal] = None,
+                 location_id: Optional[int] = None):
+        super().__init__(store, location_id)
+        self.journal = journal or Journal(self.store)
+
+    def _add(self, conn, name: str, expiry_date: str, category_id: int, quantity: int,
+             location_id: Optional[int] = None) -> Dict:
+        row = self._add_stock(conn, name, expiry_date, category_id, quantity, location_id)
+        # Journal the delta, not the new total: remote merges it additively. Locations and
+        # categories travel by name; ids differ between replicas.
+        self.journal.append(STOCK, {"name": name, "category_name": _category_name(conn, category_id),
+                                    "location_name": _location_name(conn, row["location_id"]),
+                                    "expiry_date": expiry_date, "quantity": quantity})
+        return row
+
+    def add_medicine(self, name: str, expiry_date: str, category_id: int, quantity: int = 1) -> Dict:
+        with self.store.lock, self.store.conn:
+            return self._add(self.store.conn, name, expiry_date, category_id, quantity)
+
+    def add_medicines_bulk(self, items: List[Dict]) -> List[Dict]:
+        with self.store.lock, self.store.conn:
+            return [self._add(self.store.conn, i["name"], i["expiry_date"], i["category_id"],
+                              int(i.get("quantity", 1)), i.get("location_id")) for i in items]
+
+    def expire_before(self, as_of: str) -> int:
+        # location_name None expires every location, as it did here
+        with self.store.lock, self.store.conn:
+            updated = self._expire(self.store.conn, as_of)
+            self.journal.append(EXPIRE, {"as_of": as_of,
+                                         "location_name": _location_name(self.store.conn, self.location_id)})
+            return updated
+
+    def take_lots(self, takes: List[Dict]) -> List[Dict]:
+        # Lots are local bookkeeping; Supabase gets the dispensed total per medicine and runs its
+        # own FEFO over all sites' lots (dispense_medicine in sql/005_medicine_lots.sql)
+        with self.store.lock, self.store.conn:
+            conn = self.store.conn
+            lots = self._take_lots(conn, takes)
+            taken: Dict[int, int] = defaultdict(int)
+            for lot, t in zip(lots, takes):
+                taken[lot["medicine_id"]] += t["quantity"]
+            for medicine_id, quantity in taken.items():
+                name, category_name, location_name = _medicine_key(conn, medicine_id)
+                self.journal.append(DISPENSE, {"name": name, "category_name": category_name,
+                                               "location_name": location_name, "quantity": quantity})
+            return lots
+
+
+class JournaledAlertDAO(SQLiteAlertDAO):
+    # Alert creation is replicated; delivery status (update_alert_status / update_status_bulk)
+    # stays with the site that dispatches the alerts.
+    def __init__(self, store: Optional[SQLiteStore] = None, journal: Optional[Journal] = None,
+                 location_id: Optional[int] = None):
+        super().__init__(store, location_id)
+        self.journal = journal or Journal(self.store)
+
+    def _add(self, conn, medicine_id: int, alert_date: str, status: str) -> Optional[Dict]:
+        # Only newly scheduled alerts are journaled; a duplicate is a no-op on both sides
+        row = conn.execute(self.ADD_SQL + " RETURNING *", (medicine_id, alert_date, status, medicine_id)).fetchone()
+        if row is None:
+            return None
+        self._journal(conn, medicine_id, alert_date, status)
+        return dict(row)
+
+    def _journal(self, conn, medicine_id: int, alert_date: str, status: str, keys: Optional[Dict] = None):
+        key = keys.get(medicine_id) if keys is not None else None
+        if key is None:
+            key = _medicine_key(conn, medicine_id)
+            if keys is not None:
+                keys[medicine_id] = key
+        self.journal.append(ALERT, {"name": key[0], "category_name": key[1], "location_name": key[2],
+                                    "alert_date": alert_date, "status": status})
+
+    def add_alert(self, medicine_id: int, alert_date: str, status: str = "Pending") -> Optional[Dict]:
+        with self.store.lock, self.store.conn:
+            return self._add(self.store.conn, medicine_id, alert_date, status)
+
+    def add_alerts(self, alerts: List[Dict]) -> int:
+        with self.store.lock, self.store.conn:
+            return sum(self._add(self.store.conn, a["medicine_id"], a["alert_date"], a.get("status", "Pending"))
+                       is not None for a in alerts)
+
+    def regenerate_alerts(self, as_of: str, default_lead_days: List[int]) -> Dict:
+        # New alerts are replicated like add_alerts; pruning pending alerts is local, like delivery
+        # status. Lead times (alert_lead_times) are site configuration and are not journaled either.
+        with self.store.lock, self.store.conn:
+            inserted, removed = self._regenerate(self.store.conn, as_of, default_lead_days)
+            keys: Dict[int, Tuple[Optional[str], Optional[str], Optional[str]]] = {}
+            for row in inserted:
+                self._journal(self.store.conn, row["medicine_id"], row["alert_date"], row["status"], keys)
+        return {"inserted": len(inserted), "removed": removed}
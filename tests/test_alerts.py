@@ -0,0 +1,108 @@
+# tests/test_alerts.py
+# Alert schedule (user-018): alerts are idempotent per (medicine, alert_date), follow per-category
+# lead times, and the scheduler only sends alerts it could still claim as Pending.
+import io
+import json
+from datetime import date, timedelta
+import pytest
+from src.dao.alert_dao import AlertDAO
+from src.dao.category_dao import CategoryDAO
+from src.dao.medicine_dao import MedicineDAO
+from src.dao.memory_client import MemoryClient
+from src.dao.sqlite_dao import SQLiteAlertDAO, SQLiteCategoryDAO, SQLiteMedicineDAO, SQLiteStore
+from src.services.alert_scheduler import AlertScheduler, StdoutSender
+from src.services.cache import TTLCache
+from src.services.medicine_service import MedicineService
+
+
+def days_from_today(days):
+    return (date.today() + timedelta(days=days)).isoformat()
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def service(request, tmp_path):
+    if request.param == "memory":
+        client = MemoryClient()
+        cat_dao, med_dao, alert_dao = CategoryDAO(client), MedicineDAO(client), AlertDAO(client)
+    else:
+        store = SQLiteStore(str(tmp_path / "alerts.db"))
+        cat_dao, med_dao, alert_dao = SQLiteCategoryDAO(store), SQLiteMedicineDAO(store), SQLiteAlertDAO(store)
+    svc = MedicineService(med_dao, alert_dao, TTLCache())
+    svc.category_id = cat_dao.create_category("Antibiotics")["id"]
+    return svc
+
+
+def pending(svc):
+    return sorted((a["medicine_id"], a["alert_date"]) for a in svc.alert_dao.list_pending_alerts())
+
+
+def test_bad_expiry_date_writes_nothing(service):
+    with pytest.raises(ValueError):
+        service.add_medicine("Amoxicillin", "2026-13-45", service.category_id, 5)
+    assert service.list_medicines() == []
+    assert pending(service) == []
+
+def test_add_alert_is_idempotent(service):
+    med = service.add_medicine("Amoxicillin", days_from_today(60), service.category_id, 1)
+    service.alert_dao.add_alert(med["id"], "2099-01-01")
+    assert service.alert_dao.add_alert(med["id"], "2099-01-01") is None
+    assert pending(service).count((med["id"], "2099-01-01")) == 1
+
+
+def test_restocking_the_same_expiry_schedules_no_new_alerts(service):
+    expiry = days_from_today(60)
+    service.add_medicine("Amoxicillin", expiry, service.category_id, 1)
+    before = pending(service)
+    service.add_medicine("Amoxicillin", expiry, service.category_id, 4)
+    assert pending(service) == before
+    assert service.regenerate_alerts() == {"inserted": 0, "removed": 0}
+
+
+def test_category_lead_times(service):
+    service.set_alert_lead_times(service.category_id, [30, 7])
+    med = service.add_medicine("Amoxicillin", days_from_today(60), service.category_id, 1)
+    assert pending(service) == [(med["id"], days_from_today(30)), (med["id"], days_from_today(53))]
+
+
+def test_set_lead_times_replaces_the_schedule_in_one_write():
+    client = MemoryClient()
+    cat = CategoryDAO(client).create_category("Antibiotics")
+    alert_dao = AlertDAO(client)
+    alert_dao.set_lead_times(cat["id"], [30, 7])
+    before = client.round_trips
+    alert_dao.set_lead_times(cat["id"], [14, 60, 14])
+    assert client.round_trips - before == 1
+    assert alert_dao.get_lead_times() == {cat["id"]: [60, 14]}
+
+def test_scheduler_skips_alerts_removed_by_regenerate(service):
+    service.add_medicine("Amoxicillin", days_from_today(3), service.category_id, 5)
+    service.add_medicine("Cefalexin", days_from_today(300), service.category_id, 5)
+    out = io.StringIO()
+    scheduler = AlertScheduler(service, sender=StdoutSender(out))
+    scheduler.refresh()
+    service.dispense("Amoxicillin", 5)
+    assert service.regenerate_alerts()["removed"] == 1
+    assert scheduler.dispatch_due() == 0
+    assert out.getvalue() == ""
+
+
+class FailingSender:
+    def send(self, alerts):
+        raise ConnectionError("sender down")
+
+
+def test_failed_send_leaves_alerts_pending_and_queued(service):
+    service.add_medicine("Amoxicillin", days_from_today(3), service.category_id, 5)
+    due = [a for a in service.alert_dao.list_pending_alerts(due_by=days_from_today(0))]
+    assert due
+    scheduler = AlertScheduler(service, sender=FailingSender())
+    scheduler.refresh()
+    with pytest.raises(ConnectionError):
+        scheduler.dispatch_due()
+    assert len(service.alert_dao.list_pending_alerts(due_by=days_from_today(0))) == len(due)
+
+    out = io.StringIO()
+    scheduler.sender = StdoutSender(out)
+    assert scheduler.dispatch_due() == len(due)
+    assert [json.loads(line)["id"] for line in out.getvalue().splitlines()] == [a["id"] for a in due]
+    assert service.alert_dao.list_pending_alerts(due_by=days_from_today(0)) == []
@@ -0,0 +1,42 @@
+# tests/test_category_service.py
+# CategoryService (user-006): name lookups come from the cache, and a miss costs one upsert.
+from src.dao.category_dao import CategoryDAO
+from src.dao.memory_client import MemoryClient
+from src.services.cache import TTLCache
+from src.services.category_service import CategoryService
+
+
+def test_add_category_is_one_round_trip_then_cached():
+    client = MemoryClient()
+    service = CategoryService(CategoryDAO(client), TTLCache())
+    before = client.round_trips
+    created = service.add_category("Antibiotics")
+    assert client.round_trips - before == 1
+    assert service.add_category("Antibiotics") == created
+    assert client.round_trips - before == 1
+
+
+def test_existing_category_is_returned_not_duplicated():
+    client = MemoryClient()
+    existing = CategoryDAO(client).create_category("Antibiotics")
+    service = CategoryService(CategoryDAO(client), TTLCache())
+    assert service.add_category("Antibiotics")["id"] == existing["id"]
+    assert [c["name"] for c in service.list_categories()] == ["Antibiotics"]
+
+
+def test_new_category_shows_in_the_cached_list():
+    service = CategoryService(CategoryDAO(MemoryClient()), TTLCache())
+    service.add_category("Antibiotics")
+    assert [c["name"] for c in service.list_categories()] == ["Antibiotics"]
+    service.add_category("Analgesics")
+    assert [c["name"] for c in service.list_categories()] == ["Antibiotics", "Analgesics"]
+
+
+def test_get_category_shares_the_name_cache():
+    client = MemoryClient()
+    service = CategoryService(CategoryDAO(client), TTLCache())
+    created = service.add_category("Antibiotics")
+    before = client.round_trips
+    assert service.get_category("Antibiotics") == created
+    assert service.get_category("Analgesics") is None
+    assert client.round_trips - before == 1
@@ -0,0 +1,68 @@
+# tests/test_import_service.py
+# Batch import (user-004): the whole file is validated before the first write, bad lines are
+# reported by line number, and valid files add their quantities in batched writes.
+import pytest
+from src.dao.alert_dao import AlertDAO
+from src.dao.category_dao import CategoryDAO
+from src.dao.medicine_dao import MedicineDAO
+from src.dao.memory_client import MemoryClient
+from src.dao.sqlite_dao import SQLiteAlertDAO, SQLiteCategoryDAO, SQLiteMedicineDAO, SQLiteStore
+from src.services.cache import TTLCache
+from src.services.category_service import CategoryService
+from src.services.import_service import ImportService, InvalidRows
+from src.services.medicine_service import MedicineService
+
+CSV_HEADER = "name,category_name,expiry_date,quantity\n"
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def importer(request, tmp_path):
+    if request.param == "memory":
+        client = MemoryClient()
+        cat_dao, med_dao, alert_dao = CategoryDAO(client), MedicineDAO(client), AlertDAO(client)
+    else:
+        store = SQLiteStore(str(tmp_path / "import.db"))
+        cat_dao, med_dao, alert_dao = SQLiteCategoryDAO(store), SQLiteMedicineDAO(store), SQLiteAlertDAO(store)
+    cache = TTLCache()
+    return ImportService(CategoryService(cat_dao, cache), MedicineService(med_dao, alert_dao, cache))
+
+
+def quantities(importer):
+    importer.med_service.invalidate_cache()
+    return {m["name"]: m["quantity"] for m in importer.med_service.list_medicines()}
+
+
+def test_csv_import_adds_quantities_and_creates_categories(importer, tmp_path):
+    path = tmp_path / "stock.csv"
+    path.write_text(CSV_HEADER + "".join(f"Drug-{i % 5},Cat-{i % 5 % 2},2030-01-01,2\n" for i in range(20)))
+    result = importer.import_file(str(path), chunk_size=7)
+    assert result["rows"] == 20
+    assert quantities(importer) == {f"Drug-{i}": 8 for i in range(5)}
+    assert sorted(c["name"] for c in importer.cat_service.list_categories()) == ["Cat-0", "Cat-1"]
+
+    importer.import_file(str(path), chunk_size=7)
+    assert quantities(importer) == {f"Drug-{i}": 16 for i in range(5)}
+
+
+def test_invalid_csv_lines_are_reported_and_nothing_is_written(importer, tmp_path):
+    path = tmp_path / "stock.csv"
+    lines = [f"Drug-{i},Cat,2030-01-01,1\n" for i in range(30)]
+    lines[11] = "Drug-11,Cat,2030-13-01,1\n"
+    lines[24] = ",Cat,2030-01-01,1\n"
+    path.write_text(CSV_HEADER + "".join(lines))
+    with pytest.raises(InvalidRows) as raised:
+        importer.import_file(str(path), chunk_size=5)
+    # Line 1 is the header
+    assert [line_no for line_no, _ in raised.value.errors] == [13, 26]
+    assert raised.value.total == 2
+    assert quantities(importer) == {}
+
+
+def test_invalid_json_line_is_reported(importer, tmp_path):
+    path = tmp_path / "stock.jsonl"
+    path.write_text('{"name": "Aspirin", "category_name": "Pain", "expiry_date": "2030-01-01", "quantity": 3}\n'
+                    '{"name": "Ibuprofen", \n')
+    with pytest.raises(InvalidRows) as raised:
+        importer.import_file(str(path))
+    assert [line_no for line_no, _ in raised.value.errors] == [2]
+    assert quantities(importer) == {}
@@ -0,0 +1,33 @@
+# tests/test_instrumentation.py
+# Profiles (user-017): a profile begun with enable=True records only in its own context, so the
+# app's ?debug=1 rerun does not leave recording on for other sessions or later reruns.
+import threading
+from src.instrumentation import Recorder
+
+
+def record_one(recorder):
+    with recorder.call("query", "medicines.select", site="test"):
+        pass
+
+
+def test_enable_is_scoped_to_the_profile():
+    recorder = Recorder()
+    with recorder.profile("rerun", enable=True) as profile:
+        record_one(recorder)
+        other = threading.Thread(target=record_one, args=(recorder,))
+        other.start()
+        other.join()
+    record_one(recorder)
+    assert not recorder.enabled
+    assert len(profile.events) == 1
+    assert [t["calls"] for t in recorder.totals()] == [1]
+
+
+def test_begin_resets_a_request_that_never_ended():
+    recorder = Recorder()
+    recorder.begin("rerun", enable=True)
+    assert recorder.enabled
+    profile = recorder.begin("rerun")
+    assert not recorder.enabled
+    record_one(recorder)
+    assert recorder.end(profile).events == []
@@ -0,0 +1,108 @@
+# tests/test_lots.py
+# Lot inventory (user-015): FEFO dispensing across lots, the medicines roll-up and the expiry
+# summary that counts each lot's units at its own expiry date.
+import pytest
+from src.dao.alert_dao import AlertDAO
+from src.dao.category_dao import CategoryDAO
+from src.dao.medicine_dao import MedicineDAO
+from src.dao.memory_client import MemoryClient
+from src.dao.sqlite_dao import SQLiteAlertDAO, SQLiteCategoryDAO, SQLiteMedicineDAO, SQLiteStore
+from src.services.cache import TTLCache
+from src.services.lot_index import InsufficientStock
+from src.services.medicine_service import MedicineService
+
+AS_OF = "2026-10-18"
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def service(request, tmp_path):
+    # MedicineService with one "Analgesics" category; the category id is on service.category_id
+    if request.param == "memory":
+        client = MemoryClient()
+        cat_dao, med_dao, alert_dao = CategoryDAO(client), MedicineDAO(client), AlertDAO(client)
+    else:
+        store = SQLiteStore(str(tmp_path / "lots.db"))
+        cat_dao, med_dao, alert_dao = SQLiteCategoryDAO(store), SQLiteMedicineDAO(store), SQLiteAlertDAO(store)
+    svc = MedicineService(med_dao, alert_dao, TTLCache())
+    svc.category_id = cat_dao.create_category("Analgesics")["id"]
+    return svc
+
+
+def stock_aspirin(svc):
+    for expiry, quantity in (("2026-10-10", 5), ("2026-10-25", 3), ("2027-03-01", 10)):
+        svc.add_medicine("Aspirin", expiry, svc.category_id, quantity)
+
+
+def test_rollup_follows_lots(service):
+    stock_aspirin(service)
+    med = service.list_medicines()[0]
+    assert med["quantity"] == 18
+    assert med["expiry_date"] == "2026-10-10"
+    assert [(l["expiry_date"], l["quantity"]) for l in service.list_lots("Aspirin")] == [
+        ("2026-10-10", 5), ("2026-10-25", 3), ("2027-03-01", 10)]
+
+
+def test_dispense_takes_earliest_unexpired_lots_first(service):
+    stock_aspirin(service)
+    takes = service.dispense("Aspirin", 5, as_of=AS_OF)
+    # The expired 2026-10-10 lot is skipped; 3 from the next lot, 2 from the last
+    assert [(t["expiry_date"], t["quantity"]) for t in takes] == [("2026-10-25", 3), ("2027-03-01", 2)]
+    assert [l["quantity"] for l in service.list_lots("Aspirin")] == [5, 8]
+    service.invalidate_cache()
+    assert service.list_medicines()[0]["quantity"] == 13
+
+
+def test_dispense_more_than_unexpired_stock_fails_without_taking(service):
+    stock_aspirin(service)
+    with pytest.raises(InsufficientStock):
+        service.dispense("Aspirin", 14, as_of=AS_OF)
+    assert [l["quantity"] for l in service.list_lots("Aspirin")] == [5, 3, 10]
+
+
+@pytest.mark.parametrize("quantity", [0, -50])
+def test_dispense_rejects_non_positive_quantities(service, quantity):
+    stock_aspirin(service)
+    with pytest.raises(ValueError):
+        service.dispense("Aspirin", quantity, as_of=AS_OF)
+    lot_id = service.list_lots("Aspirin")[-1]["id"]
+    with pytest.raises(ValueError):
+        service.med_dao.take_lots([{"lot_id": lot_id, "quantity": quantity}])
+    assert [l["quantity"] for l in service.list_lots("Aspirin")] == [5, 3, 10]
+
+
+def test_expiry_summary_counts_units_at_each_lots_expiry(service):
+    stock_aspirin(service)
+    stats = service.get_dashboard_stats(as_of=AS_OF)
+    assert {status: b["quantity"] for status, b in stats["by_status"].items()} == {
+        "Expired": 5, "Expiring Soon": 3, "Safe": 10}
+    # The medicine itself is counted once, at its roll-up (earliest in-stock) expiry
+    assert stats["total"]["medicines"] == 1
+    assert stats["by_status"]["Expired"]["medicines"] == 1
+
+    service.dispense("Aspirin", 4, as_of=AS_OF)
+    service.expire_before(AS_OF)
+    stats = service.get_dashboard_stats(as_of=AS_OF)
+    assert {status: b["quantity"] for status, b in stats["by_status"].items()} == {
+        "Expired": 0, "Expiring Soon": 0, "Safe": 9}
+
+
+def test_deleted_lots_and_medicines_leave_the_summary(tmp_path):
+    # SQLite keeps the summary with triggers; deleting a medicine cascades to its lots
+    store = SQLiteStore(str(tmp_path / "lots.db"))
+    svc = MedicineService(SQLiteMedicineDAO(store), SQLiteAlertDAO(store), TTLCache())
+    svc.category_id = SQLiteCategoryDAO(store).create_category("Analgesics")["id"]
+    stock_aspirin(svc)
+    svc.add_medicine("Ibuprofen", "2027-03-01", svc.category_id, 4)
+
+    def summary():
+        return {r["expiry_date"]: (r["medicines"], r["quantity"]) for r in store.query(
+            "SELECT expiry_date, medicines, quantity FROM medicine_expiry_summary "
+            "WHERE medicines <> 0 OR quantity <> 0")}
+
+    with store.conn:
+        store.conn.execute("DELETE FROM medicine_lots WHERE expiry_date = '2026-10-25'")
+    assert summary() == {"2026-10-10": (1, 5), "2027-03-01": (1, 14)}
+    with store.conn:
+        store.conn.execute("DELETE FROM alerts WHERE medicine_id IN (SELECT id FROM medicines WHERE name = 'Aspirin')")
+        store.conn.execute("DELETE FROM medicines WHERE name = 'Aspirin'")
+    assert summary() == {"2027-03-01": (1, 4)}
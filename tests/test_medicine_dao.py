@@ -0,0 +1,106 @@
+# tests/test_medicine_dao.py
+# MedicineDAO write paths on the in-memory Supabase stand-in and on SQLite: restocking is an
+# atomic increment (no lost updates under concurrency) and every write is a single round trip.
+import threading
+import pytest
+from src.dao.alert_dao import AlertDAO
+from src.dao.category_dao import CategoryDAO
+from src.dao.medicine_dao import MedicineDAO
+from src.dao.memory_client import MemoryClient
+from src.dao.sqlite_dao import SQLiteCategoryDAO, SQLiteMedicineDAO, SQLiteStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def daos(request, tmp_path):
+    # (category DAO, medicine DAO)
+    if request.param == "memory":
+        client = MemoryClient()
+        return CategoryDAO(client), MedicineDAO(client)
+    store = SQLiteStore(str(tmp_path / "medicines.db"))
+    return SQLiteCategoryDAO(store), SQLiteMedicineDAO(store)
+
+
+def test_restock_adds_to_the_existing_row(daos):
+    cat_dao, med_dao = daos
+    cat = cat_dao.create_category("Antibiotics")
+    first = med_dao.add_medicine("Amoxicillin", "2030-01-01", cat["id"], 3)
+    second = med_dao.add_medicine("Amoxicillin", "2030-01-01", cat["id"], 4)
+    assert second["id"] == first["id"]
+    assert second["quantity"] == 7
+    assert [m["quantity"] for m in med_dao.list_medicines()] == [7]
+
+
+def test_concurrent_restocks_lose_no_updates(daos):
+    cat_dao, med_dao = daos
+    cat = cat_dao.create_category("Antibiotics")
+    threads, per_thread = 8, 25
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        barrier.wait()
+        for _ in range(per_thread):
+            med_dao.add_medicine("Amoxicillin", "2030-01-01", cat["id"], 1)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    assert med_dao.list_medicines()[0]["quantity"] == threads * per_thread
+
+
+def test_add_medicines_bulk_sums_repeated_items(daos):
+    cat_dao, med_dao = daos
+    cat = cat_dao.create_category("Antibiotics")
+    items = [{"name": "Amoxicillin", "expiry_date": "2030-01-01", "category_id": cat["id"], "quantity": 2},
+             {"name": "Amoxicillin", "expiry_date": "2030-06-01", "category_id": cat["id"], "quantity": 5},
+             {"name": "Cefalexin", "expiry_date": "2031-01-01", "category_id": cat["id"], "quantity": 1}]
+    med_dao.add_medicines_bulk(items)
+    by_name = {m["name"]: m for m in med_dao.list_medicines()}
+    assert by_name["Amoxicillin"]["quantity"] == 7
+    assert by_name["Amoxicillin"]["expiry_date"] == "2030-01-01"
+    assert by_name["Cefalexin"]["quantity"] == 1
+
+
+def test_writes_are_one_round_trip():
+    client = MemoryClient()
+    cat_dao, med_dao, alert_dao = CategoryDAO(client), MedicineDAO(client), AlertDAO(client)
+
+    def trips(write):
+        before = client.round_trips
+        result = write()
+        return client.round_trips - before, result
+
+    n, cat = trips(lambda: cat_dao.create_category("Antibiotics"))
+    assert n == 1
+    n, med = trips(lambda: med_dao.add_medicine("Amoxicillin", "2030-01-01", cat["id"], 1))
+    assert n == 1 and med["quantity"] == 1
+    n, med = trips(lambda: med_dao.add_medicine("Amoxicillin", "2030-01-01", cat["id"], 1))
+    assert n == 1 and med["quantity"] == 2
+    n, _ = trips(lambda: med_dao.add_medicines_bulk([
+        {"name": f"Drug-{i}", "expiry_date": "2031-01-01", "category_id": cat["id"], "quantity": 1}
+        for i in range(100)]))
+    assert n == 1
+    n, _ = trips(lambda: alert_dao.add_alert(med["id"], "2029-12-25"))
+    assert n == 1
+    # Creating an existing category is still one request and returns the same row
+    n, again = trips(lambda: cat_dao.create_category("Antibiotics"))
+    assert n == 1 and again["id"] == cat["id"]
+
+
+def test_expiry_reads_page_past_max_rows(monkeypatch):
+    # Keyset pages and chunked IN lists: every row comes back whatever the page and chunk size
+    monkeypatch.setattr("src.dao.paging.PAGE_SIZE", 4)
+    monkeypatch.setattr("src.dao.medicine_dao.BULK_ID_CHUNK", 3)
+    client = MemoryClient()
+    cat = CategoryDAO(client).create_category("Antibiotics")
+    med_dao = MedicineDAO(client)
+    meds = med_dao.add_medicines_bulk([{"name": f"Drug-{i}", "expiry_date": f"2030-01-{10 - i % 10:02d}",
+                                        "category_id": cat["id"], "quantity": 1} for i in range(10)])
+    expiring = med_dao.list_expiring_between("2030-01-01", "2030-01-31")
+    assert len(expiring) == 10
+    assert [m["expiry_date"] for m in expiring] == sorted(m["expiry_date"] for m in expiring)
+    assert len(med_dao.list_expired("2030-01-06")) == 5
+    before = client.round_trips
+    assert {m["id"] for m in med_dao.get_medicines_by_ids([m["id"] for m in meds])} == {m["id"] for m in meds}
+    assert client.round_trips - before == 4